@@ -0,0 +1,124 @@
+"""
+Générateur de jeux de données synthétiques (5 CSV) reproductible (seed).
+Distribution réaliste : quelques gros clients et une longue traîne, ~15% de
+commandes avec promo, ~25% le matin (avant 10h), dates sur un an (week-ends
+compris), zones / devises / niveaux pondérés, et une petite part de lignes
+invalides ou de références inconnues comme en production.
+
+    python src/bench/generate.py OUT_DIR --orders 1000000 --customers 100000 --seed 42
+"""
+import argparse
+import csv
+import os
+import random
+from datetime import date, timedelta
+
+ZONES = (('ZONE1', 40), ('ZONE2', 30), ('ZONE3', 20), ('ZONE4', 8), ('ZONE9', 2))
+CURRENCIES = (('EUR', 75), ('USD', 15), ('GBP', 10))
+LEVELS = (('BASIC', 80), ('PREMIUM', 20))
+CATEGORIES = ('Electronics', 'Furniture', 'Stationery', 'Accessories')
+PROMOTIONS = (
+    ('PREMIUM10', 'PERCENTAGE', '10', 'true'),
+    ('WEEKEND5', 'PERCENTAGE', '5', 'true'),
+    ('BULK15', 'PERCENTAGE', '15', 'true'),
+    ('FIXED20', 'FIXED', '20', 'true'),
+    ('SUMMER25', 'PERCENTAGE', '25', 'false'),
+)
+SHIPPING_ZONES = (
+    ('ZONE1', '5.00', '0.50'),
+    ('ZONE2', '7.50', '0.60'),
+    ('ZONE3', '10.00', '0.80'),
+    ('ZONE4', '12.50', '1.00'),
+)
+# Exposant de la loi « random() ** SKEW » : plus il est grand, plus les premiers
+# clients concentrent de commandes.
+CUSTOMER_SKEW = 3.0
+PROMO_RATE = 0.15
+MORNING_RATE = 0.25
+INVALID_RATE = 0.005
+UNKNOWN_REF_RATE = 0.01
+START_DATE = date(2025, 1, 1)
+
+
+def _weighted(rnd, choices):
+    values = [v for v, _ in choices]
+    weights = [w for _, w in choices]
+    return lambda: rnd.choices(values, weights)[0]
+
+
+def generate(out_dir, orders=10_000, customers=1_000, products=200, seed=42):
+    """Écrit customers / products / promotions / shipping_zones / orders.csv dans out_dir."""
+    rnd = random.Random(seed)
+    os.makedirs(out_dir, exist_ok=True)
+
+    zone, currency, level = _weighted(rnd, ZONES), _weighted(rnd, CURRENCIES), _weighted(rnd, LEVELS)
+    with open(os.path.join(out_dir, 'customers.csv'), 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f, lineterminator='\n')
+        writer.writerow(('id', 'name', 'level', 'shipping_zone', 'currency'))
+        for i in range(customers):
+            writer.writerow((f'C{i:07d}', f'Customer {i}', level(), zone(), currency()))
+
+    prices = []
+    with open(os.path.join(out_dir, 'products.csv'), 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f, lineterminator='\n')
+        writer.writerow(('id', 'name', 'category', 'price', 'weight', 'taxable'))
+        for i in range(products):
+            price = round(min(rnd.lognormvariate(3.5, 1.2), 5000.0), 2)
+            prices.append(price)
+            writer.writerow((
+                f'P{i:05d}', f'Product {i}', rnd.choice(CATEGORIES), f'{price:.2f}',
+                f'{rnd.uniform(0.1, 20.0):.1f}', 'false' if rnd.random() < 0.1 else 'true',
+            ))
+
+    with open(os.path.join(out_dir, 'promotions.csv'), 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f, lineterminator='\n')
+        writer.writerow(('code', 'type', 'value', 'active'))
+        writer.writerows(PROMOTIONS)
+
+    with open(os.path.join(out_dir, 'shipping_zones.csv'), 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f, lineterminator='\n')
+        writer.writerow(('zone', 'base', 'per_kg'))
+        writer.writerows(SHIPPING_ZONES)
+
+    promo_codes = [p[0] for p in PROMOTIONS] + ['UNKNOWN']
+    days = [(START_DATE + timedelta(days=d)).isoformat() for d in range(365)]
+    with open(os.path.join(out_dir, 'orders.csv'), 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f, lineterminator='\n')
+        writer.writerow(('id', 'customer_id', 'product_id', 'qty', 'unit_price', 'date',
+                         'promo_code', 'time'))
+        rows = []
+        for i in range(orders):
+            c = int(customers * rnd.random() ** CUSTOMER_SKEW)
+            if rnd.random() < UNKNOWN_REF_RATE:
+                c += customers
+            p = rnd.randrange(products + (1 if rnd.random() < UNKNOWN_REF_RATE else 0))
+            qty = rnd.choice((1, 1, 1, 2, 2, 3, 5, 10, 20))
+            price = prices[p] if p < products else 9.99
+            if rnd.random() < INVALID_RATE:
+                qty, price = rnd.choice(((0, price), (qty, -1.0), ('x', price)))
+            hour = rnd.randrange(6, 10) if rnd.random() < MORNING_RATE else rnd.randrange(10, 21)
+            rows.append((
+                f'O{i:08d}', f'C{c:07d}', f'P{p:05d}', qty, price, rnd.choice(days),
+                rnd.choice(promo_codes) if rnd.random() < PROMO_RATE else '',
+                f'{hour:02d}:{rnd.randrange(60):02d}',
+            ))
+            if len(rows) >= 100_000:
+                writer.writerows(rows)
+                rows.clear()
+        writer.writerows(rows)
+    return out_dir
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('out_dir')
+    parser.add_argument('--orders', type=int, default=10_000)
+    parser.add_argument('--customers', type=int, default=1_000)
+    parser.add_argument('--products', type=int, default=200)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args(argv)
+    generate(args.out_dir, args.orders, args.customers, args.products, args.seed)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,194 @@
+"""
+Benchmark legacy vs refacto sur des jeux synthétiques (cf. generate.py).
+Chaque étape du pipeline refacto est chronométrée séparément : load,
+aggregate, pricing (remises / taxe / port), format, json. Pour chaque étape :
+temps mur, temps CPU, débit (lignes/s) et pic mémoire (tracemalloc si
+--tracemalloc, sinon pic RSS du processus). Les résultats sont comparés à
+bench/baselines.json ; une étape plus lente que baseline * (1 + tolérance)
+est signalée et le code de sortie vaut 1.
+
+    python src/bench/run_bench.py --orders 1000000 --customers 100000
+    python src/bench/run_bench.py --orders 1000000 --customers 100000 --save-baseline
+"""
+import argparse
+import contextlib
+import importlib.util
+import io
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))  # src
+sys.path.insert(0, base_dir)
+
+from bench.generate import generate  # noqa: E402
+from refacto.io_handler import read_data, write_json  # noqa: E402
+from refacto.aggregation import aggregate_orders  # noqa: E402
+from refacto.order_report import (  # noqa: E402
+    assemble_report,
+    compute_customer_amounts,
+    compute_report,
+    format_customer_entry,
+)
+
+BASELINES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baselines.json')
+DEFAULT_TOLERANCE = 0.20
+# En dessous de ce seuil (s), un écart est considéré comme du bruit.
+NOISE_FLOOR = 0.05
+
+
+def _peak_rss_mb():
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+@contextlib.contextmanager
+def stage(results, name, rows, trace):
+    if trace:
+        tracemalloc.start()
+    wall, cpu = time.perf_counter(), time.process_time()
+    yield
+    wall, cpu = time.perf_counter() - wall, time.process_time() - cpu
+    if trace:
+        peak_mb = tracemalloc.get_traced_memory()[1] / (1024 * 1024)
+        tracemalloc.stop()
+    else:
+        peak_mb = _peak_rss_mb()
+    results[name] = {
+        'wall_s': round(wall, 4),
+        'cpu_s': round(cpu, 4),
+        'rows': rows,
+        'rows_per_s': round(rows / wall) if wall > 0 else None,
+        'peak_mb': round(peak_mb, 1) if peak_mb is not None else None,
+    }
+
+
+def bench_refacto(data_dir, rows, trace=False, compact=False):
+    results = {}
+    with stage(results, 'load', rows, trace):
+        customers, products, shipping_zones, promotions, orders = read_data(data_dir, compact=compact)
+    with stage(results, 'aggregate', rows, trace):
+        totals_by_customer = aggregate_orders(orders, products, promotions)
+    n = len(totals_by_customer)
+    with stage(results, 'pricing', n, trace):
+        amounts = [
+            compute_customer_amounts(cid, totals_by_customer[cid], customers, shipping_zones)
+            for cid in sorted(totals_by_customer)
+        ]
+    with stage(results, 'format', n, trace):
+        _, json_data = assemble_report(format_customer_entry(a) for a in amounts)
+    with tempfile.TemporaryDirectory() as tmp, stage(results, 'json', n, trace):
+        write_json(json_data, os.path.join(tmp, 'output.json'))
+    return results
+
+
+def bench_engines(data_dir, rows, trace=False):
+    """compute_report de bout en bout (lecture comprise) : moteur Python sur des Order,
+    moteur numpy sur les colonnes du chargeur rapide, comme run(engine=...)."""
+    results = {}
+    with stage(results, 'e2e_python', rows, trace):
+        compute_report(*read_data(data_dir), engine='python')
+    with stage(results, 'e2e_numpy', rows, trace):
+        compute_report(*read_data(data_dir, fast=True), engine='numpy')
+    return results
+
+
+def bench_legacy(data_dir, rows, trace=False):
+    """Le legacy lit ./data à côté de son module : on en exécute une copie dans un dossier temporaire."""
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        shutil.copy(os.path.join(base_dir, 'legacy', 'order_report_legacy.py'), tmp)
+        try:
+            os.symlink(os.path.abspath(data_dir), os.path.join(tmp, 'data'), target_is_directory=True)
+        except OSError:  # symlink non autorisé (Windows sans droits)
+            shutil.copytree(data_dir, os.path.join(tmp, 'data'))
+        spec = importlib.util.spec_from_file_location(
+            'bench_legacy_copy', os.path.join(tmp, 'order_report_legacy.py'))
+        legacy = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(legacy)
+        with stage(results, 'legacy_total', rows, trace), contextlib.redirect_stdout(io.StringIO()):
+            legacy.run()
+    return results
+
+
+def compare(results, baseline, tolerance=DEFAULT_TOLERANCE):
+    """Liste des étapes en régression par rapport à la baseline."""
+    regressions = []
+    for name, current in results.items():
+        ref = baseline.get(name)
+        if ref is None:
+            continue
+        limit = ref['wall_s'] * (1 + tolerance)
+        if current['wall_s'] > limit and current['wall_s'] - ref['wall_s'] > NOISE_FLOOR:
+            regressions.append({'stage': name, 'baseline_s': ref['wall_s'], 'wall_s': current['wall_s']})
+    return regressions
+
+
+def _load_baselines(path):
+    if not os.path.exists(path):
+        return {}
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark legacy vs refacto')
+    parser.add_argument('--orders', type=int, default=100_000)
+    parser.add_argument('--customers', type=int, default=10_000)
+    parser.add_argument('--products', type=int, default=200)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--data-dir', help='jeu déjà généré (sinon généré dans un dossier temporaire)')
+    parser.add_argument('--skip-legacy', action='store_true')
+    parser.add_argument('--compact', action='store_true', help='commandes en OrderBatch')
+    parser.add_argument('--engines', action='store_true',
+                        help='compare les moteurs python et numpy de bout en bout (numpy requis)')
+    parser.add_argument('--tracemalloc', action='store_true', help='pic mémoire par étape (plus lent)')
+    parser.add_argument('--output', help='fichier JSON des résultats')
+    parser.add_argument('--baselines', default=BASELINES_PATH)
+    parser.add_argument('--save-baseline', action='store_true')
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE)
+    args = parser.parse_args(argv)
+
+    label = f'{args.orders}x{args.customers}' + ('-compact' if args.compact else '')
+    with tempfile.TemporaryDirectory() as tmp:
+        data_dir = args.data_dir or generate(
+            os.path.join(tmp, 'data'), args.orders, args.customers, args.products, args.seed)
+        results = bench_refacto(data_dir, args.orders, args.tracemalloc, args.compact)
+        if args.engines:
+            results.update(bench_engines(data_dir, args.orders, args.tracemalloc))
+        if not args.skip_legacy:
+            results.update(bench_legacy(data_dir, args.orders, args.tracemalloc))
+
+    baselines = _load_baselines(args.baselines)
+    regressions = compare(results, baselines.get(label, {}), args.tolerance)
+    report = {'label': label, 'stages': results, 'regressions': regressions}
+
+    for name, r in results.items():
+        print(f"{name:<13} {r['wall_s']:>9.3f}s  cpu {r['cpu_s']:>9.3f}s  "
+              f"{r['rows_per_s'] or 0:>12,} rows/s  peak {r['peak_mb']} MB")
+    for r in regressions:
+        print(f"REGRESSION {r['stage']}: {r['wall_s']:.3f}s (baseline {r['baseline_s']:.3f}s)")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+    if args.save_baseline:
+        baselines[label] = results
+        with open(args.baselines, 'w', encoding='utf-8') as f:
+            json.dump(baselines, f, indent=2)
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,82 @@
+"""
+Agrégation par client en une seule passe.
+Chaque client garde un accumulateur de taille fixe (CustomerTotals) :
+aucune liste de commandes n'est conservée, la mémoire dépend du nombre
+de clients et non du nombre de commandes.
+"""
+from .models import CustomerTotals
+from .calendar_cache import parse_day, parse_hour
+from .calculations import (
+    LOYALTY_RATIO,
+    TAX,
+    apply_promotion_and_morning,
+    promotion_rates,
+    price_line,
+)
+from .order_store import OrderBatch
+
+
+def add_line(totals, qty, unit_price, prod, line_total, morning_bonus):
+    """Ajoute une ligne déjà tarifée à l'accumulateur d'un client."""
+    totals.subtotal += line_total
+    totals.weight += (prod.weight if prod else 1.0) * qty
+    totals.morning_bonus += morning_bonus
+    totals.item_count += 1
+    totals.loyalty_points += qty * unit_price * LOYALTY_RATIO
+
+    # Même ordre d'opérations que compute_tax : le flottant reste identique.
+    if prod:
+        if prod.taxable:
+            totals.line_tax += qty * prod.price * TAX
+        else:
+            totals.non_taxable_items += 1
+    return totals
+
+
+def add_order(totals_by_customer, o, products, promotions):
+    """Ajoute une commande à l'accumulateur de son client."""
+    cid = o.customer_id
+    prod = products.get(o.product_id)
+    line_total, morning_bonus = apply_promotion_and_morning(o, products, promotions)
+
+    totals = totals_by_customer.get(cid)
+    if totals is None:
+        totals = totals_by_customer[cid] = CustomerTotals(first_day=o.day)
+    return add_line(totals, o.qty, o.unit_price, prod, line_total, morning_bonus)
+
+
+def aggregate_batch(batch, products, promotions):
+    """Agrégation directe sur les colonnes d'un OrderBatch, sans objet par ligne.
+
+    Produits, promos, heures et dates sont résolus une fois par valeur distincte.
+    """
+    prods = [products.get(pid) for pid in batch.product_ids.values]
+    rates = [promotion_rates(code, promotions) for code in batch.promo_codes.values]
+    hours = [parse_hour(t) for t in batch.times.values]
+    days = [parse_day(d) for d in batch.dates.values]
+
+    by_code = [None] * len(batch.customer_ids)
+    rows = zip(batch.customer, batch.product, batch.qty, batch.unit_price,
+               batch.date, batch.promo, batch.time)
+    for c, p, qty, unit_price, d, m, t in rows:
+        prod = prods[p]
+        discount_rate, fixed_discount = rates[m]
+        line_total, morning_bonus = price_line(
+            qty, prod.price if prod else unit_price, discount_rate, fixed_discount, hours[t])
+
+        totals = by_code[c]
+        if totals is None:
+            totals = by_code[c] = CustomerTotals(first_day=days[d])
+        add_line(totals, qty, unit_price, prod, line_total, morning_bonus)
+
+    return dict(zip(batch.customer_ids.values, by_code))
+
+
+def aggregate_orders(orders, products, promotions):
+    """Une seule passe sur `orders` (liste, générateur ou OrderBatch)."""
+    if isinstance(orders, OrderBatch):
+        return aggregate_batch(orders, products, promotions)
+    totals_by_customer = {}
+    for o in orders:
+        add_order(totals_by_customer, o, products, promotions)
+    return totals_by_customer
@@ -0,0 +1,223 @@
+"""
+Mode batch : un rapport par dossier de données (un magasin), tous les
+dossiers répartis sur un même pool de processus.
+
+Les tables de référence identiques octet pour octet d'un magasin à l'autre
+(en général products.csv, promotions.csv, shipping_zones.csv) ne sont
+parsées qu'une fois, dans le processus principal, puis envoyées une fois à
+chaque processus (initializer) ; les autres fichiers sont parsés par le
+processus qui traite le magasin. Chaque magasin écrit report.txt et
+output.json dans son propre dossier de sortie ; un échec n'arrête pas les
+autres et le résumé (summary.json) donne durée et erreur par magasin.
+"""
+import argparse
+import collections
+import glob
+import hashlib
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass
+
+from .io_handler import REFERENCE_TABLES, write_json
+from .order_store import load_order_batch
+from .rules import default_rules, load_rules
+
+REPORT_FILENAME = 'report.txt'
+JSON_FILENAME = 'output.json'
+SUMMARY_FILENAME = 'summary.json'
+
+# Tables partagées, envoyées une fois par processus (initializer).
+_shared = {}
+
+
+@dataclass(slots=True)
+class StoreResult:
+    data_dir: str
+    output_dir: str
+    ok: bool
+    seconds: float
+    customers: int = 0
+    error: str = None
+
+
+def expand_data_dirs(patterns):
+    """Dossiers désignés par des chemins ou des motifs glob, sans doublon, triés."""
+    dirs = set()
+    for pattern in patterns:
+        matches = glob.glob(pattern) if glob.has_magic(pattern) else [pattern]
+        dirs.update(os.path.normpath(p) for p in matches if os.path.isdir(p))
+    return sorted(dirs)
+
+
+def output_dirs(data_dirs, output_root):
+    """Dossier de sortie de chaque magasin : son chemin relatif à la racine commune
+    des dossiers, sous output_root (le dossier de données lui-même si output_root est None)."""
+    if output_root is None:
+        return list(data_dirs)
+    absolute = [os.path.abspath(d) for d in data_dirs]
+    if len(absolute) == 1:
+        return [os.path.join(output_root, os.path.basename(absolute[0]))]
+    common = os.path.commonpath(absolute)
+    return [os.path.join(output_root, os.path.relpath(d, common)) for d in absolute]
+
+
+def _digest(path):
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            h.update(block)
+    return h.hexdigest()
+
+
+def _reference_digests(data_dir):
+    """{table: empreinte du fichier}, None pour un fichier illisible (erreur au chargement)."""
+    digests = {}
+    for name, _, filename in REFERENCE_TABLES:
+        try:
+            digests[name] = _digest(os.path.join(data_dir, filename))
+        except OSError:
+            digests[name] = None
+    return digests
+
+
+def parse_shared_tables(data_dirs):
+    """(empreintes par dossier, tables partagées) : chaque table de référence dont le
+    contenu apparaît dans au moins deux dossiers est parsée une seule fois.
+
+    Une table partagée illisible est laissée hors de `shared` : chaque magasin
+    qui l'utilise la reparse dans process_store et échoue seul.
+    """
+    digests = [_reference_digests(d) for d in data_dirs]
+    seen = collections.Counter((name, digest) for ds in digests for name, digest in ds.items()
+                               if digest is not None)
+    loaders = {name: (loader, filename) for name, loader, filename in REFERENCE_TABLES}
+    shared = {}
+    failed = set()
+    for data_dir, ds in zip(data_dirs, digests):
+        for name, digest in ds.items():
+            key = (name, digest)
+            if seen.get(key, 0) > 1 and key not in shared and key not in failed:
+                loader, filename = loaders[name]
+                try:
+                    shared[key] = loader(os.path.join(data_dir, filename))
+                except Exception:
+                    failed.add(key)
+    return digests, shared
+
+
+def _init_worker(shared, rules):
+    _shared.clear()
+    _shared.update(shared)
+    _shared['rules'] = rules
+
+
+def _store_tables(data_dir, digests):
+    tables = []
+    for name, loader, filename in REFERENCE_TABLES:
+        table = _shared.get((name, digests.get(name)))
+        if table is None:
+            table = loader(os.path.join(data_dir, filename))
+        tables.append(table)
+    return tables + [load_order_batch(os.path.join(data_dir, 'orders.csv'))]
+
+
+def process_store(data_dir, output_dir, digests):
+    """Rapport d'un magasin écrit dans output_dir ; les erreurs sont rendues, pas levées."""
+    from .order_report import compute_report
+
+    started = time.perf_counter()
+    try:
+        tables = _store_tables(data_dir, digests)
+        result, json_data = compute_report(*tables, rules=_shared.get('rules'))
+        os.makedirs(output_dir, exist_ok=True)
+        with open(os.path.join(output_dir, REPORT_FILENAME), 'w', encoding='utf-8') as f:
+            f.write(result + '\n')  # même contenu que la sortie console de run()
+        write_json(json_data, os.path.join(output_dir, JSON_FILENAME))
+    except Exception as e:
+        return StoreResult(data_dir, output_dir, False, time.perf_counter() - started,
+                           error=f'{type(e).__name__}: {e}')
+    return StoreResult(data_dir, output_dir, True, time.perf_counter() - started,
+                       customers=len(json_data))
+
+
+def run_batch(data_dirs, output_root=None, jobs=None, rules=None, summary_path=None):
+    """Traite chaque dossier de data_dirs ; renvoie les StoreResult dans l'ordre de data_dirs.
+
+    jobs : nombre de processus (défaut os.cpu_count()) ; jobs=1 traite tout
+    dans le processus courant. summary_path : résumé JSON (défaut
+    output_root/summary.json si output_root est donné).
+    """
+    started = time.perf_counter()
+    rules = rules or default_rules()
+    outputs = output_dirs(data_dirs, output_root)
+    digests, shared = parse_shared_tables(data_dirs)
+    jobs = min(jobs or os.cpu_count() or 1, max(len(data_dirs), 1))
+
+    if jobs == 1:
+        _init_worker(shared, rules)
+        try:
+            results = [process_store(*args) for args in zip(data_dirs, outputs, digests)]
+        finally:
+            _shared.clear()
+    else:
+        with ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker,
+                                 initargs=(shared, rules)) as pool:
+            results = list(pool.map(process_store, data_dirs, outputs, digests))
+
+    if summary_path is None and output_root is not None:
+        summary_path = os.path.join(output_root, SUMMARY_FILENAME)
+    if summary_path:
+        write_summary(results, summary_path, time.perf_counter() - started, shared)
+    return results
+
+
+def summary(results, seconds, shared=()):
+    return {
+        'stores': len(results),
+        'failed': sum(not r.ok for r in results),
+        'seconds': round(seconds, 6),
+        'shared_tables': sorted({name for name, _ in shared}),
+        'results': [dict(asdict(r), seconds=round(r.seconds, 6)) for r in results],
+    }
+
+
+def write_summary(results, path, seconds, shared=()):
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(summary(results, seconds, shared), f, indent=2)
+
+
+def format_summary(results):
+    """Une ligne par magasin (durée, clients ou erreur) puis le total."""
+    lines = []
+    for r in results:
+        status = f'{r.customers} customers' if r.ok else f'FAILED {r.error}'
+        lines.append(f'{r.data_dir}: {r.seconds:.3f}s {status}')
+    failed = sum(not r.ok for r in results)
+    lines.append(f'{len(results)} stores, {failed} failed')
+    return '\n'.join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Order report, one per data directory')
+    parser.add_argument('data_dirs', nargs='+', help='dossiers de données ou motifs glob')
+    parser.add_argument('--out', metavar='DIR', help='racine des sorties (défaut : dans chaque dossier)')
+    parser.add_argument('--jobs', type=int, default=None)
+    parser.add_argument('--rules', metavar='PATH', help='fichier de règles tarifaires (JSON)')
+    parser.add_argument('--summary', metavar='PATH', help='résumé JSON (défaut : OUT/summary.json)')
+    args = parser.parse_args(argv)
+
+    data_dirs = expand_data_dirs(args.data_dirs)
+    if not data_dirs:
+        parser.error('no data directory matched')
+    rules = load_rules(args.rules) if args.rules else None
+    results = run_batch(data_dirs, args.out, args.jobs, rules, args.summary)
+    print(format_summary(results), file=sys.stderr)
+    return 1 if any(not r.ok for r in results) else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
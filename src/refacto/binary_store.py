@@ -0,0 +1,268 @@
+"""
+Format binaire colonnaire des données (un fichier <table>.col par CSV) et
+chargement par mmap sans copie.
+
+Disposition d'un fichier :
+- MAGIC (8 octets), longueur de l'en-tête (uint32 little-endian), en-tête JSON :
+  nombre de lignes, ordre des octets et, par colonne, son type et la position
+  (offset, taille) de ses données ;
+- données des colonnes, alignées sur 8 octets : colonnes numériques à largeur
+  fixe (i32 / i64 / f64 / u8) ; colonnes de chaînes encodées en dictionnaire :
+  codes i32 + valeurs distinctes en tableau JSON (ordre de première apparition).
+
+Au chargement, les colonnes numériques et les codes sont des memoryview sur
+le fichier mappé (aucune copie : les pages sont partagées entre processus) ;
+seuls les dictionnaires (valeurs distinctes) sont décodés. Les commandes
+redeviennent un OrderBatch, donc utilisables par compute_report ; les tables
+de référence les mêmes dictionnaires que read_data.
+"""
+import argparse
+import json
+import mmap
+import os
+import struct
+import sys
+from array import array
+
+from .models import Customer, Product, Promotion, ShippingZone
+from .io_handler import REFERENCE_TABLES
+from .order_store import OrderBatch, StringDictionary, load_order_batch
+from .instrumentation import span
+
+MAGIC = b'ORDCOL1\0'
+FORMAT_VERSION = 1
+EXTENSION = '.col'
+_ALIGN = 8
+_TYPECODES = {'i32': 'i', 'i64': 'q', 'f64': 'd', 'u8': 'B'}
+
+# (attribut OrderBatch, colonne, type) ; les colonnes 'str' sont (codes, dictionnaire).
+ORDER_COLUMNS = (
+    ('customer', 'customer_id', 'str', 'customer_ids'),
+    ('product', 'product_id', 'str', 'product_ids'),
+    ('qty', 'qty', 'i64', None),
+    ('unit_price', 'unit_price', 'f64', None),
+    ('date', 'date', 'str', 'dates'),
+    ('promo', 'promo_code', 'str', 'promo_codes'),
+    ('time', 'time', 'str', 'times'),
+)
+# Tables de référence : (colonne, type), dans l'ordre des champs de la dataclass.
+TABLE_COLUMNS = {
+    'customers': (Customer, (('id', 'str'), ('name', 'str'), ('level', 'str'),
+                             ('shipping_zone', 'str'), ('currency', 'str'))),
+    'products': (Product, (('id', 'str'), ('name', 'str'), ('category', 'str'),
+                           ('price', 'f64'), ('weight', 'f64'), ('taxable', 'u8'))),
+    'shipping_zones': (ShippingZone, (('zone', 'str'), ('base', 'f64'), ('per_kg', 'f64'))),
+    'promotions': (Promotion, (('code', 'str'), ('type', 'str'), ('value', 'str'),
+                               ('active', 'u8'))),
+}
+
+
+def table_path(directory, name):
+    return os.path.join(directory, name + EXTENSION)
+
+
+def _padding(size):
+    return -size % _ALIGN
+
+
+def write_columns(path, rows, columns):
+    """Écrit `columns` : [(nom, type, données)] ; données = array pour un type numérique,
+    (codes array('i'), valeurs distinctes) pour 'str'. Offsets relatifs au début des données."""
+    header = {'version': FORMAT_VERSION, 'rows': rows, 'byteorder': sys.byteorder, 'columns': []}
+    blobs = []
+    position = 0
+    for name, kind, data in columns:
+        if kind == 'str':
+            codes, values = data
+            parts = (('codes', codes.tobytes()),
+                     ('values', json.dumps(values, ensure_ascii=False).encode('utf-8')))
+        else:
+            parts = (('data', data.tobytes()),)
+        column = {'name': name, 'kind': kind}
+        for part, blob in parts:
+            column[part] = [position, len(blob)]
+            position += len(blob) + _padding(len(blob))
+            blobs.append(blob)
+        header['columns'].append(column)
+
+    raw_header = json.dumps(header).encode('utf-8')
+    start = len(MAGIC) + 4 + len(raw_header)
+    tmp = path + '.tmp'
+    with open(tmp, 'wb') as f:
+        f.write(MAGIC)
+        f.write(struct.pack('<I', len(raw_header)))
+        f.write(raw_header)
+        f.write(b'\0' * _padding(start))
+        for blob in blobs:
+            f.write(blob)
+            f.write(b'\0' * _padding(len(blob)))
+    os.replace(tmp, path)
+    return path
+
+
+class MappedTable:
+    """Fichier .col mappé en mémoire ; les colonnes sont des vues sans copie."""
+
+    def __init__(self, path):
+        with open(path, 'rb') as f:
+            size = os.fstat(f.fileno()).st_size
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if size else b''
+        buffer = memoryview(self._mmap)
+        if bytes(buffer[:len(MAGIC)]) != MAGIC:
+            raise ValueError(f'{path}: not a columnar order file')
+        (length,) = struct.unpack_from('<I', buffer, len(MAGIC))
+        start = len(MAGIC) + 4
+        self.header = json.loads(bytes(buffer[start:start + length]))
+        if self.header['version'] != FORMAT_VERSION:
+            raise ValueError(f'{path}: unsupported format version {self.header["version"]}')
+        start += length
+        self._data = buffer[start + _padding(start):]
+        self.rows = self.header['rows']
+        self.columns = {column['name']: column for column in self.header['columns']}
+
+    def _view(self, part, typecode):
+        offset, size = part
+        view = self._data[offset:offset + size].cast(typecode)
+        if self.header['byteorder'] != sys.byteorder:
+            # Autre ordre des octets : copie retournée (seul cas non zéro-copie)
+            view = array(typecode, view)
+            view.byteswap()
+        return view
+
+    def numeric(self, name):
+        column = self.columns[name]
+        return self._view(column['data'], _TYPECODES[column['kind']])
+
+    def codes(self, name):
+        return self._view(self.columns[name]['codes'], 'i')
+
+    def values(self, name):
+        offset, size = self.columns[name]['values']
+        return json.loads(bytes(self._data[offset:offset + size]).decode('utf-8'))
+
+    def strings(self, name):
+        """Colonne de chaînes décodée (tables de référence, petites)."""
+        values = self.values(name)
+        return [values[code] for code in self.codes(name)]
+
+    def column(self, name):
+        return self.strings(name) if self.columns[name]['kind'] == 'str' else self.numeric(name)
+
+
+class _MappedDictionary(StringDictionary):
+    """Dictionnaire relu d'un fichier : la table inverse n'est construite qu'au premier encode."""
+    __slots__ = ()
+
+    def __init__(self, values):
+        self.values = values
+        self._codes = None
+
+    def encode(self, value):
+        if self._codes is None:
+            self._codes = {v: i for i, v in enumerate(self.values)}
+        return StringDictionary.encode(self, value)
+
+
+def _encode_strings(values):
+    dictionary = StringDictionary()
+    codes = array('i', map(dictionary.encode, values))
+    return codes, dictionary.values
+
+
+def write_order_batch(batch, path, extra=()):
+    """Écrit un OrderBatch (les ids de commande seulement s'ils sont conservés).
+
+    extra : colonnes supplémentaires [(nom, type, données)] (cf. date_store.py).
+    """
+    columns = []
+    for attribute, name, kind, dictionary in ORDER_COLUMNS:
+        data = getattr(batch, attribute)
+        if kind == 'str':
+            data = (array('i', data), getattr(batch, dictionary).values)
+        columns.append((name, kind, array(_TYPECODES[kind], data) if kind != 'str' else data))
+    if batch.ids is not None:
+        columns.append(('id', 'str', _encode_strings(batch.ids)))
+    return write_columns(path, len(batch), columns + list(extra))
+
+
+def load_order_batch_mapped(path):
+    """OrderBatch dont les colonnes sont des memoryview sur le fichier mappé."""
+    table = MappedTable(path)
+    batch = OrderBatch(keep_ids='id' in table.columns)
+    for attribute, name, kind, dictionary in ORDER_COLUMNS:
+        if kind == 'str':
+            setattr(batch, attribute, table.codes(name))
+            setattr(batch, dictionary, _MappedDictionary(table.values(name)))
+        else:
+            setattr(batch, attribute, table.numeric(name))
+    if batch.ids is not None:
+        batch.ids = table.strings('id')
+    batch.mapped = table  # garde le mmap ouvert tant que le batch vit
+    return batch
+
+
+def write_table(rows, path, name):
+    """Écrit une table de référence ({id: dataclass}) au format colonnaire."""
+    _, spec = TABLE_COLUMNS[name]
+    records = list(rows.values())
+    columns = []
+    for column, kind in spec:
+        values = [getattr(r, column) for r in records]
+        columns.append((column, kind,
+                        _encode_strings(values) if kind == 'str' else array(_TYPECODES[kind], values)))
+    return write_columns(path, len(records), columns)
+
+
+def load_table(path, name):
+    """Même dictionnaire {clé: dataclass} que le loader CSV de la table."""
+    cls, spec = TABLE_COLUMNS[name]
+    table = MappedTable(path)
+    columns = [table.column(column) for column, _ in spec]
+    rows = {}
+    for values in zip(*columns):
+        values = [bool(v) if kind == 'u8' else v for v, (_, kind) in zip(values, spec)]
+        rows[values[0]] = cls(*values)
+    return rows
+
+
+def convert_data_dir(data_dir, out_dir=None, keep_ids=False):
+    """Convertit les 5 CSV de data_dir en fichiers .col (dans out_dir, data_dir par défaut)."""
+    out_dir = out_dir or data_dir
+    os.makedirs(out_dir, exist_ok=True)
+    paths = []
+    for name, loader, filename in REFERENCE_TABLES:
+        paths.append(write_table(loader(os.path.join(data_dir, filename)), table_path(out_dir, name),
+                                 name))
+    batch = load_order_batch(os.path.join(data_dir, 'orders.csv'), keep_ids=keep_ids)
+    paths.append(write_order_batch(batch, table_path(out_dir, 'orders')))
+    return paths
+
+
+def read_data_binary(directory):
+    """Même tuple que read_data, depuis les fichiers .col de `directory`."""
+    tables = []
+    for name, _, _ in REFERENCE_TABLES:
+        with span(f'load.{name}') as s:
+            table = load_table(table_path(directory, name), name)
+            if s is not None:
+                s.rows = len(table)
+        tables.append(table)
+    with span('load.orders') as s:
+        orders = load_order_batch_mapped(table_path(directory, 'orders'))
+        if s is not None:
+            s.rows = len(orders)
+    return tuple(tables) + (orders,)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Convert CSV data to the columnar binary format')
+    parser.add_argument('data_dir')
+    parser.add_argument('--out', metavar='DIR', help='dossier des fichiers .col (défaut : data_dir)')
+    parser.add_argument('--keep-ids', action='store_true', help='conserve les ids de commande')
+    args = parser.parse_args(argv)
+    for path in convert_data_dir(args.data_dir, args.out, args.keep_ids):
+        print(path)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,144 @@
+"""
+Cache des données parsées (snapshot binaire) et du dernier rapport.
+Les snapshots sont rangés à côté du dossier data (<data_dir>.cache/) et
+indexés par la signature des 5 CSV : taille + mtime, et en option le sha256
+du contenu, et par le sha256 des modules de parsing (et de calcul pour le
+rapport). La validation ne coûte qu'un os.stat par fichier ; les snapshots
+les plus anciens sont supprimés au-delà de MAX_CACHE_BYTES.
+"""
+import hashlib
+import os
+import pickle
+import tempfile
+
+from .models import Order, order_row
+from .io_handler import read_data
+from .rules import default_rules
+
+# À incrémenter quand le contenu d'un snapshot change de forme (tuple de Order, tables).
+SNAPSHOT_VERSION = 2
+MAX_CACHE_BYTES = 512 * 1024 * 1024
+DATA_FILES = ('customers.csv', 'products.csv', 'shipping_zones.csv', 'promotions.csv', 'orders.csv')
+# Modules dont dépend le parsing : une modification invalide les snapshots.
+PARSING_MODULES = ('calendar_cache.py', 'fast_loader.py', 'io_handler.py', 'loader.py', 'models.py',
+                   'order_store.py')
+# Modules dont dépend le rapport (parsing compris) : une modification invalide le cache de résultat.
+RULE_MODULES = PARSING_MODULES + ('aggregation.py', 'calculations.py', 'columnar.py', 'discounts.py',
+                                  'formatter.py', 'order_report.py', 'rules.py')
+
+
+def cache_dir_for(data_dir):
+    return os.path.normpath(data_dir) + '.cache'
+
+
+def _sha256(path):
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            h.update(block)
+    return h.hexdigest()
+
+
+def input_signature(data_dir, content_hash=False):
+    """(nom, taille, mtime_ns[, sha256]) par fichier ; None si absent (promotions.csv)."""
+    signature = []
+    for name in DATA_FILES:
+        path = os.path.join(data_dir, name)
+        try:
+            st = os.stat(path)
+        except FileNotFoundError:
+            signature.append((name, None))
+            continue
+        entry = (name, st.st_size, st.st_mtime_ns)
+        if content_hash:
+            entry += (_sha256(path),)
+        signature.append(entry)
+    return tuple(signature)
+
+
+def _key(*parts):
+    return hashlib.sha256(repr((SNAPSHOT_VERSION,) + parts).encode('utf-8')).hexdigest()[:32]
+
+
+def _source_signature(modules):
+    base = os.path.dirname(__file__)
+    return tuple(_sha256(os.path.join(base, name)) for name in modules)
+
+
+def _load(path):
+    try:
+        with open(path, 'rb') as f:
+            value = pickle.load(f)
+    except (OSError, pickle.UnpicklingError, EOFError, AttributeError):
+        return None
+    os.utime(path)  # LRU : un snapshot relu redevient récent
+    return value
+
+
+def _store(path, value, max_bytes):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    # Nom temporaire unique : deux runs concurrents n'écrivent pas le même fichier.
+    with tempfile.NamedTemporaryFile(dir=os.path.dirname(path), prefix=os.path.basename(path) + '.',
+                                     suffix='.tmp', delete=False) as f:
+        try:
+            pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+        except BaseException:
+            f.close()
+            os.unlink(f.name)
+            raise
+    os.replace(f.name, path)
+    evict(os.path.dirname(path), max_bytes, keep=path)
+
+
+def evict(cache_dir, max_bytes=MAX_CACHE_BYTES, keep=None):
+    """Supprime les snapshots les moins récemment utilisés au-delà de max_bytes."""
+    entries = []
+    for name in os.listdir(cache_dir):
+        if not name.endswith('.pickle'):
+            continue
+        path = os.path.join(cache_dir, name)
+        st = os.stat(path)
+        entries.append((st.st_mtime, st.st_size, path))
+    total = sum(size for _, size, _ in entries)
+    for _, size, path in sorted(entries):
+        if total <= max_bytes:
+            break
+        if path == keep:
+            continue
+        os.remove(path)
+        total -= size
+
+
+def read_data_cached(data_dir, content_hash=False, max_bytes=MAX_CACHE_BYTES):
+    """Même retour que read_data ; le parsing CSV n'a lieu que si un fichier a changé."""
+    signature = input_signature(data_dir, content_hash)
+    key = _key(signature, _source_signature(PARSING_MODULES))
+    path = os.path.join(cache_dir_for(data_dir), f'snapshot-{key}.pickle')
+
+    snapshot = _load(path)
+    if snapshot is not None:
+        customers, products, shipping_zones, promotions, rows = snapshot
+        return customers, products, shipping_zones, promotions, [Order(*row) for row in rows]
+
+    customers, products, shipping_zones, promotions, orders = read_data(data_dir)
+    # Les commandes sont stockées en tuples : plus compact et plus rapide qu'une liste de dataclasses.
+    rows = [order_row(o) for o in orders]
+    _store(path, (customers, products, shipping_zones, promotions, rows), max_bytes)
+    return customers, products, shipping_zones, promotions, orders
+
+
+def cached_report(data_dir, compute, content_hash=False, max_bytes=MAX_CACHE_BYTES, rules=None):
+    """Renvoie le dernier (result, json_data) si aucune entrée ni règle n'a changé.
+
+    `compute()` n'est appelé qu'en cas d'absence. `rules` : règles tarifaires
+    utilisées par compute (leur digest entre dans la clé), rules.json par défaut.
+    """
+    signature = input_signature(data_dir, content_hash)
+    key = _key(signature, _source_signature(RULE_MODULES), (rules or default_rules()).digest)
+    path = os.path.join(cache_dir_for(data_dir), f'report-{key}.pickle')
+
+    report = _load(path)
+    if report is None:
+        report = compute()
+        _store(path, report, max_bytes)
+    return report
@@ -1,6 +1,5 @@
-import math
-from datetime import datetime
 from .models import ShippingZone
+from .rules import default_rules
 from .discounts import (
     compute_volume_discount,
     compute_weekend_bonus,
@@ -9,9 +8,19 @@ from .discounts import (
 )
 
 TAX = 0.2
-SHIPPING_LIMIT = 50
-handling_fee = 2.5
 LOYALTY_RATIO = 0.01
+# Valeurs du rules.json par défaut, lues une fois à l'import, pour les appelants des
+# anciennes constantes. Elles ne suivent pas un autre fichier de règles (--rules,
+# rules_path) : le calcul utilise toujours Rules.shipping_limit / Rules.handling_fee.
+SHIPPING_LIMIT = default_rules().shipping_limit
+handling_fee = default_rules().config['handling'][0]['fee']  # premier palier (> 10 articles)
+
+
+def customer_profile(cust):
+    """(name, level, zone, currency) avec les valeurs par défaut legacy si client inconnu."""
+    if cust is None:
+        return 'Unknown', 'BASIC', 'ZONE1', 'EUR'
+    return cust.name, cust.level, cust.shipping_zone, cust.currency
 
 
 def compute_loyalty_points(orders):
@@ -24,23 +33,24 @@ def compute_loyalty_points(orders):
     return loyalty_points
 
 
-def apply_promotion_and_morning(o, products, promotions):
-    prod = products.get(o.product_id)
-    base_price = prod.price if prod else o.unit_price
-
+def promotion_rates(promo_code, promotions):
+    """(taux de remise, remise fixe par unité) de la promo, si elle existe et est active."""
     discount_rate = 0
     fixed_discount = 0
-    if o.promo_code and o.promo_code in promotions:
-        promo = promotions[o.promo_code]
+    if promo_code and promo_code in promotions:
+        promo = promotions[promo_code]
         if promo.active:
             if promo.type == 'PERCENTAGE':
                 discount_rate = float(promo.value) / 100
             elif promo.type == 'FIXED':
                 fixed_discount = float(promo.value)
+    return discount_rate, fixed_discount
+
 
-    line_total = o.qty * base_price * (1 - discount_rate) - fixed_discount * o.qty
+def price_line(qty, base_price, discount_rate, fixed_discount, hour):
+    """Montant d'une ligne après promo et bonus matin (-3% avant 10h)."""
+    line_total = qty * base_price * (1 - discount_rate) - fixed_discount * qty
 
-    hour = int(o.time.split(':')[0])
     morning_bonus = 0
     if hour < 10:
         morning_bonus = line_total * 0.03
@@ -49,6 +59,13 @@ def apply_promotion_and_morning(o, products, promotions):
     return line_total, morning_bonus
 
 
+def apply_promotion_and_morning(o, products, promotions):
+    prod = products.get(o.product_id)
+    base_price = prod.price if prod else o.unit_price
+    discount_rate, fixed_discount = promotion_rates(o.promo_code, promotions)
+    return price_line(o.qty, base_price, discount_rate, fixed_discount, o.hour)
+
+
 def compute_tax(taxable, items, products):
     tax = 0.0
     all_taxable = True
@@ -71,40 +88,24 @@ def compute_tax(taxable, items, products):
     return tax
 
 
+def compute_tax_from_totals(taxable, totals):
+    """Équivalent de compute_tax à partir d'un CustomerTotals (sans relire les lignes)."""
+    if totals.non_taxable_items == 0:
+        return round(taxable * TAX, 2)
+    return round(totals.line_tax, 2)
+
+
 _DEFAULT_ZONE = ShippingZone(zone='DEFAULT', base=5.0, per_kg=0.5)
 
-def compute_shipping(sub, weight, zone, shipping_zones):
-    ship = 0.0
-    if sub < SHIPPING_LIMIT:
-        ship_zone = shipping_zones.get(zone, _DEFAULT_ZONE)
+def compute_shipping(sub, weight, zone, shipping_zones, rules=None):
+    """Frais de port selon les paliers de poids (cf. rules.json)."""
+    rules = rules or default_rules()
+    return rules.shipping(sub, weight, zone, shipping_zones.get(zone, _DEFAULT_ZONE))
 
-        if weight > 10:
-            ship = ship_zone.base + (weight - 10) * ship_zone.per_kg
-        elif weight > 5:
-            ship = ship_zone.base + (weight - 5) * 0.3
-        else:
-            ship = ship_zone.base
 
-        if zone in ('ZONE3', 'ZONE4'):
-            ship = ship * 1.2
-    else:
-        if weight > 20:
-            ship = (weight - 20) * 0.25
-    return ship
-
-
-def compute_handling(item_count):
-    handling = 0.0
-    if item_count > 10:
-        handling = handling_fee
-    if item_count > 20:
-        handling = handling_fee * 2
-    return handling
-
-
-def currency_rate(currency):
-    if currency == 'USD':
-        return 1.1
-    elif currency == 'GBP':
-        return 0.85
-    return 1.0
+def compute_handling(item_count, rules=None):
+    return (rules or default_rules()).handling_fee(item_count)
+
+
+def currency_rate(currency, rules=None):
+    return (rules or default_rules()).currency_rate(currency)
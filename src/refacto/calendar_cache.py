@@ -0,0 +1,42 @@
+"""
+Parsing des dates et heures de commande, une fois au chargement.
+Les fichiers ne contiennent que quelques centaines de valeurs distinctes :
+chaque chaîne est parsée une seule fois grâce à un memo borné (lru_cache).
+Valeurs vides ou malformées : heure par défaut de '12:00', jour 0 (jamais
+un week-end).
+"""
+from datetime import datetime
+from functools import lru_cache
+
+MEMO_SIZE = 4096
+DEFAULT_HOUR = 12  # heure de la valeur par défaut '12:00'
+NO_DAY = 0  # date vide ou illisible (les ordinaux commencent à 1)
+
+
+@lru_cache(maxsize=MEMO_SIZE)
+def parse_hour(time):
+    """Heure entière de 'HH:MM'."""
+    try:
+        return int(time.split(':')[0])
+    except (AttributeError, ValueError):
+        return DEFAULT_HOUR
+
+
+@lru_cache(maxsize=MEMO_SIZE)
+def parse_day(date):
+    """Ordinal (date.toordinal) de 'YYYY-MM-DD', NO_DAY si vide ou illisible."""
+    if not date:
+        return NO_DAY
+    try:
+        return datetime.strptime(date, '%Y-%m-%d').toordinal()
+    except Exception:
+        return NO_DAY
+
+
+def weekday(day):
+    """Jour de la semaine d'un ordinal (0 = lundi), None pour NO_DAY."""
+    return (day + 6) % 7 if day != NO_DAY else None
+
+
+def is_weekend_day(day):
+    return day != NO_DAY and (day + 6) % 7 in (5, 6)
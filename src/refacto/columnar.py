@@ -0,0 +1,275 @@
+"""
+Moteur columnar (engine='numpy') pour compute_report.
+Les commandes deviennent des colonnes (qty, unit_price, indices produit /
+promo / client, heure) ; tarification, poids, points de fidélité et sommes
+par client sont vectorisés (np.bincount), les paliers (cf. rules.py) sont
+appliqués sur des tableaux par client. Les opérations flottantes sont faites dans le même
+ordre que le moteur Python : la sortie est identique au Golden Master.
+"""
+from dataclasses import dataclass
+
+try:
+    import numpy as np
+except ImportError:  # dépendance optionnelle
+    np = None
+
+from .discounts import MAX_DISCOUNT
+from .calendar_cache import is_weekend_day, parse_day, parse_hour
+from .calculations import (
+    TAX,
+    LOYALTY_RATIO,
+    customer_profile,
+    promotion_rates,
+    _DEFAULT_ZONE,
+)
+from .order_store import OrderBatch
+from .rules import default_rules
+from .formatter import format_customer_lines, customer_json, format_footer
+
+
+@dataclass
+class OrderColumns:
+    customer_ids: list
+    first_days: list
+    qty: 'np.ndarray'
+    unit_price: 'np.ndarray'
+    product_idx: 'np.ndarray'
+    promo_idx: 'np.ndarray'
+    hour: 'np.ndarray'
+    customer_idx: 'np.ndarray'
+    product_ids: list
+    promo_codes: list
+
+
+def _require_numpy():
+    if np is None:
+        raise ImportError("engine='numpy' nécessite numpy (pip install numpy)")
+
+
+def encode_orders(orders, products, promotions):
+    """Une passe sur `orders` : encode ids / codes en colonnes d'entiers (heures déjà parsées).
+
+    L'index -1 signifie « produit inconnu » ou « pas de promo applicable ».
+    """
+    _require_numpy()
+    customer_index, product_index, promo_index = {}, {}, {}
+    customer_ids, first_days, product_ids = [], [], []
+    qty, unit_price, product_idx, promo_idx, hour, customer_idx = [], [], [], [], [], []
+
+    for o in orders:
+        ci = customer_index.get(o.customer_id)
+        if ci is None:
+            ci = customer_index[o.customer_id] = len(customer_ids)
+            customer_ids.append(o.customer_id)
+            first_days.append(o.day)
+
+        pi = product_index.get(o.product_id)
+        if pi is None:
+            pi = -1
+            if o.product_id in products:
+                pi = len(product_ids)
+                product_ids.append(o.product_id)
+            product_index[o.product_id] = pi
+
+        code = o.promo_code
+        mi = -1
+        if code and code in promotions:
+            mi = promo_index.get(code)
+            if mi is None:
+                promotion_rates(code, promotions)  # même exception que le moteur Python
+                mi = promo_index[code] = len(promo_index)
+
+        qty.append(o.qty)
+        unit_price.append(o.unit_price)
+        product_idx.append(pi)
+        promo_idx.append(mi)
+        hour.append(o.hour)
+        customer_idx.append(ci)
+
+    return OrderColumns(
+        customer_ids=customer_ids,
+        first_days=first_days,
+        qty=np.array(qty, dtype=np.int64),
+        unit_price=np.array(unit_price, dtype=np.float64),
+        product_idx=np.array(product_idx, dtype=np.int64),
+        promo_idx=np.array(promo_idx, dtype=np.int64),
+        hour=np.array(hour, dtype=np.int64),
+        customer_idx=np.array(customer_idx, dtype=np.int64),
+        product_ids=product_ids,
+        promo_codes=list(promo_index),
+    )
+
+
+def encode_batch(batch, products, promotions):
+    """encode_orders pour un OrderBatch : colonnes numériques lues sans copie
+    (np.frombuffer, y compris sur un fichier mappé, cf. binary_store.py),
+    ids et codes résolus une fois par valeur distincte des dictionnaires."""
+    _require_numpy()
+    customer = np.frombuffer(batch.customer, dtype=np.intc)
+    product = np.frombuffer(batch.product, dtype=np.intc)
+    promo = np.frombuffer(batch.promo, dtype=np.intc)
+
+    # Clients dans l'ordre de première apparition, comme encode_orders.
+    present, first_rows = np.unique(customer, return_index=True)
+    order = np.argsort(first_rows, kind='stable')
+    customer_map = np.full(len(batch.customer_ids), -1, dtype=np.int64)
+    customer_map[present[order]] = np.arange(len(present))
+    dates = batch.dates.values
+    date = batch.date
+    first_days = [parse_day(dates[date[i]]) for i in first_rows[order].tolist()]
+    customer_values = batch.customer_ids.values
+    customer_ids = [customer_values[c] for c in present[order].tolist()]
+
+    product_ids = []
+    product_map = []
+    for pid in batch.product_ids.values:
+        product_map.append(len(product_ids) if pid in products else -1)
+        if pid in products:
+            product_ids.append(pid)
+
+    promo_codes = []
+    promo_map = []
+    for code in batch.promo_codes.values:
+        mi = -1
+        if code and code in promotions:
+            promotion_rates(code, promotions)  # même exception que le moteur Python
+            mi = len(promo_codes)
+            promo_codes.append(code)
+        promo_map.append(mi)
+
+    hours = np.array([parse_hour(t) for t in batch.times.values], dtype=np.int64)
+    return OrderColumns(
+        customer_ids=customer_ids,
+        first_days=first_days,
+        qty=np.frombuffer(batch.qty, dtype=np.int64),
+        unit_price=np.frombuffer(batch.unit_price, dtype=np.float64),
+        product_idx=np.array(product_map, dtype=np.int64)[product],
+        promo_idx=np.array(promo_map, dtype=np.int64)[promo],
+        hour=hours[np.frombuffer(batch.time, dtype=np.intc)],
+        customer_idx=customer_map[customer],
+        product_ids=product_ids,
+        promo_codes=promo_codes,
+    )
+
+
+def _lookup(table, idx, default):
+    """table[idx] avec `default` pour idx == -1."""
+    return np.where(idx >= 0, np.append(table, default)[idx], default)
+
+
+def aggregate_columns(cols, products, promotions):
+    """Sommes par client (bincount) : dict de tableaux indexés par client."""
+    prods = [products[pid] for pid in cols.product_ids]
+    price = np.array([p.price for p in prods], dtype=np.float64)
+    weight = np.array([p.weight for p in prods], dtype=np.float64)
+    taxable = np.array([p.taxable for p in prods], dtype=bool)
+    rates = [promotion_rates(code, promotions) for code in cols.promo_codes]
+    discount_rate = np.array([r for r, _ in rates], dtype=np.float64)
+    fixed_discount = np.array([f for _, f in rates], dtype=np.float64)
+
+    known = cols.product_idx >= 0
+    qty = cols.qty
+    base_price = np.where(known, _lookup(price, cols.product_idx, 0.0), cols.unit_price)
+    line_rate = _lookup(discount_rate, cols.promo_idx, 0.0)
+    line_fixed = _lookup(fixed_discount, cols.promo_idx, 0.0)
+
+    line_total = qty * base_price * (1 - line_rate) - line_fixed * qty
+    morning_bonus = np.where(cols.hour < 10, line_total * 0.03, 0.0)
+    line_total = line_total - morning_bonus
+
+    line_weight = _lookup(weight, cols.product_idx, 1.0) * qty
+    points = qty * cols.unit_price * LOYALTY_RATIO
+    line_taxable = known & _lookup(taxable, cols.product_idx, False)
+    line_tax = np.where(line_taxable, qty * base_price * TAX, 0.0)
+    non_taxable = known & ~line_taxable
+
+    n = len(cols.customer_ids)
+    ci = cols.customer_idx
+    return {
+        'subtotal': np.bincount(ci, weights=line_total, minlength=n),
+        'weight': np.bincount(ci, weights=line_weight, minlength=n),
+        'morning_bonus': np.bincount(ci, weights=morning_bonus, minlength=n),
+        'item_count': np.bincount(ci, minlength=n),
+        'loyalty_points': np.bincount(ci, weights=points, minlength=n),
+        'line_tax': np.bincount(ci, weights=line_tax, minlength=n),
+        'non_taxable_items': np.bincount(ci, weights=non_taxable, minlength=n),
+    }
+
+
+def cap_discounts_array(disc, loyalty_discount, max_discount=MAX_DISCOUNT):
+    total_discount = disc + loyalty_discount
+    over = total_discount > max_discount
+    ratio = np.divide(max_discount, total_discount, out=np.ones_like(total_discount), where=over)
+    disc = np.where(over, disc * ratio, disc)
+    loyalty_discount = np.where(over, loyalty_discount * ratio, loyalty_discount)
+    total_discount = np.where(over, float(max_discount), total_discount)
+    return disc, loyalty_discount, total_discount
+
+
+def compute_report_columnar(customers, products, shipping_zones, promotions, orders, rules=None):
+    """Même contrat que compute_report(..., engine='python')."""
+    rules = rules or default_rules()
+    if isinstance(orders, OrderBatch):
+        cols = encode_batch(orders, products, promotions)
+    else:
+        cols = encode_orders(orders, products, promotions)
+    agg = aggregate_columns(cols, products, promotions)
+
+    profiles = [customer_profile(customers.get(cid)) for cid in cols.customer_ids]
+    levels = [p[1] for p in profiles]
+    zones = [p[2] for p in profiles]
+    rate = rules.currency_rate_array([p[3] for p in profiles])
+    weekend = np.array([is_weekend_day(d) for d in cols.first_days], dtype=bool)
+
+    sub = agg['subtotal']
+    weight = agg['weight']
+    pts = agg['loyalty_points']
+    item_count = agg['item_count']
+
+    disc = rules.volume_discount_array(sub, levels)
+    disc = np.where(weekend, disc * 1.05, disc)
+    loyalty_discount = rules.loyalty_discount_array(pts)
+    disc, loyalty_discount, total_discount = cap_discounts_array(disc, loyalty_discount)
+    taxable = sub - total_discount
+
+    # round() Python et non np.round : l'arrondi doit être celui du moteur Python.
+    all_taxable = (agg['non_taxable_items'] == 0).tolist()
+    tax = np.array([
+        round(t, 2) if a else round(lt, 2)
+        for t, lt, a in zip((taxable * TAX).tolist(), agg['line_tax'].tolist(), all_taxable)
+    ], dtype=np.float64)
+    ship = rules.shipping_array(
+        sub, weight, zones, [shipping_zones.get(z, _DEFAULT_ZONE) for z in zones])
+    handling = rules.handling_array(item_count)
+    tax_converted = tax * rate
+    totals = [round(v, 2) for v in ((taxable + tax + ship + handling) * rate).tolist()]
+
+    columns = {
+        'sub': sub.tolist(), 'total_discount': total_discount.tolist(), 'disc': disc.tolist(),
+        'loyalty_discount': loyalty_discount.tolist(), 'morning_bonus': agg['morning_bonus'].tolist(),
+        'tax': tax_converted.tolist(), 'weight': weight.tolist(), 'ship': ship.tolist(),
+        'handling': handling.tolist(), 'item_count': item_count.tolist(), 'pts': pts.tolist(),
+    }
+
+    output_lines = []
+    json_data = []
+    grand_total = 0.0
+    total_tax_collected = 0.0
+
+    order = sorted(range(len(cols.customer_ids)), key=cols.customer_ids.__getitem__)
+    for i in order:
+        cid = cols.customer_ids[i]
+        name, level, zone, currency = profiles[i]
+        total = totals[i]
+        grand_total += total
+        total_tax_collected += columns['tax'][i]
+        output_lines.extend(format_customer_lines(
+            cid, name, level, zone, currency, columns['sub'][i], columns['total_discount'][i],
+            columns['disc'][i], columns['loyalty_discount'][i], columns['morning_bonus'][i],
+            columns['tax'][i], columns['weight'][i], columns['ship'][i], columns['handling'][i],
+            columns['item_count'][i], total, columns['pts'][i],
+        ))
+        json_data.append(customer_json(cid, name, total, currency, columns['pts'][i]))
+
+    output_lines.extend(format_footer(grand_total, total_tax_collected))
+    return '\n'.join(output_lines), json_data
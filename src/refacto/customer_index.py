@@ -0,0 +1,282 @@
+"""
+Index par client des lignes de orders.csv (offsets en octets), pour produire
+le rapport d'un seul client sans relire tout le fichier.
+L'index est rangé à côté du CSV, en trois fichiers :
+- orders.csv.idx : table des clés (customer_id triés) et début de chaque
+  client dans le fichier d'offsets, plus la position atteinte et l'empreinte
+  des derniers octets lus ;
+- orders.csv.offsets.idx : offsets `array('q')` bout à bout, groupés par
+  client dans l'ordre des clés ; une recherche n'en lit que la tranche du client ;
+- orders.csv.tables.idx : tables de référence (clients, produits, zones,
+  promotions) avec la taille et le mtime de leurs CSV, lues seulement pour
+  produire un rapport et reparsées seulement si l'un des CSV a changé.
+Si orders.csv a grossi, seules les lignes ajoutées sont indexées ;
+s'il a été réécrit, l'index est reconstruit.
+"""
+import csv
+import os
+import pickle
+import tempfile
+from array import array
+from bisect import bisect_left
+
+from .incremental import _tail_digest
+from .loader import dict_rows, parse_order_rows
+from .aggregation import add_order
+from .io_handler import REFERENCE_TABLES
+
+INDEX_VERSION = 3
+DEFAULT_DATA_DIR = os.path.join(os.path.dirname(__file__), 'data')
+
+
+def index_path(orders_path):
+    return orders_path + '.idx'
+
+
+def offsets_path(orders_path):
+    return orders_path + '.offsets.idx'
+
+
+def tables_path(orders_path):
+    return orders_path + '.tables.idx'
+
+
+def _load_pickle(path):
+    try:
+        with open(path, 'rb') as f:
+            return pickle.load(f)
+    except (OSError, pickle.UnpicklingError, EOFError, AttributeError):
+        return None
+
+
+def _replace_file(path, write):
+    """Écrit `path` via un fichier temporaire renommé : jamais de fichier à moitié écrit.
+    Nom temporaire unique : deux processus qui indexent en même temps ne
+    s'écrivent pas l'un sur l'autre, le dernier renommage l'emporte."""
+    with tempfile.NamedTemporaryFile(dir=os.path.dirname(path) or '.',
+                                     prefix=os.path.basename(path) + '.', suffix='.tmp',
+                                     delete=False) as f:
+        try:
+            write(f)
+        except BaseException:
+            f.close()
+            os.unlink(f.name)
+            raise
+    os.replace(f.name, path)
+
+
+def _save_pickle(path, obj):
+    _replace_file(path, lambda f: pickle.dump(obj, f, protocol=pickle.HIGHEST_PROTOCOL))
+
+
+def _records(f, offset):
+    """(début, champs, fin) de chaque enregistrement CSV à partir de `offset`.
+
+    csv.reader ne lit que les lignes dont il a besoin : la position courante
+    avant chaque enregistrement est son offset (y compris sur plusieurs lignes).
+    """
+    f.seek(offset)
+    position = [offset]
+
+    def lines():
+        for line in iter(f.readline, b''):
+            position[0] += len(line)
+            yield line.decode('utf-8')
+
+    reader = csv.reader(lines())
+    while True:
+        start = position[0]
+        row = next(reader, None)
+        if row is None:
+            return
+        yield start, row, position[0]
+
+
+class CustomerIndex:
+    def __init__(self, orders_path):
+        self.orders_path = orders_path
+        self.header = None
+        self.offset = 0
+        self.tail = None
+        # Client keys[i] : offsets starts[i]:starts[i + 1] du fichier d'offsets
+        self.keys = []
+        self.starts = array('q', [0])
+        self.tables = None
+        self.tables_stat = None
+        self._stat = None
+
+    def _reset(self):
+        self.header, self.offset, self.tail = None, 0, None
+        self.keys, self.starts = [], array('q', [0])
+
+    def _load(self):
+        state = _load_pickle(index_path(self.orders_path))
+        if not state or state.get('version') != INDEX_VERSION:
+            return
+        try:
+            size = os.path.getsize(offsets_path(self.orders_path))
+        except OSError:
+            return
+        # Fichier d'offsets d'une autre écriture (interrompue entre les deux fichiers)
+        if size != state['starts'][-1] * state['starts'].itemsize:
+            return
+        self.header, self.offset, self.tail = state['header'], state['offset'], state['tail']
+        self.keys, self.starts = state['keys'], state['starts']
+
+    def _save(self):
+        _save_pickle(index_path(self.orders_path), {
+            'version': INDEX_VERSION,
+            'header': self.header,
+            'offset': self.offset,
+            'tail': self.tail,
+            'keys': self.keys,
+            'starts': self.starts,
+        })
+
+    def refresh(self):
+        """Met l'index à jour : rien si orders.csv est inchangé, lignes ajoutées
+        seulement s'il a grossi, reconstruction s'il a été réécrit."""
+        st = os.stat(self.orders_path)
+        stat = (st.st_size, st.st_mtime_ns)
+        if stat == self._stat:
+            return self
+        if self._stat is None:
+            self._load()
+        if st.st_size < self.offset or (
+                self.offset and _tail_digest(self.orders_path, self.offset) != self.tail):
+            self._reset()
+        if st.st_size > self.offset or self.header is None:
+            self._extend()
+            self._save()
+        self._stat = stat
+        return self
+
+    def _extend(self):
+        added = {}
+        with open(self.orders_path, 'rb') as f:
+            records = _records(f, self.offset)
+            if self.header is None:
+                first = next(records, None)
+                if first is None:
+                    return
+                self.header, self.offset = first[1], first[2]
+            # Colonne en double : la dernière l'emporte, comme csv.DictReader.
+            column = {name: i for i, name in enumerate(self.header)}.get('customer_id')
+            for start, row, end in records:
+                self.offset = end
+                if column is None or column >= len(row):
+                    continue
+                offsets = added.get(row[column])
+                if offsets is None:
+                    offsets = added[row[column]] = array('q')
+                offsets.append(start)
+        self.tail = _tail_digest(self.orders_path, self.offset)
+        if added or not self.keys:
+            self._write_offsets(added)
+
+    def _write_offsets(self, added):
+        """Réécrit le fichier d'offsets avec les offsets `added` à la suite de
+        ceux de chaque client, et la table des clés qui va avec."""
+        customers = dict(zip(self.keys, self._read_all())) if self.keys else {}
+        for cid, offsets in added.items():
+            customers.setdefault(cid, array('q')).extend(offsets)
+        keys = sorted(customers)
+        starts = array('q', [0])
+
+        def write(f):
+            for cid in keys:
+                customers[cid].tofile(f)
+                starts.append(starts[-1] + len(customers[cid]))
+
+        _replace_file(offsets_path(self.orders_path), write)
+        self.keys, self.starts = keys, starts
+
+    def _read_all(self):
+        with open(offsets_path(self.orders_path), 'rb') as f:
+            flat = array('q', f.read())
+        return [flat[self.starts[i]:self.starts[i + 1]] for i in range(len(self.keys))]
+
+    def reference_tables(self):
+        """(customers, products, shipping_zones, promotions) du dossier de orders.csv,
+        reparsées seulement si l'un des CSV a changé depuis leur mise en index."""
+        data_dir = os.path.dirname(self.orders_path)
+        stat = tuple(_file_stat(os.path.join(data_dir, filename))
+                     for _, _, filename in REFERENCE_TABLES)
+        if self.tables is None:
+            state = _load_pickle(tables_path(self.orders_path))
+            if state and state.get('version') == INDEX_VERSION:
+                self.tables, self.tables_stat = state['tables'], state['stat']
+        if self.tables is None or stat != self.tables_stat:
+            self.tables = _reference_tables(data_dir)
+            self.tables_stat = stat
+            _save_pickle(tables_path(self.orders_path),
+                         {'version': INDEX_VERSION, 'tables': self.tables, 'stat': stat})
+        return self.tables
+
+    def offsets(self, cid):
+        """Offsets des lignes du client (lus dans sa seule tranche), None si absent."""
+        i = bisect_left(self.keys, cid)
+        if i == len(self.keys) or self.keys[i] != cid:
+            return None
+        offsets = array('q')
+        with open(offsets_path(self.orders_path), 'rb') as f:
+            f.seek(self.starts[i] * offsets.itemsize)
+            offsets.fromfile(f, self.starts[i + 1] - self.starts[i])
+        return offsets
+
+    def read_rows(self, offsets):
+        """Lignes DictReader aux offsets donnés, dans l'ordre du fichier."""
+        with open(self.orders_path, 'rb') as f:
+            for offset in offsets:
+                _, row, _ = next(_records(f, offset))
+                yield from dict_rows([row], self.header)
+
+
+_indexes = {}
+
+
+def open_index(orders_path):
+    """Index à jour de orders_path, gardé en mémoire entre deux appels."""
+    key = os.path.abspath(orders_path)
+    index = _indexes.get(key)
+    if index is None:
+        index = _indexes[key] = CustomerIndex(orders_path)
+    return index.refresh()
+
+
+def _file_stat(path):
+    """(taille, mtime_ns) ; None pour un fichier absent (promotions.csv est optionnel)."""
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return st.st_size, st.st_mtime_ns
+
+
+def _reference_tables(data_dir):
+    return tuple(loader(os.path.join(data_dir, filename)) for _, loader, filename in REFERENCE_TABLES)
+
+
+def compute_customer_report(cid, data_dir=DEFAULT_DATA_DIR, rules=None, tables=None):
+    """(bloc texte, enregistrement JSON) du client, identiques à ceux de compute_report ;
+    None si le client n'a aucune commande valide.
+
+    `tables` : (customers, products, shipping_zones, promotions) déjà chargées,
+    sinon celles gardées dans l'index (cf. CustomerIndex.reference_tables).
+    """
+    from .order_report import compute_customer_entry
+
+    index = open_index(os.path.join(data_dir, 'orders.csv'))
+    offsets = index.offsets(cid)
+    if not offsets:
+        return None
+    customers, products, shipping_zones, promotions = tables or index.reference_tables()
+
+    totals_by_customer = {}
+    for o in parse_order_rows(index.read_rows(offsets)):
+        add_order(totals_by_customer, o, products, promotions)
+    totals = totals_by_customer.get(cid)
+    if totals is None:
+        return None
+    entry = compute_customer_entry(cid, totals, customers, shipping_zones, rules)
+    return '\n'.join(entry['lines']), entry['json']
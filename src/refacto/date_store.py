@@ -0,0 +1,189 @@
+"""
+Rapport restreint à une fenêtre de dates, et magasin de commandes
+partitionné par mois pour n'ouvrir que les mois concernés.
+
+Fenêtre [date_from, date_to], bornes incluses, 'YYYY-MM-DD' ou date ;
+None : pas de borne. Une commande sans date lisible n'est dans aucune
+fenêtre bornée. Le résultat est celui du code actuel sur un orders.csv
+filtré : les commandes gardent l'ordre du fichier, la « première commande »
+d'un client (bonus week-end) est sa première commande dans la fenêtre.
+
+Magasin : un dossier par mois (YYYY-MM, `undated` pour les dates
+illisibles), chaque ingestion y ajoute un segment au format binaire
+(cf. binary_store.py) avec le numéro de ligne global `seq` ; manifest.json
+liste les segments. Une requête lit les seuls mois qui chevauchent la
+fenêtre et refusionne leurs lignes dans l'ordre de `seq`.
+"""
+import argparse
+import heapq
+import json
+import os
+from array import array
+from datetime import date
+
+from .calendar_cache import NO_DAY, parse_day
+from .loader import iter_orders
+from .io_handler import REFERENCE_TABLES
+from .order_store import OrderBatch
+from .binary_store import load_order_batch_mapped, write_order_batch
+
+MANIFEST = 'manifest.json'
+STORE_VERSION = 1
+UNDATED = 'undated'
+
+
+def _ordinal(value):
+    if value is None or isinstance(value, int):
+        return value
+    if isinstance(value, date):
+        return value.toordinal()
+    return date.fromisoformat(value).toordinal()
+
+
+def window_bounds(date_from=None, date_to=None):
+    """(premier, dernier) ordinal de la fenêtre ; None pour une borne absente."""
+    return _ordinal(date_from), _ordinal(date_to)
+
+
+def in_window(day, lo, hi):
+    if lo is None and hi is None:
+        return True
+    return day != NO_DAY and (lo is None or day >= lo) and (hi is None or day <= hi)
+
+
+def filter_window(orders, date_from=None, date_to=None):
+    """Commandes de la fenêtre, dans l'ordre d'origine (une seule passe)."""
+    lo, hi = window_bounds(date_from, date_to)
+    return (o for o in orders if in_window(o.day, lo, hi))
+
+
+def month_of(day):
+    if day == NO_DAY:
+        return UNDATED
+    d = date.fromordinal(day)
+    return f'{d.year:04d}-{d.month:02d}'
+
+
+def _months_overlap(month, lo, hi):
+    if lo is None and hi is None:
+        return True
+    if month == UNDATED:
+        return False
+    return ((lo is None or month >= month_of(lo)) and (hi is None or month <= month_of(hi)))
+
+
+class OrderStore:
+    """Commandes partitionnées par mois dans `directory`."""
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.manifest = {'version': STORE_VERSION, 'next_seq': 0, 'partitions': {}}
+        path = os.path.join(directory, MANIFEST)
+        if os.path.exists(path):
+            with open(path, encoding='utf-8') as f:
+                manifest = json.load(f)
+            if manifest.get('version') != STORE_VERSION:
+                raise ValueError(f'{path}: unsupported store version {manifest.get("version")}')
+            self.manifest = manifest
+
+    def _save(self):
+        path = os.path.join(self.directory, MANIFEST)
+        tmp = path + '.tmp'
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(self.manifest, f, indent=2)
+        os.replace(tmp, path)
+
+    def ingest(self, orders):
+        """Ajoute des commandes (itérable d'Order ou chemin d'un orders.csv) à la suite
+        des précédentes ; un segment par mois touché. Renvoie le nombre de lignes."""
+        if isinstance(orders, str):
+            orders = iter_orders(orders)
+        first_seq = seq = self.manifest['next_seq']
+        batches = {}
+        for o in orders:
+            month = month_of(o.day)
+            entry = batches.get(month)
+            if entry is None:
+                entry = batches[month] = (OrderBatch(), array('q'))
+            entry[0].append(o)
+            entry[1].append(seq)
+            seq += 1
+        if not batches:
+            return 0
+
+        os.makedirs(self.directory, exist_ok=True)
+        for month, (batch, seqs) in sorted(batches.items()):
+            os.makedirs(os.path.join(self.directory, month), exist_ok=True)
+            segment = os.path.join(month, f'{first_seq:012d}.col')
+            write_order_batch(batch, os.path.join(self.directory, segment),
+                              extra=[('seq', 'i64', seqs)])
+            self.manifest['partitions'].setdefault(month, []).append(segment)
+        self.manifest['next_seq'] = seq
+        self._save()
+        return seq - first_seq
+
+    def months(self):
+        return sorted(self.manifest['partitions'])
+
+    def _segments(self, lo, hi):
+        for month in self.months():
+            if _months_overlap(month, lo, hi):
+                for segment in self.manifest['partitions'][month]:
+                    yield os.path.join(self.directory, segment)
+
+    def _selected(self, path, lo, hi):
+        """(segment mappé, [(seq, ligne)]) des lignes du segment dans la fenêtre."""
+        batch = load_order_batch_mapped(path)
+        seqs = batch.mapped.numeric('seq')
+        keep = [in_window(parse_day(d), lo, hi) for d in batch.dates.values]
+        return batch, [(seqs[i], i) for i, code in enumerate(batch.date) if keep[code]]
+
+    def load(self, date_from=None, date_to=None):
+        """OrderBatch des commandes de la fenêtre, dans l'ordre d'ingestion."""
+        lo, hi = window_bounds(date_from, date_to)
+        segments = [self._selected(path, lo, hi) for path in self._segments(lo, hi)]
+        # Chaque segment est déjà dans l'ordre de seq : fusion k-voies.
+        merged = heapq.merge(*([(seq, k, i) for seq, i in rows]
+                               for k, (_, rows) in enumerate(segments)))
+
+        out = OrderBatch()
+        columns = [(out.customer, 'customer', out.customer_ids, 'customer_ids'),
+                   (out.product, 'product', out.product_ids, 'product_ids'),
+                   (out.date, 'date', out.dates, 'dates'),
+                   (out.promo, 'promo', out.promo_codes, 'promo_codes'),
+                   (out.time, 'time', out.times, 'times')]
+        # Codes d'un segment -> codes du résultat, encodés à la première utilisation
+        # (le dictionnaire du résultat ne contient que des valeurs présentes).
+        mappings = [[[None] * len(getattr(batch, name)) for _, _, _, name in columns]
+                    for batch, _ in segments]
+        for _, k, i in merged:
+            batch = segments[k][0]
+            for (column, attribute, dictionary, name), mapping in zip(columns, mappings[k]):
+                code = getattr(batch, attribute)[i]
+                mapped = mapping[code]
+                if mapped is None:
+                    mapped = mapping[code] = dictionary.encode(getattr(batch, name).values[code])
+                column.append(mapped)
+            out.qty.append(batch.qty[i])
+            out.unit_price.append(batch.unit_price[i])
+        return out
+
+
+def read_data_window(data_dir, store_dir, date_from=None, date_to=None):
+    """Même tuple que read_data : tables de référence de data_dir, commandes de la
+    fenêtre lues dans le magasin store_dir."""
+    tables = tuple(loader(os.path.join(data_dir, filename)) for _, loader, filename in REFERENCE_TABLES)
+    return tables + (OrderStore(store_dir).load(date_from, date_to),)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Month-partitioned order store')
+    parser.add_argument('store', help='dossier du magasin')
+    parser.add_argument('orders', help='orders.csv à ajouter au magasin')
+    args = parser.parse_args(argv)
+    rows = OrderStore(args.store).ingest(args.orders)
+    print(f'{rows} orders ingested into {args.store}')
+
+
+if __name__ == '__main__':
+    main()
@@ -1,40 +1,26 @@
-from datetime import datetime
+from .calendar_cache import is_weekend_day, parse_day
+from .rules import default_rules
 
 MAX_DISCOUNT = 200
 
 
-def compute_volume_discount(sub, level):
-    disc = 0.0
-    if sub > 50:
-        disc = sub * 0.05
-    if sub > 100:
-        disc = sub * 0.10
-    if sub > 500:
-        disc = sub * 0.15
-    if sub > 1000 and level == 'PREMIUM':
-        disc = sub * 0.20
-    return disc
+def compute_volume_discount(sub, level, rules=None):
+    return (rules or default_rules()).volume_discount(sub, level)
+
+
+def is_weekend(date):
+    return is_weekend_day(parse_day(date))
 
 
-def compute_weekend_bonus(disc, first_order_date):
-    if not first_order_date:
-        return disc
-    try:
-        dt = datetime.strptime(first_order_date, '%Y-%m-%d')
-        if dt.weekday() in (5, 6):
-            return disc * 1.05
-    except Exception:
-        pass
+def compute_weekend_bonus(disc, first_order_day):
+    """`first_order_day` : ordinal déjà parsé (Order.day, CustomerTotals.first_day)."""
+    if is_weekend_day(first_order_day):
+        return disc * 1.05
     return disc
 
 
-def compute_loyalty_discount(pts):
-    loyalty_discount = 0.0
-    if pts > 100:
-        loyalty_discount = min(pts * 0.1, 50.0)
-    if pts > 500:
-        loyalty_discount = min(pts * 0.15, 100.0)
-    return loyalty_discount
+def compute_loyalty_discount(pts, rules=None):
+    return (rules or default_rules()).loyalty_discount(pts)
 
 
 def cap_and_adjust_discounts(disc, loyalty_discount):
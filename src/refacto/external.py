@@ -0,0 +1,238 @@
+"""
+Agrégation hors mémoire : pour des commandes dont les accumulateurs par
+client ne tiennent pas en RAM, avec un budget mémoire configurable.
+
+1. Les commandes sont déversées sur disque en partitions par hash de
+   customer_id (blake2b), dans l'ordre du fichier : chaque client est entier
+   dans une partition, ses lignes dans l'ordre d'origine. Le nombre de
+   partitions est déduit du budget (cf. partition_count).
+2. Les partitions sont agrégées une à une, lignes lues en flux : la mémoire
+   est celle des accumulateurs, donc du nombre de clients distincts. Une
+   partition qui dépasse le budget en clients (CUSTOMER_BYTES chacun) est
+   redécoupée avec un hash indépendant (sel = profondeur) ; un gros client
+   seul ne l'est jamais.
+   Au-delà de MAX_DEPTH redécoupages, la partition est agrégée hors budget
+   avec un avertissement (logging). Les blocs client de chaque partition,
+   triés, sont écrits dans un fichier de run.
+3. Les runs sont fusionnés (heapq.merge) par passes d'au plus MAX_FAN_IN
+   fichiers ouverts, jusqu'à une dernière fusion qui rend les blocs dans
+   l'ordre sorted(customer_id) global ; les totaux globaux sont sommés dans
+   cet ordre par le consommateur (assemble_report, stream_report) : mêmes
+   flottants qu'en mémoire.
+
+Seuls une partition et un bloc par run sont en mémoire à la fois ; avec
+run(stream_output=True), le rapport n'est pas non plus assemblé.
+"""
+import hashlib
+import heapq
+import logging
+import os
+import pickle
+import tempfile
+
+from .models import Order, order_row
+from .aggregation import add_order
+from .instrumentation import count
+
+log = logging.getLogger(__name__)
+
+DEFAULT_MEMORY_BUDGET = 256 << 20
+MAX_PARTITIONS = 256  # fichiers de déversement ouverts à la fois
+MIN_BATCH_ROWS = 64  # lignes tamponnées par partition avant écriture
+# Octets en mémoire (objets Python) par octet déversé, estimation prudente.
+EXPANSION = 8
+ROW_BYTES = 128  # taille estimée d'une commande déversée
+SPLIT_FANOUT = 16
+MAX_DEPTH = 4
+# Octets estimés par client agrégé (accumulateur, clé, entrée du dict).
+CUSTOMER_BYTES = 512
+MAX_FAN_IN = 64  # runs ouverts à la fois par passe de fusion
+
+
+def _partition_of(cid, partitions, salt=0):
+    """Partition de cid ; un sel différent donne un hash indépendant (blake2b salé).
+
+    Un crc32 ne convient pas : il est linéaire, crc32(cid, sel) ne diffère de
+    crc32(cid) que d'une constante (ids de même longueur) et un redécoupage
+    enverrait toutes les lignes d'une partition dans le même fichier.
+    """
+    digest = hashlib.blake2b(cid.encode('utf-8'), digest_size=8,
+                             salt=salt.to_bytes(8, 'little')).digest()
+    return int.from_bytes(digest, 'little') % partitions
+
+
+def partition_count(memory_budget, rows=None):
+    """Partitions du premier déversement.
+
+    Au plus ce que le budget permet de tamponner (MIN_BATCH_ROWS lignes par
+    partition, MAX_PARTITIONS fichiers) ; si le nombre de commandes est connu
+    (borne haute du nombre de clients), pas plus qu'il n'en faut pour que
+    chaque partition tienne dans le budget. Les partitions trop grosses sont
+    redécoupées ensuite.
+    """
+    most = min(MAX_PARTITIONS, max(1, memory_budget // (EXPANSION * ROW_BYTES * MIN_BATCH_ROWS)))
+    if rows is None:
+        return most
+    return max(1, min(most, -(-rows * CUSTOMER_BYTES // memory_budget)))
+
+
+class _Spill:
+    """partitions fichiers de commandes (tuples order_row, pickle par lots)."""
+
+    def __init__(self, directory, prefix, partitions, memory_budget):
+        self.paths = [os.path.join(directory, f'{prefix}-{i}.spill') for i in range(partitions)]
+        self.files = [open(path, 'wb') for path in self.paths]
+        self.buffers = [[] for _ in range(partitions)]
+        # Lignes tamponnées par partition : toutes les partitions tiennent dans le budget.
+        self.batch_rows = max(MIN_BATCH_ROWS, memory_budget // (EXPANSION * ROW_BYTES * partitions))
+
+    def add(self, i, row):
+        buffer = self.buffers[i]
+        buffer.append(row)
+        if len(buffer) >= self.batch_rows:
+            self._flush(i)
+
+    def _flush(self, i):
+        if self.buffers[i]:
+            pickle.dump(self.buffers[i], self.files[i], protocol=pickle.HIGHEST_PROTOCOL)
+            self.buffers[i] = []
+
+    def close(self):
+        for i, f in enumerate(self.files):
+            self._flush(i)
+            f.close()
+        return self.paths
+
+
+def _read_rows(path):
+    with open(path, 'rb') as f:
+        while True:
+            try:
+                rows = pickle.load(f)
+            except EOFError:
+                return
+            yield from rows
+
+
+def _spill(rows, directory, prefix, partitions, memory_budget, salt=0):
+    spill = _Spill(directory, prefix, partitions, memory_budget)
+    try:
+        for row in rows:
+            spill.add(_partition_of(row[1], partitions, salt), row)
+    finally:
+        paths = spill.close()
+    count('external.partitions', partitions)
+    return paths
+
+
+def _write_run(path, entries):
+    with open(path, 'wb') as f:
+        for entry in entries:
+            pickle.dump((entry['json']['customer_id'], entry), f, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+def _read_run(path):
+    with open(path, 'rb') as f:
+        while True:
+            try:
+                yield pickle.load(f)
+            except EOFError:
+                return
+
+
+def _aggregate_partition(path, products, promotions, max_customers=None):
+    """Accumulateurs de la partition ; None dès qu'ils dépassent max_customers clients."""
+    totals_by_customer = {}
+    for row in _read_rows(path):
+        add_order(totals_by_customer, Order(*row), products, promotions)
+        if max_customers is not None and len(totals_by_customer) > max_customers:
+            return None
+    return totals_by_customer
+
+
+def _merge_runs(paths):
+    return heapq.merge(*(_read_run(path) for path in paths), key=lambda item: item[0])
+
+
+def _reduce_runs(runs, directory):
+    """Fusionne les runs par groupes de MAX_FAN_IN jusqu'à en avoir au plus MAX_FAN_IN."""
+    level = 0
+    while len(runs) > MAX_FAN_IN:
+        merged = []
+        for i in range(0, len(runs), MAX_FAN_IN):
+            group = runs[i:i + MAX_FAN_IN]
+            path = os.path.join(directory, f'm{level}-{i // MAX_FAN_IN}.run')
+            with open(path, 'wb') as f:
+                for item in _merge_runs(group):
+                    pickle.dump(item, f, protocol=pickle.HIGHEST_PROTOCOL)
+            for run in group:
+                os.remove(run)
+            merged.append(path)
+        count('external.merge_passes')
+        runs, level = merged, level + 1
+    return runs
+
+
+def _process_partition(path, directory, tables, memory_budget, depth, runs):
+    """Blocs triés de la partition dans un fichier de run (redécoupée si trop de clients)."""
+    from .order_report import iter_customer_entries
+
+    customers, products, shipping_zones, promotions, rules = tables
+    max_customers = max(1, memory_budget // CUSTOMER_BYTES)
+    totals_by_customer = _aggregate_partition(path, products, promotions, max_customers)
+    if totals_by_customer is None:
+        if depth < MAX_DEPTH:
+            count('external.splits')
+            prefix = os.path.splitext(os.path.basename(path))[0]
+            parts = _spill(_read_rows(path), directory, prefix, SPLIT_FANOUT, memory_budget,
+                           salt=depth + 1)
+            os.remove(path)
+            for part in parts:
+                _process_partition(part, directory, tables, memory_budget, depth + 1, runs)
+            return
+        count('external.over_budget')
+        log.warning('memory budget of %d bytes exceeded: partition %s still has more than %d '
+                    'customers after %d splits, aggregated anyway', memory_budget,
+                    os.path.basename(path), max_customers, MAX_DEPTH)
+        totals_by_customer = _aggregate_partition(path, products, promotions)
+    os.remove(path)
+    if not totals_by_customer:
+        return
+    run_path = os.path.splitext(path)[0] + '.run'
+    _write_run(run_path, iter_customer_entries(totals_by_customer, customers, shipping_zones, rules))
+    runs.append(run_path)
+
+
+def iter_entries_external(customers, products, shipping_zones, promotions, orders,
+                          memory_budget=DEFAULT_MEMORY_BUDGET, partitions=None,
+                          tmp_dir=None, rules=None):
+    """Blocs client dans l'ordre sorted(customer_id), agrégés partition par partition.
+
+    orders : liste, générateur (une seule passe) ou OrderBatch.
+    partitions : partitions du premier déversement (défaut : partition_count).
+    tmp_dir : dossier des fichiers temporaires (défaut : celui de tempfile).
+    """
+    if partitions is None:
+        partitions = partition_count(memory_budget,
+                                     len(orders) if hasattr(orders, '__len__') else None)
+    with tempfile.TemporaryDirectory(prefix='order-report-', dir=tmp_dir) as directory:
+        paths = _spill((order_row(o) for o in orders), directory, 'p', partitions, memory_budget)
+        runs = []
+        tables = (customers, products, shipping_zones, promotions, rules)
+        for path in paths:
+            _process_partition(path, directory, tables, memory_budget, 0, runs)
+        count('external.runs', len(runs))
+        runs = _reduce_runs(runs, directory)
+        for _, entry in _merge_runs(runs):
+            yield entry
+
+
+def compute_report_external(customers, products, shipping_zones, promotions, orders,
+                            memory_budget=DEFAULT_MEMORY_BUDGET, partitions=None,
+                            tmp_dir=None, rules=None):
+    """Même contrat que compute_report, accumulateurs par client hors mémoire."""
+    from .order_report import assemble_report
+
+    return assemble_report(iter_entries_external(
+        customers, products, shipping_zones, promotions, orders, memory_budget, partitions,
+        tmp_dir, rules))
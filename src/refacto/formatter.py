@@ -0,0 +1,46 @@
+"""
+Formatage du rapport : lignes texte et enregistrement JSON d'un client.
+Aucun calcul métier ici, les montants arrivent déjà calculés.
+"""
+import math
+
+
+def format_customer_lines(cid, name, level, zone, currency, sub, total_discount, disc,
+                          loyalty_discount, morning_bonus, tax, weight, ship, handling,
+                          item_count, total, pts):
+    """Bloc texte d'un client. `tax` est déjà converti dans la devise du client."""
+    lines = [
+        f'Customer: {name} ({cid})',
+        f'Level: {level} | Zone: {zone} | Currency: {currency}',
+        f'Subtotal: {sub:.2f}',
+        f'Discount: {total_discount:.2f}',
+        f'  - Volume discount: {disc:.2f}',
+        f'  - Loyalty discount: {loyalty_discount:.2f}',
+    ]
+    if morning_bonus > 0:
+        lines.append(f'  - Morning bonus: {morning_bonus:.2f}')
+    lines.append(f'Tax: {tax:.2f}')
+    lines.append(f'Shipping ({zone}, {weight:.1f}kg): {ship:.2f}')
+    if handling > 0:
+        lines.append(f'Handling ({item_count} items): {handling:.2f}')
+    lines.append(f'Total: {total:.2f} {currency}')
+    lines.append(f'Loyalty Points: {math.floor(pts)}')
+    lines.append('')
+    return lines
+
+
+def customer_json(cid, name, total, currency, pts):
+    return {
+        'customer_id': cid,
+        'name': name,
+        'total': total,
+        'currency': currency,
+        'loyalty_points': math.floor(pts)
+    }
+
+
+def format_footer(grand_total, total_tax_collected):
+    return [
+        f'Grand Total: {grand_total:.2f} EUR',
+        f'Total Tax Collected: {total_tax_collected:.2f} EUR',
+    ]
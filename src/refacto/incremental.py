@@ -0,0 +1,157 @@
+"""
+Recalcul incrémental du rapport à partir d'un état persisté par client.
+L'état (accumulateurs CustomerTotals + offset atteint dans orders.csv) est
+stocké à côté de output.json. Un run suivant ne parse que les lignes
+complètes ajoutées depuis, puis reconstruit texte et JSON depuis l'état.
+Reconstruction complète si products / promotions / shipping_zones changent,
+ou si orders.csv a été réécrit (tronqué, en-tête ou fin déjà lue modifiés).
+"""
+import csv
+import dataclasses
+import hashlib
+import json
+import os
+import tempfile
+
+from .models import CustomerTotals
+from .loader import (
+    CompleteLines,
+    dict_rows,
+    load_customers,
+    load_products,
+    load_shipping_zones,
+    load_promotions,
+    parse_order_rows,
+)
+from .aggregation import add_order
+
+STATE_VERSION = 2
+REFERENCE_FILES = ('products.csv', 'promotions.csv', 'shipping_zones.csv')
+# Octets relus juste avant l'offset pour détecter une réécriture de orders.csv.
+TAIL_CHECK_BYTES = 4096
+
+
+def state_path(output_path):
+    root, _ = os.path.splitext(output_path)
+    return root + '.state.json'
+
+
+def file_digest(path):
+    """sha256 du contenu, None si le fichier n'existe pas (promotions.csv est optionnel)."""
+    if not os.path.exists(path):
+        return None
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            h.update(block)
+    return h.hexdigest()
+
+
+def _tail_digest(path, offset):
+    with open(path, 'rb') as f:
+        start = max(0, offset - TAIL_CHECK_BYTES)
+        f.seek(start)
+        return hashlib.sha256(f.read(offset - start)).hexdigest()
+
+
+def load_state(path):
+    """État persisté, ou None s'il est absent / illisible / d'une autre version."""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            state = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if state.get('version') != STATE_VERSION:
+        return None
+    state['customers'] = {
+        cid: CustomerTotals(**fields) for cid, fields in state['customers'].items()
+    }
+    return state
+
+
+def save_state(path, state):
+    data = dict(state)
+    data['customers'] = {
+        cid: dataclasses.asdict(totals) for cid, totals in state['customers'].items()
+    }
+    # Nom temporaire unique : deux runs concurrents n'écrivent pas le même fichier.
+    with tempfile.NamedTemporaryFile('w', encoding='utf-8', dir=os.path.dirname(path) or '.',
+                                     prefix=os.path.basename(path) + '.', suffix='.tmp',
+                                     delete=False) as f:
+        try:
+            json.dump(data, f)
+        except BaseException:
+            f.close()
+            os.unlink(f.name)
+            raise
+    os.replace(f.name, path)
+
+
+def _can_resume(state, data_dir, references):
+    if state is None or state['references'] != references:
+        return False
+    orders_path = os.path.join(data_dir, 'orders.csv')
+    offset = state['orders_offset']
+    if os.path.getsize(orders_path) < offset:
+        return False
+    with open(orders_path, newline='', encoding='utf-8') as f:
+        if next(csv.reader(f), None) != state['orders_header']:
+            return False
+    return _tail_digest(orders_path, offset) == state['orders_tail']
+
+
+def fold_orders(path, totals_by_customer, products, promotions, offset=0, header=None):
+    """Ajoute les commandes lues à partir de `offset` ; renvoie (offset atteint, en-tête).
+
+    Offsets en octets ; une dernière ligne sans '\n' est laissée au run suivant
+    (cf. loader.CompleteLines).
+    """
+    with open(path, 'rb') as f:
+        f.seek(offset)
+        lines = CompleteLines(f, offset)
+        reader = csv.reader(lines)
+        if header is None:
+            header = next(reader, None)
+            if header is None:
+                return lines.offset, None
+        for o in parse_order_rows(dict_rows(reader, header)):
+            add_order(totals_by_customer, o, products, promotions)
+        return lines.offset, header
+
+
+def compute_report_incremental(data_dir, output_path, rules=None):
+    """Même sortie que compute_report sur les fichiers courants ; met à jour l'état.
+
+    L'état ne contient que des agrégats : changer de règles tarifaires ne le
+    remet pas en cause.
+    """
+    from .order_report import build_report
+
+    customers = load_customers(os.path.join(data_dir, 'customers.csv'))
+    products = load_products(os.path.join(data_dir, 'products.csv'))
+    shipping_zones = load_shipping_zones(os.path.join(data_dir, 'shipping_zones.csv'))
+    promotions = load_promotions(os.path.join(data_dir, 'promotions.csv'))
+
+    references = {name: file_digest(os.path.join(data_dir, name)) for name in REFERENCE_FILES}
+    path = state_path(output_path)
+    state = load_state(path)
+
+    if _can_resume(state, data_dir, references):
+        totals_by_customer = state['customers']
+        offset, header = state['orders_offset'], state['orders_header']
+    else:
+        totals_by_customer, offset, header = {}, 0, None
+
+    orders_path = os.path.join(data_dir, 'orders.csv')
+    offset, header = fold_orders(
+        orders_path, totals_by_customer, products, promotions, offset, header)
+
+    save_state(path, {
+        'version': STATE_VERSION,
+        'references': references,
+        'orders_header': header,
+        'orders_offset': offset,
+        'orders_tail': _tail_digest(orders_path, offset),
+        'customers': totals_by_customer,
+    })
+    return build_report(totals_by_customer, customers, shipping_zones, rules)
@@ -0,0 +1,196 @@
+"""
+Instrumentation opt-in du pipeline : spans nommés et compteurs.
+Désactivée par défaut (span / count ne coûtent qu'un test sur None).
+Dans un bloc `with instrument('metrics.json'):`, chaque span mesure temps
+mur, temps CPU, lignes traitées et, avec memory=True, le pic tracemalloc ;
+les compteurs remontent par exemple les lignes ignorées par les loaders.
+profile=True ajoute un profileur par échantillonnage (top N des fonctions).
+Les spans ouverts dans des threads sont enregistrés sans parent ; leur pic
+tracemalloc est alors approximatif (compteur global au processus).
+Le résultat est écrit en JSON pour le suivi run après run.
+"""
+import collections
+import contextlib
+import json
+import sys
+import threading
+import time
+import tracemalloc
+
+_recorder = None
+
+
+class Span:
+    __slots__ = ('name', 'parent', 'rows', 'wall_s', 'cpu_s', 'peak_mb', '_max_peak')
+
+    def __init__(self, name, parent, rows=None):
+        self.name = name
+        self.parent = parent
+        self.rows = rows
+        self.wall_s = None
+        self.cpu_s = None
+        self.peak_mb = None
+        self._max_peak = 0
+
+    def to_dict(self):
+        return {
+            'name': self.name,
+            'parent': self.parent,
+            'wall_s': round(self.wall_s, 6),
+            'cpu_s': round(self.cpu_s, 6),
+            'rows': self.rows,
+            'rows_per_s': round(self.rows / self.wall_s) if self.rows and self.wall_s else None,
+            'peak_mb': self.peak_mb,
+        }
+
+
+class Recorder:
+    def __init__(self, memory=False):
+        self.memory = memory
+        self.spans = []
+        self.counters = collections.Counter()
+        self.metrics = None
+        # Pile de spans par thread (chargement concurrent des tables, cf. read_data_concurrent).
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    @property
+    def _stack(self):
+        stack = getattr(self._local, 'stack', None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    def count(self, name, n):
+        with self._lock:
+            self.counters[name] += n
+
+    @contextlib.contextmanager
+    def span(self, name, rows=None):
+        parent = self._stack[-1] if self._stack else None
+        s = Span(name, parent.name if parent else None, rows)
+        if self.memory:
+            # Le pic vu jusque-là par le parent est conservé avant la remise à zéro.
+            if parent is not None:
+                parent._max_peak = max(parent._max_peak, tracemalloc.get_traced_memory()[1])
+            tracemalloc.reset_peak()
+        self._stack.append(s)
+        wall, cpu = time.perf_counter(), time.process_time()
+        try:
+            yield s
+        finally:
+            s.wall_s = time.perf_counter() - wall
+            s.cpu_s = time.process_time() - cpu
+            self._stack.pop()
+            if self.memory:
+                peak = max(s._max_peak, tracemalloc.get_traced_memory()[1])
+                s.peak_mb = round(peak / (1024 * 1024), 3)
+            self.spans.append(s)
+
+    def to_dict(self):
+        return {
+            'spans': [s.to_dict() for s in self.spans],
+            'counters': dict(self.counters),
+        }
+
+
+class SamplingProfiler:
+    """Échantillonne la pile du thread appelant toutes les `interval` secondes."""
+
+    def __init__(self, interval=0.005):
+        self.interval = interval
+        self.samples = 0
+        self.self_counts = collections.Counter()
+        self.total_counts = collections.Counter()
+        self._thread_id = threading.get_ident()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self._thread_id)
+            if frame is None:
+                continue
+            self.samples += 1
+            seen = set()
+            top = True
+            while frame is not None:
+                code = frame.f_code
+                key = (code.co_name, code.co_filename, code.co_firstlineno)
+                if top:
+                    self.self_counts[key] += 1
+                    top = False
+                if key not in seen:
+                    self.total_counts[key] += 1
+                    seen.add(key)
+                frame = frame.f_back
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def top(self, n=20):
+        total = self.samples or 1
+        return [
+            {
+                'function': name,
+                'file': filename,
+                'line': line,
+                'self_samples': count,
+                'self_pct': round(100 * count / total, 1),
+                'total_pct': round(100 * self.total_counts[(name, filename, line)] / total, 1),
+            }
+            for (name, filename, line), count in self.self_counts.most_common(n)
+        ]
+
+
+@contextlib.contextmanager
+def span(name, rows=None):
+    """Span nommé ; no-op hors d'un bloc instrument()."""
+    if _recorder is None:
+        yield None
+        return
+    with _recorder.span(name, rows) as s:
+        yield s
+
+
+def count(name, n=1):
+    if _recorder is not None:
+        _recorder.count(name, n)
+
+
+@contextlib.contextmanager
+def instrument(output_path=None, memory=False, profile=False, top=20, interval=0.005):
+    """Active l'instrumentation pour le bloc ; écrit le JSON dans output_path à la sortie."""
+    global _recorder
+    previous = _recorder
+    recorder = _recorder = Recorder(memory=memory)
+    started_tracemalloc = memory and not tracemalloc.is_tracing()
+    if started_tracemalloc:
+        tracemalloc.start()
+    profiler = SamplingProfiler(interval) if profile else None
+    if profiler:
+        profiler.start()
+    try:
+        yield recorder
+    finally:
+        if profiler:
+            profiler.stop()
+        if started_tracemalloc:
+            tracemalloc.stop()
+        _recorder = previous
+
+        metrics = recorder.to_dict()
+        if profiler:
+            metrics['profile'] = {
+                'interval_s': interval,
+                'samples': profiler.samples,
+                'top': profiler.top(top),
+            }
+        recorder.metrics = metrics
+        if output_path:
+            with open(output_path, 'w', encoding='utf-8') as f:
+                json.dump(metrics, f, indent=2)
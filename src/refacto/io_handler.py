@@ -1,5 +1,11 @@
+import asyncio
+import csv
 import json
 import os
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
 
 from .loader import (
     load_customers,
@@ -7,18 +13,203 @@ from .loader import (
     load_shipping_zones,
     load_promotions,
     load_orders,
+    iter_orders,
+    parse_order_rows,
+    select_customers,
 )
+from .order_store import OrderBatch, load_order_batch
+from .fast_loader import load_orders_fast
+from .instrumentation import span
 
 
-def read_data(data_dir):
-    """Charge les 5 datasets depuis le dossier data. Aucune logique métier."""
-    return (
-        load_customers(os.path.join(data_dir, 'customers.csv')),
-        load_products(os.path.join(data_dir, 'products.csv')),
-        load_shipping_zones(os.path.join(data_dir, 'shipping_zones.csv')),
-        load_promotions(os.path.join(data_dir, 'promotions.csv')),
-        load_orders(os.path.join(data_dir, 'orders.csv')),
+def _load(name, loader, path):
+    with span(f'load.{name}') as s:
+        table = loader(path)
+        if s is not None and hasattr(table, '__len__'):
+            s.rows = len(table)
+    return table
+
+
+REFERENCE_TABLES = (
+    ('customers', load_customers, 'customers.csv'),
+    ('products', load_products, 'products.csv'),
+    ('shipping_zones', load_shipping_zones, 'shipping_zones.csv'),
+    ('promotions', load_promotions, 'promotions.csv'),
+)
+# Lecture anticipée de orders.csv : taille d'un bloc (octets) et nombre de blocs en avance.
+PREFETCH_BYTES = 1 << 20
+PREFETCH_BLOCKS = 8
+
+
+def _orders_loader(stream_orders, compact, fast=False):
+    if fast:
+        return load_orders_fast
+    if compact:
+        return load_order_batch
+    return iter_orders if stream_orders else load_orders
+
+
+def read_data(data_dir, stream_orders=False, cache=False, compact=False, concurrent=False,
+              fast=False, binary=False, where=None):
+    """Charge les 5 datasets depuis le dossier data. Aucune logique métier.
+
+    Avec stream_orders=True, les commandes sont un générateur (une seule passe).
+    Avec cache=True, relit le snapshot parsé si aucun CSV n'a changé (cf. cache.py) ;
+    les commandes sont alors une liste.
+    Avec compact=True, les commandes sont un OrderBatch en colonnes (cf. order_store.py).
+    Avec concurrent=True, cf. read_data_concurrent.
+    Avec fast=True, orders.csv est parsé par blocs sur plusieurs processus
+    (cf. fast_loader.py) ; les commandes sont un OrderBatch.
+    Avec binary=True, les tables sont lues dans les fichiers .col de data_dir
+    (cf. binary_store.py) ; les colonnes des commandes sont mappées sans copie.
+    Avec where (loader.CustomerFilter), cf. read_data_filtered.
+    """
+    if where is not None:
+        if cache or concurrent or fast or binary:
+            raise ValueError('where is only supported with the CSV loaders '
+                             '(without cache, concurrent, fast or binary)')
+        return read_data_filtered(data_dir, where, stream_orders=stream_orders, compact=compact)
+    if binary:
+        from .binary_store import read_data_binary
+        return read_data_binary(data_dir)
+    if cache:
+        from .cache import read_data_cached
+        return read_data_cached(data_dir)
+    if concurrent:
+        return read_data_concurrent(data_dir, stream_orders=stream_orders, compact=compact,
+                                    fast=fast)
+    load = _orders_loader(stream_orders, compact, fast)
+    return tuple(
+        _load(name, loader, os.path.join(data_dir, filename))
+        for name, loader, filename in REFERENCE_TABLES
+    ) + (_load('orders', load, os.path.join(data_dir, 'orders.csv')),)
+
+
+def _referenced_products(orders):
+    """product_id des commandes chargées ; None pour un générateur (pas encore lu)."""
+    if isinstance(orders, OrderBatch):
+        return set(orders.product_ids.values)
+    if isinstance(orders, list):
+        return {o.product_id for o in orders}
+    return None
+
+
+def read_data_filtered(data_dir, where, stream_orders=False, compact=False):
+    """Même tuple que read_data, restreint aux clients retenus par `where`.
+
+    Les filtres sont appliqués au plus tôt : customers.csv d'abord, dont les
+    ids retenus filtrent les lignes de orders.csv avant toute conversion,
+    puis seuls les produits référencés par ces commandes sont chargés (tous
+    en streaming, les commandes n'étant pas encore lues). Les blocs client
+    sont ceux du rapport complet ; seuls les totaux globaux changent.
+    """
+    path = partial(os.path.join, data_dir)
+    with span('load.customers') as s:
+        customers, selection = select_customers(path('customers.csv'), where)
+        if s is not None:
+            s.rows = len(customers)
+    load = _orders_loader(stream_orders, compact)
+    orders = _load('orders', partial(load, customer_ids=selection), path('orders.csv'))
+    products = _load('products', partial(load_products, ids=_referenced_products(orders)),
+                     path('products.csv'))
+    shipping_zones = _load('shipping_zones', load_shipping_zones, path('shipping_zones.csv'))
+    promotions = _load('promotions', load_promotions, path('promotions.csv'))
+    return customers, products, shipping_zones, promotions, orders
+
+
+def _iter_prefetched_lines(path):
+    """Lignes de `path`, lues par blocs dans un thread en avance sur le parsing.
+
+    Une erreur de lecture (fichier absent...) est relancée à l'endroit où la
+    lecture séquentielle l'aurait levée : à la première itération.
+    """
+    blocks = queue.Queue(maxsize=PREFETCH_BLOCKS)
+    stop = threading.Event()
+
+    def put(item):
+        # Le consommateur peut abandonner la lecture : on ne bloque pas indéfiniment.
+        while not stop.is_set():
+            try:
+                blocks.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def reader():
+        try:
+            with open(path, newline='', encoding='utf-8') as f:
+                while True:
+                    lines = f.readlines(PREFETCH_BYTES)
+                    if not lines or not put(lines):
+                        break
+        except BaseException as e:
+            put(e)
+        put(None)
+
+    thread = threading.Thread(target=reader, daemon=True)
+    thread.start()
+    try:
+        while True:
+            block = blocks.get()
+            if block is None:
+                break
+            if isinstance(block, BaseException):
+                raise block
+            yield from block
+    finally:
+        stop.set()
+        thread.join()
+
+
+def iter_orders_prefetched(path):
+    """Comme iter_orders, avec lecture anticipée du fichier (latence disque / réseau masquée)."""
+    return parse_order_rows(csv.DictReader(_iter_prefetched_lines(path)))
+
+
+def read_data_concurrent(data_dir, stream_orders=False, compact=False, max_workers=4, fast=False):
+    """Même contrat que read_data : les 4 tables de référence sont chargées sur un
+    pool de threads pendant que orders.csv est lu dans le thread appelant.
+
+    Les erreurs sont celles du chargement séquentiel : en cas d'échecs multiples,
+    c'est l'erreur de la première table dans l'ordre de read_data qui est levée.
+    """
+    if stream_orders and not (compact or fast):
+        load = iter_orders_prefetched
+    else:
+        load = _orders_loader(stream_orders, compact, fast)
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        futures = [
+            pool.submit(_load, name, loader, os.path.join(data_dir, filename))
+            for name, loader, filename in REFERENCE_TABLES
+        ]
+        orders_error = None
+        try:
+            orders = _load('orders', load, os.path.join(data_dir, 'orders.csv'))
+        except Exception as e:
+            orders_error = e
+        tables = tuple(f.result() for f in futures)
+    if orders_error is not None:
+        raise orders_error
+    return tables + (orders,)
+
+
+async def read_data_async(data_dir, stream_orders=False, compact=False):
+    """Variante asyncio de read_data_concurrent, même tuple de retour."""
+    load = _orders_loader(stream_orders, compact)
+    tables = await asyncio.gather(
+        *(
+            asyncio.to_thread(_load, name, loader, os.path.join(data_dir, filename))
+            for name, loader, filename in REFERENCE_TABLES
+        ),
+        asyncio.to_thread(_load, 'orders', load, os.path.join(data_dir, 'orders.csv')),
+        return_exceptions=True,
     )
+    for table in tables:
+        if isinstance(table, BaseException):
+            raise table
+    return tuple(tables)
 
 
 def write_report(result):
@@ -28,5 +219,5 @@ def write_report(result):
 
 def write_json(json_data, output_path):
     """Écrit l'export JSON sur disque."""
-    with open(output_path, 'w', encoding='utf-8') as f:
+    with span('write_json', rows=len(json_data)), open(output_path, 'w', encoding='utf-8') as f:
         json.dump(json_data, f, indent=2)
\ No newline at end of file
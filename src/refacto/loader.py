@@ -1,24 +1,79 @@
 import csv
 import os
+from dataclasses import dataclass
 from .models import Customer,Product,Promotion,ShippingZone,Order
+from .instrumentation import count
 
-def load_customers(path):
+# Profil d'un client absent de customers.csv (cf. calculations.customer_profile).
+_UNKNOWN_CUSTOMER = Customer(id=None, name='Unknown')
+
+
+@dataclass(slots=True, frozen=True)
+class CustomerFilter:
+    """Critères sur les clients ; None : pas de critère, sinon valeurs admises."""
+    zones: frozenset = None
+    levels: frozenset = None
+    currencies: frozenset = None
+    ids: frozenset = None
+
+    def matches(self, customer, cid=None):
+        """customer=None : client inconnu, jugé sur le profil par défaut."""
+        cid = customer.id if customer is not None else cid
+        customer = customer or _UNKNOWN_CUSTOMER
+        return ((self.zones is None or customer.shipping_zone in self.zones)
+                and (self.levels is None or customer.level in self.levels)
+                and (self.currencies is None or customer.currency in self.currencies)
+                and (self.ids is None or cid in self.ids))
+
+
+@dataclass(slots=True, frozen=True)
+class CustomerSelection:
+    """customer_id admis par un CustomerFilter : ceux de `allowed`, plus les clients
+    absents de customers.csv si le profil par défaut passe le filtre (`unknown`)."""
+    allowed: frozenset
+    rejected: frozenset
+    unknown: bool
+
+    def __contains__(self, cid):
+        return cid in self.allowed or (self.unknown and cid not in self.rejected)
+
+
+def load_customers(path, where=None, rejected=None):
+    """where : CustomerFilter ; les ids écartés sont ajoutés à `rejected` s'il est fourni."""
     customers = {}
     with open(path, 'r', encoding='utf-8') as f:
         reader = csv.reader(f)
         header = next(reader)
         for row in reader:
-            customers[row[0]] = Customer (
+            customer = Customer (
                 id= row[0],
                 name= row[1],
                 level= row[2] if len(row) > 2 else 'BASIC',
                 shipping_zone= row[3] if len(row) > 3 else 'ZONE1',
                 currency= row[4] if len(row) > 4 else 'EUR'
             )
+            if where is not None and not where.matches(customer):
+                # Ligne en double : la dernière l'emporte, même écartée.
+                customers.pop(row[0], None)
+                if rejected is not None:
+                    rejected.add(row[0])
+                continue
+            if rejected is not None:
+                rejected.discard(row[0])
+            customers[row[0]] = customer
     return customers
 
 
-def load_products(path):
+def select_customers(path, where):
+    """(clients retenus, CustomerSelection des customer_id dont lire les commandes)."""
+    rejected = set()
+    customers = load_customers(path, where, rejected)
+    return customers, CustomerSelection(frozenset(customers), frozenset(rejected),
+                                        where.matches(None))
+
+
+def load_products(path, ids=None):
+    """ids : ne charge que ces produits (les autres lignes ne sont pas converties)."""
     products = {}
     f = open(path, 'r', encoding='utf-8')
     lines = f.readlines()
@@ -26,6 +81,8 @@ def load_products(path):
     for i in range(1, len(lines)):
         try:
             parts = lines[i].strip().split(',')
+            if ids is not None and parts[0] not in ids:
+                continue
             products[parts[0]] = Product(
                 id= parts[0],
                 name= parts[1],
@@ -35,7 +92,7 @@ def load_products(path):
                 taxable= parts[5].lower() == 'true' if len(parts) > 5 else True
             )
         except Exception:
-            pass
+            count('loader.products.skipped')
     return products
 
 
@@ -55,6 +112,7 @@ def load_shipping_zones(path):
 def load_promotions(path):
     promotions = {}
     if not os.path.exists(path):
+        count('loader.promotions.missing')
         return promotions
     try:
         with open(path, 'r') as f:
@@ -71,21 +129,68 @@ def load_promotions(path):
                     active= p[3] != 'false' if len(p) > 3 else True
                 )
     except Exception:
-        pass
+        count('loader.promotions.errors')
     return promotions
 
 
-def load_orders(path):
-    orders = []
-    with open(path, newline='', encoding='utf-8') as csvfile:
-        reader = csv.DictReader(csvfile)
-        for row in reader:
+class CompleteLines:
+    """Lignes d'un fichier binaire décodées une à une ; `offset` suit la dernière lue.
+
+    csv.reader ne demande une ligne que pour compléter l'enregistrement en
+    cours : après chaque enregistrement, `offset` est sa fin exacte. Une
+    dernière ligne sans '\n' (en cours d'écriture) n'est pas lue : un
+    lecteur qui reprend à `offset` la lira une fois complète.
+    """
+
+    def __init__(self, f, offset):
+        self.f = f
+        self.offset = offset
+
+    def __iter__(self):
+        for line in self.f:
+            if not line.endswith(b'\n'):
+                count('loader.orders.partial_line')
+                return
+            self.offset += len(line)
+            yield line.decode('utf-8')
+
+
+def dict_rows(rows, header):
+    """Équivalent de csv.DictReader(fieldnames=header) sur des lignes déjà découpées."""
+    width = len(header)
+    for row in rows:
+        if not row:
+            continue
+        d = dict(zip(header, row))
+        if width < len(row):
+            d[None] = row[width:]
+        elif width > len(row):
+            for key in header[len(row):]:
+                d[key] = None
+        yield d
+
+
+def parse_order_rows(rows, stats=None, customer_ids=None):
+    """Convertit des lignes DictReader en Order ; lignes invalides ignorées silencieusement.
+
+    Les compteurs sont ajoutés à `stats` s'il est fourni (processus de parsing,
+    cf. fast_loader), sinon remontés à l'instrumentation.
+    customer_ids : clients admis (CustomerSelection, set...) ; les autres lignes
+    sont sautées avant toute conversion.
+    """
+    loaded = rejected = unparsable = filtered = 0
+    try:
+        for row in rows:
+            if customer_ids is not None and row.get('customer_id') not in customer_ids:
+                filtered += 1
+                continue
             try:
                 qty = int(row['qty'])
                 price = float(row['unit_price'])
                 if qty <= 0 or price < 0:
+                    rejected += 1
                     continue
-                orders.append(Order(
+                order = Order(
                     id=row['id'],
                     customer_id=row['customer_id'],
                     product_id=row['product_id'],
@@ -94,7 +199,31 @@ def load_orders(path):
                     date=row.get('date', ''),
                     promo_code=row.get('promo_code', ''),
                     time=row.get('time', '12:00')
-                ))
+                )
             except Exception:
+                unparsable += 1
                 continue
-    return orders
\ No newline at end of file
+            loaded += 1
+            yield order
+    finally:
+        # Compteurs agrégés en fin de lecture : aucun coût par ligne.
+        if stats is not None:
+            stats['rows'] += loaded
+            stats['rejected'] += rejected
+            stats['unparsable'] += unparsable
+        else:
+            count('loader.orders.rows', loaded)
+            count('loader.orders.rejected', rejected)
+            count('loader.orders.unparsable', unparsable)
+        if filtered:
+            count('loader.orders.filtered', filtered)
+
+
+def iter_orders(path, customer_ids=None):
+    """Générateur : produit les commandes une à une sans les garder en mémoire."""
+    with open(path, newline='', encoding='utf-8') as csvfile:
+        yield from parse_order_rows(csv.DictReader(csvfile), customer_ids=customer_ids)
+
+
+def load_orders(path, customer_ids=None):
+    return list(iter_orders(path, customer_ids))
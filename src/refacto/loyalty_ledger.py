@@ -0,0 +1,181 @@
+"""
+Registre persistant des points fidélité (SQLite) : points cumulés par client
+et filigrane des commandes déjà comptées, pour ne plus relire tout
+l'historique à chaque run.
+
+- loyalty : une ligne par client (clé primaire), points cumulés et nombre
+  de commandes comptées ;
+- watermarks : par fichier de commandes, offset atteint, en-tête CSV et
+  empreintes du début et de la fin de la partie déjà lue.
+
+update(orders.csv) ne parse que les lignes complètes au-delà du filigrane
+(même validation que loader.parse_order_rows) ; points et filigrane sont écrits
+ensemble, par transactions de BATCH_ROWS commandes : une interruption ne
+compte jamais une commande deux fois. Un fichier dont la partie déjà lue a
+changé (remplacé, rotation quotidienne) est compté comme un nouveau fichier.
+
+Les points sont sommés dans l'ordre du fichier à partir de la valeur
+enregistrée : un registre alimenté par orders.csv seul donne les mêmes
+flottants que l'agrégation (cf. test_golden_master).
+"""
+import argparse
+import csv
+import hashlib
+import json
+import os
+import sqlite3
+
+from .calculations import LOYALTY_RATIO
+from .loader import CompleteLines, dict_rows, parse_order_rows
+from .instrumentation import count
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS loyalty (
+    customer_id TEXT PRIMARY KEY, points REAL NOT NULL, orders INTEGER NOT NULL) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS watermarks (
+    source TEXT PRIMARY KEY, header TEXT NOT NULL, offset INTEGER NOT NULL,
+    head TEXT NOT NULL, tail TEXT NOT NULL) WITHOUT ROWID;
+"""
+UPSERT_SQL = """
+INSERT INTO loyalty (customer_id, points, orders) VALUES (?, ?, ?)
+ON CONFLICT (customer_id) DO UPDATE SET points = excluded.points, orders = excluded.orders
+"""
+WATERMARK_SQL = """
+INSERT OR REPLACE INTO watermarks (source, header, offset, head, tail) VALUES (?, ?, ?, ?, ?)
+"""
+BATCH_ROWS = 50_000
+# Octets hachés au début et juste avant l'offset pour reconnaître un fichier déjà lu.
+CHECK_BYTES = 4096
+
+
+def _digest(path, start, end):
+    with open(path, 'rb') as f:
+        f.seek(start)
+        return hashlib.sha256(f.read(end - start)).hexdigest()
+
+
+def _fingerprint(path, offset):
+    """(empreinte du début, empreinte de la fin) de la partie [0, offset) du fichier."""
+    return (_digest(path, 0, min(offset, CHECK_BYTES)),
+            _digest(path, max(0, offset - CHECK_BYTES), offset))
+
+
+class LoyaltyLedger:
+    """Registre de points fidélité dans la base SQLite `path` (créée au besoin)."""
+
+    def __init__(self, path):
+        self.path = path
+        self.conn = sqlite3.connect(path)
+        self.conn.executescript(SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def points(self, cid):
+        """Points cumulés du client, None s'il n'a aucune commande comptée."""
+        row = self.conn.execute('SELECT points FROM loyalty WHERE customer_id = ?',
+                                (cid,)).fetchone()
+        return row[0] if row is not None else None
+
+    def points_for(self, cids):
+        """{customer_id: points} des clients présents dans le registre (une lecture
+        par clé primaire)."""
+        points = {}
+        for cid in cids:
+            value = self.points(cid)
+            if value is not None:
+                points[cid] = value
+        return points
+
+    def watermark(self, source):
+        row = self.conn.execute(
+            'SELECT header, offset, head, tail FROM watermarks WHERE source = ?',
+            (source,)).fetchone()
+        if row is None:
+            return None
+        header, offset, head, tail = row
+        return json.loads(header), offset, head, tail
+
+    def _resume(self, source):
+        """(en-tête, offset) où reprendre la lecture de `source` ; (None, 0) pour un
+        fichier nouveau ou dont la partie déjà lue a changé."""
+        mark = self.watermark(source)
+        if mark is None:
+            return None, 0
+        header, offset, head, tail = mark
+        if os.path.getsize(source) >= offset and _fingerprint(source, offset) == (head, tail):
+            return header, offset
+        count('ledger.replaced')
+        return None, 0
+
+    def update(self, orders_path, batch_rows=BATCH_ROWS):
+        """Compte les commandes de orders_path au-delà du filigrane ; renvoie leur nombre."""
+        source = os.path.abspath(orders_path)
+        header, offset = self._resume(source)
+        pending = {}  # client -> [points, commandes], valeurs à jour depuis le registre
+        counted = since_commit = 0
+
+        with open(source, 'rb') as f:
+            f.seek(offset)
+            lines = CompleteLines(f, offset)
+            reader = csv.reader(lines)
+            if header is None:
+                header = next(reader, None)
+                if header is None:
+                    return 0
+            for o in parse_order_rows(dict_rows(reader, header)):
+                entry = pending.get(o.customer_id)
+                if entry is None:
+                    entry = pending[o.customer_id] = self._current(o.customer_id)
+                entry[0] += o.qty * o.unit_price * LOYALTY_RATIO
+                entry[1] += 1
+                counted += 1
+                since_commit += 1
+                if since_commit >= batch_rows:
+                    self._commit(source, header, lines.offset, pending)
+                    pending, since_commit = {}, 0
+            self._commit(source, header, lines.offset, pending)
+        count('ledger.orders', counted)
+        return counted
+
+    def _current(self, cid):
+        row = self.conn.execute('SELECT points, orders FROM loyalty WHERE customer_id = ?',
+                                (cid,)).fetchone()
+        return list(row) if row is not None else [0.0, 0]
+
+    def _commit(self, source, header, offset, pending):
+        """Points des clients touchés et filigrane, dans une même transaction."""
+        head, tail = _fingerprint(source, offset)
+        with self.conn:
+            self.conn.executemany(UPSERT_SQL, ((cid, points, orders)
+                                               for cid, (points, orders) in pending.items()))
+            self.conn.execute(WATERMARK_SQL, (source, json.dumps(header), offset, head, tail))
+
+
+def apply_ledger(totals_by_customer, ledger):
+    """Remplace les points des accumulateurs par les points cumulés du registre
+    (ceux des clients absents du registre sont gardés)."""
+    points = ledger.points_for(totals_by_customer)
+    for cid, value in points.items():
+        totals_by_customer[cid].loyalty_points = value
+    return totals_by_customer
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Update the loyalty points ledger')
+    parser.add_argument('ledger', help='base SQLite du registre')
+    parser.add_argument('orders', nargs='+', help='fichiers de commandes à comptabiliser')
+    args = parser.parse_args(argv)
+    with LoyaltyLedger(args.ledger) as ledger:
+        for path in args.orders:
+            print(f'{path}: {ledger.update(path)} orders counted')
+
+
+if __name__ == '__main__':
+    main()
@@ -1,6 +1,8 @@
 from dataclasses import dataclass, field
 
-@dataclass
+from .calendar_cache import NO_DAY, parse_day, parse_hour
+
+@dataclass(slots=True)
 class Customer:
     id: str
     name: str
@@ -8,7 +10,7 @@ class Customer:
     shipping_zone: str = 'ZONE1'
     currency: str = 'EUR'
 
-@dataclass
+@dataclass(slots=True)
 class Product:
     id: str
     name: str
@@ -17,7 +19,7 @@ class Product:
     weight: float = 1.0
     taxable: bool = True
 
-@dataclass
+@dataclass(slots=True)
 class Order:
     id: str
     customer_id: str
@@ -27,16 +29,40 @@ class Order:
     date: str = ''
     promo_code: str = ''
     time: str = '12:00'
+    # Parsés une fois à la construction (memo, cf. calendar_cache) ; exclus de __init__.
+    hour: int = field(init=False, repr=False, compare=False)
+    day: int = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        self.hour = parse_hour(self.time)
+        self.day = parse_day(self.date)
+
 
-@dataclass
+def order_row(o):
+    """Order -> tuple, bien plus léger à sérialiser (pickle) ; Order(*row) le reconstruit."""
+    return (o.id, o.customer_id, o.product_id, o.qty, o.unit_price, o.date, o.promo_code, o.time)
+
+
+@dataclass(slots=True)
 class Promotion:
     code: str
     type: str
     value: str
     active: bool = True
 
-@dataclass
+@dataclass(slots=True)
 class ShippingZone:
     zone: str
     base: float
-    per_kg: float = 0.5
\ No newline at end of file
+    per_kg: float = 0.5
+
+@dataclass(slots=True)
+class CustomerTotals:
+    subtotal: float = 0.0
+    weight: float = 0.0
+    morning_bonus: float = 0.0
+    item_count: int = 0
+    first_day: int = NO_DAY
+    loyalty_points: float = 0.0
+    line_tax: float = 0.0
+    non_taxable_items: int = 0
@@ -0,0 +1,299 @@
+"""
+Moteur monétaire en entiers (centimes), optionnel : compute_report(..., money='cents').
+Le moteur par défaut (money='float') reste celui du legacy et du golden master.
+
+Les montants sont convertis une fois, depuis leur écriture décimale, en
+entiers à échelle fixe (arrondis au demi éloigné de zéro s'ils sont plus
+fins, cf. to_units) ; tout le calcul (tarification, remises, taxe, port,
+devise) est ensuite exact, avec un arrondi explicite au centime à chaque
+étape ci-dessous, au demi le plus éloigné de zéro (arrondi commercial) :
+
+- ligne : brut = qty * prix ; remise % arrondie ; bonus matin (3 %) arrondi ;
+- remise volume, bonus week-end (x1.05), remise fidélité : arrondies ;
+- plafond de remise : la remise volume est réduite au prorata (arrondie),
+  la remise fidélité prend le reste, la somme vaut exactement le plafond ;
+- taxe : 20 % de la base, arrondie une fois par client ;
+- port : supplément au kg arrondi, puis multiplicateur de zone arrondi ;
+- devise : total et taxe convertis puis arrondis.
+
+Échelles : montants en centimes, taux en points de base (1e-4), taux de
+change en millionièmes, poids en grammes, points fidélité en millionièmes
+de point (cf. to_units). Les accumulateurs réutilisent CustomerTotals, en
+entiers : line_tax y est la taxe ligne à ligne non arrondie (1e-4 centime).
+"""
+from decimal import Decimal
+from functools import lru_cache
+
+from .models import CustomerTotals
+from .calendar_cache import is_weekend_day
+from .calculations import _DEFAULT_ZONE, LOYALTY_RATIO, TAX, customer_profile
+from .discounts import MAX_DISCOUNT
+from .formatter import customer_json, format_customer_lines, format_footer
+from .rules import ScopedTiers, TierTable, ZONE_VALUE, _tiers, default_rules
+
+MONEY_MODES = ('float', 'cents')
+
+CENTS = 2
+RATE = 4  # points de base
+FX = 6  # millionièmes
+GRAMS = 3
+POINTS = 6
+
+MORNING_RATE = 300  # 3 %
+MORNING_HOUR = 10
+WEEKEND_BONUS = 10500  # x1.05
+DEFAULT_WEIGHT = 1000  # 1 kg, produit inconnu
+
+
+@lru_cache(maxsize=4096)
+def to_units(value, places):
+    """Entier valant `value` * 10**places, à partir de son écriture décimale
+    (texte du CSV, ou repr du flottant parsé qui la restitue).
+
+    Une valeur plus fine que l'échelle (prix à 3 décimales...) est arrondie à
+    l'unité la plus proche, demi éloigné de zéro (ROUND_HALF_UP sur la valeur
+    décimale) : 1299.005 -> 129901 centimes. Le mode flottant accepte ces
+    valeurs, le mode entier aussi.
+    """
+    scaled = Decimal(value if isinstance(value, str) else repr(value)).scaleb(places)
+    return int(scaled.to_integral_value(rounding='ROUND_HALF_UP'))
+
+
+def div_round(n, d):
+    """n / d arrondi au plus proche, demi éloigné de zéro (d > 0)."""
+    q = (2 * abs(n) + d) // (2 * d)
+    return q if n >= 0 else -q
+
+
+def to_float(cents):
+    """Centimes -> flottant le plus proche (formatage '.2f' et JSON exacts)."""
+    return cents / 100
+
+
+def promotion_units(promo_code, promotions):
+    """(taux en points de base, remise fixe par unité en centimes), cf. promotion_rates."""
+    if promo_code and promo_code in promotions:
+        promo = promotions[promo_code]
+        if promo.active:
+            if promo.type == 'PERCENTAGE':
+                return to_units(promo.value, RATE - 2), 0
+            if promo.type == 'FIXED':
+                return 0, to_units(promo.value, CENTS)
+    return 0, 0
+
+
+def _scaled_entry(entry, above_places):
+    entry = dict(entry)
+    if entry.get('above') is not None:
+        entry['above'] = to_units(entry['above'], above_places)
+    for key, places in (('rate', RATE), ('cap', CENTS), ('fee', CENTS), ('base', CENTS),
+                        ('from', GRAMS), ('per_kg', CENTS)):
+        if entry.get(key) is not None and entry[key] != ZONE_VALUE:
+            entry[key] = to_units(entry[key], places)
+    return entry
+
+
+def _scaled_tiers(entries, above_places):
+    return _tiers(_scaled_entry(entry, above_places) for entry in entries)
+
+
+class CentsRules:
+    """Règles (rules.py) recompilées en entiers : mêmes paliers, seuils et valeurs mis à l'échelle."""
+
+    def __init__(self, rules):
+        config = rules.config
+        self.volume = ScopedTiers(_scaled_tiers(config['volume_discount'], CENTS), 'level')
+        self.loyalty = TierTable(_scaled_tiers(config['loyalty_discount'], POINTS))
+        shipping = config['shipping']
+        self.shipping_limit = to_units(shipping['limit'], CENTS)
+        self.shipping_under = ScopedTiers(_scaled_tiers(shipping['under_limit'], GRAMS), 'zone')
+        self.shipping_over = ScopedTiers(_scaled_tiers(shipping['over_limit'], GRAMS), 'zone')
+        self.zone_multiplier = {
+            zone: to_units(m, RATE) for zone, m in shipping.get('zone_multiplier', {}).items()}
+        self.handling = TierTable(_scaled_tiers(config['handling'], 0))
+        self.currency_rates = {c: to_units(r, FX) for c, r in config.get('currency_rates', {}).items()}
+
+    def volume_discount(self, sub, level):
+        tier = self.volume.table(level).lookup(sub)
+        return div_round(sub * tier.rate, 10 ** RATE) if tier is not None else 0
+
+    def loyalty_discount(self, pts):
+        tier = self.loyalty.lookup(pts)
+        if tier is None:
+            return 0
+        discount = div_round(pts * tier.rate, 10 ** (POINTS + RATE - CENTS))
+        return min(discount, tier.cap) if tier.cap is not None else discount
+
+    def shipping(self, sub, weight, zone, zone_base, zone_per_kg):
+        if sub < self.shipping_limit:
+            tier = self.shipping_under.table(zone).lookup(weight)
+            ship = _ship_amount(tier, weight, zone_base, zone_per_kg)
+            multiplier = self.zone_multiplier.get(zone)
+            if multiplier is not None:
+                ship = div_round(ship * multiplier, 10 ** RATE)
+            return ship
+        tier = self.shipping_over.table(zone).lookup(weight)
+        return _ship_amount(tier, weight, zone_base, zone_per_kg)
+
+    def handling_fee(self, item_count):
+        tier = self.handling.lookup(item_count)
+        return tier.fee if tier is not None else 0
+
+    def currency_rate(self, currency):
+        return self.currency_rates.get(currency, 10 ** FX)
+
+
+def _ship_amount(tier, weight, zone_base, zone_per_kg):
+    if tier is None:
+        return 0
+    base = zone_base if tier.base == ZONE_VALUE else tier.base
+    per_kg = zone_per_kg if tier.per_kg == ZONE_VALUE else tier.per_kg
+    if per_kg is None:
+        return base if base is not None else 0
+    extra = div_round((weight - tier.start) * per_kg, 10 ** GRAMS)
+    return base + extra if base is not None else extra
+
+
+@lru_cache(maxsize=8)
+def _compile(rules):
+    return CentsRules(rules)
+
+
+def cents_rules(rules=None):
+    """CentsRules de `rules` (rules.json par défaut), compilées une fois par jeu de règles."""
+    return _compile(rules or default_rules())
+
+
+def aggregate_cents(orders, products, promotions):
+    """Accumulateurs par client en entiers (cf. docstring du module)."""
+    tax_rate = to_units(TAX, RATE)
+    loyalty_ratio = to_units(LOYALTY_RATIO, RATE)
+    prods = {pid: (to_units(p.price, CENTS), to_units(p.weight, GRAMS), p.taxable)
+             for pid, p in products.items()}
+    promos = {}
+    totals_by_customer = {}
+
+    for o in orders:
+        qty = o.qty
+        unit = to_units(o.unit_price, CENTS)
+        prod = prods.get(o.product_id)
+        rates = promos.get(o.promo_code)
+        if rates is None:
+            rates = promos[o.promo_code] = promotion_units(o.promo_code, promotions)
+        rate, fixed = rates
+
+        gross = qty * (prod[0] if prod else unit)
+        line_total = gross - div_round(gross * rate, 10 ** RATE) - fixed * qty
+        morning = div_round(line_total * MORNING_RATE, 10 ** RATE) if o.hour < MORNING_HOUR else 0
+
+        totals = totals_by_customer.get(o.customer_id)
+        if totals is None:
+            totals = totals_by_customer[o.customer_id] = CustomerTotals(
+                subtotal=0, weight=0, morning_bonus=0, first_day=o.day, loyalty_points=0,
+                line_tax=0)
+        totals.subtotal += line_total - morning
+        totals.weight += (prod[1] if prod else DEFAULT_WEIGHT) * qty
+        totals.morning_bonus += morning
+        totals.item_count += 1
+        totals.loyalty_points += qty * unit * loyalty_ratio
+        if prod:
+            if prod[2]:
+                totals.line_tax += qty * prod[0] * tax_rate
+            else:
+                totals.non_taxable_items += 1
+    return totals_by_customer
+
+
+def compute_customer_amounts_cents(cid, totals, customers, shipping_zones, rules):
+    """Montants d'un client en centimes, mêmes clés que compute_customer_amounts."""
+    name, level, zone, currency = customer_profile(customers.get(cid))
+    sub = totals.subtotal
+
+    disc = rules.volume_discount(sub, level)
+    if is_weekend_day(totals.first_day):
+        disc = div_round(disc * WEEKEND_BONUS, 10 ** RATE)
+    pts = totals.loyalty_points
+    loyalty_discount = rules.loyalty_discount(pts)
+
+    total_discount = disc + loyalty_discount
+    max_discount = to_units(MAX_DISCOUNT, CENTS)
+    if total_discount > max_discount:
+        disc = div_round(disc * max_discount, total_discount)
+        loyalty_discount = max_discount - disc
+        total_discount = max_discount
+
+    taxable = sub - total_discount
+    if totals.non_taxable_items == 0:
+        tax = div_round(taxable * to_units(TAX, RATE), 10 ** RATE)
+    else:
+        tax = div_round(totals.line_tax, 10 ** RATE)
+
+    ship_zone = shipping_zones.get(zone, _DEFAULT_ZONE)
+    ship = rules.shipping(sub, totals.weight, zone, to_units(ship_zone.base, CENTS),
+                          to_units(ship_zone.per_kg, CENTS))
+    handling = rules.handling_fee(totals.item_count)
+
+    rate = rules.currency_rate(currency)
+    total = div_round((taxable + tax + ship + handling) * rate, 10 ** FX)
+
+    return {
+        'customer_id': cid,
+        'name': name,
+        'level': level,
+        'zone': zone,
+        'currency': currency,
+        'subtotal': sub,
+        'volume_discount': disc,
+        'loyalty_discount': loyalty_discount,
+        'total_discount': total_discount,
+        'morning_bonus': totals.morning_bonus,
+        'taxable': taxable,
+        'tax': tax,
+        'weight': totals.weight,
+        'shipping': ship,
+        'item_count': totals.item_count,
+        'handling': handling,
+        'currency_rate': rate,
+        'total': total,
+        'loyalty_points': pts,
+    }
+
+
+def format_customer_entry_cents(a):
+    """Bloc texte + JSON ; 'total' et 'tax' restent en centimes (totaux globaux exacts)."""
+    tax = div_round(a['tax'] * a['currency_rate'], 10 ** FX)
+    pts = a['loyalty_points'] // 10 ** POINTS
+    return {
+        'lines': format_customer_lines(
+            a['customer_id'], a['name'], a['level'], a['zone'], a['currency'],
+            to_float(a['subtotal']), to_float(a['total_discount']), to_float(a['volume_discount']),
+            to_float(a['loyalty_discount']), to_float(a['morning_bonus']), to_float(tax),
+            div_round(a['weight'], 100) / 10, to_float(a['shipping']), to_float(a['handling']),
+            a['item_count'], to_float(a['total']), pts,
+        ),
+        'json': customer_json(a['customer_id'], a['name'], to_float(a['total']), a['currency'],
+                              pts),
+        'total': a['total'],
+        'tax': tax,
+    }
+
+
+def compute_report_cents(customers, products, shipping_zones, promotions, orders, rules=None):
+    """Même forme que compute_report (texte, json_data), calcul intégral en centimes."""
+    rules = cents_rules(rules)
+    totals_by_customer = aggregate_cents(orders, products, promotions)
+
+    output_lines = []
+    json_data = []
+    grand_total = 0
+    total_tax_collected = 0
+    for cid in sorted(totals_by_customer):
+        entry = format_customer_entry_cents(compute_customer_amounts_cents(
+            cid, totals_by_customer[cid], customers, shipping_zones, rules))
+        grand_total += entry['total']
+        total_tax_collected += entry['tax']
+        output_lines.extend(entry['lines'])
+        json_data.append(entry['json'])
+
+    output_lines.extend(format_footer(to_float(grand_total), to_float(total_tax_collected)))
+    return '\n'.join(output_lines), json_data
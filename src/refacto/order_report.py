@@ -2,132 +2,490 @@
 Order Report (refactorisé en modules)
 Conserve le comportement legacy — run() retourne strictement la même sortie.
 """
+import argparse
+import json
 import os
-import math
+import sys
+from dataclasses import dataclass, replace
 
 from .io_handler import read_data, write_report, write_json
+from .loader import CustomerFilter
+from .aggregation import aggregate_orders
+from .formatter import format_customer_lines, customer_json, format_footer
+from .instrumentation import instrument, span
+from .rules import default_rules, load_rules
+from .sinks import DEFAULT_BUFFER_SIZE, TextSink, JsonArraySink, NdjsonSink, stream_report
 from .calculations import (
-    compute_loyalty_points,
-    apply_promotion_and_morning,
+    customer_profile,
     compute_volume_discount,
     compute_weekend_bonus,
     compute_loyalty_discount,
     cap_and_adjust_discounts,
-    compute_tax,
+    compute_tax_from_totals,
     compute_shipping,
     compute_handling,
     currency_rate,
 )
 
 
-def compute_report(customers, products, shipping_zones, promotions, orders):
-    """Logique métier pure — aucun I/O, testable sans fichiers."""
+def compute_customer_amounts(cid, totals, customers, shipping_zones, rules=None):
+    """Remises, taxe, port, frais et total d'un client à partir de son accumulateur.
 
-    loyalty_points = compute_loyalty_points(orders)
+    `rules` : règles tarifaires compilées (cf. rules.py), rules.json par défaut.
+    """
+    name, level, zone, currency = customer_profile(customers.get(cid))
 
-    totals_by_customer = {}
-    for o in orders:
-        cid = o.customer_id
-        prod = products.get(o.product_id)
-        line_total, morning_bonus = apply_promotion_and_morning(o, products, promotions)
+    sub = totals.subtotal
 
-        if cid not in totals_by_customer:
-            totals_by_customer[cid] = {
-                'subtotal': 0.0,
-                'items': [],
-                'weight': 0.0,
-                'morning_bonus': 0.0,
-            }
+    disc = compute_volume_discount(sub, level, rules)
+    disc = compute_weekend_bonus(disc, totals.first_day)
 
-        totals_by_customer[cid]['subtotal'] += line_total
-        totals_by_customer[cid]['weight'] += (prod.weight if prod else 1.0) * o.qty
-        totals_by_customer[cid]['items'].append(o)
-        totals_by_customer[cid]['morning_bonus'] += morning_bonus
+    pts = totals.loyalty_points
+    loyalty_discount = compute_loyalty_discount(pts, rules)
 
+    disc, loyalty_discount, total_discount = cap_and_adjust_discounts(disc, loyalty_discount)
+
+    taxable = sub - total_discount
+    tax = compute_tax_from_totals(taxable, totals)
+
+    ship = compute_shipping(sub, totals.weight, zone, shipping_zones, rules)
+
+    item_count = totals.item_count
+    handling = compute_handling(item_count, rules)
+
+    currency_rate_val = currency_rate(currency, rules)
+    total = round((taxable + tax + ship + handling) * currency_rate_val, 2)
+
+    return {
+        'customer_id': cid,
+        'name': name,
+        'level': level,
+        'zone': zone,
+        'currency': currency,
+        'subtotal': sub,
+        'volume_discount': disc,
+        'loyalty_discount': loyalty_discount,
+        'total_discount': total_discount,
+        'morning_bonus': totals.morning_bonus,
+        'taxable': taxable,
+        'tax': tax,
+        'weight': totals.weight,
+        'shipping': ship,
+        'item_count': item_count,
+        'handling': handling,
+        'currency_rate': currency_rate_val,
+        'total': total,
+        'loyalty_points': pts,
+    }
+
+
+def format_customer_entry(amounts):
+    """Bloc texte + enregistrement JSON d'un client à partir de ses montants."""
+    a = amounts
+    tax = a['tax'] * a['currency_rate']
+    return {
+        'lines': format_customer_lines(
+            a['customer_id'], a['name'], a['level'], a['zone'], a['currency'], a['subtotal'],
+            a['total_discount'], a['volume_discount'], a['loyalty_discount'], a['morning_bonus'],
+            tax, a['weight'], a['shipping'], a['handling'], a['item_count'], a['total'],
+            a['loyalty_points'],
+        ),
+        'json': customer_json(a['customer_id'], a['name'], a['total'], a['currency'],
+                              a['loyalty_points']),
+        'total': a['total'],
+        'tax': tax,
+    }
+
+
+def compute_customer_entry(cid, totals, customers, shipping_zones, rules=None):
+    """Calcule et formate le bloc d'un client à partir de son accumulateur."""
+    return format_customer_entry(
+        compute_customer_amounts(cid, totals, customers, shipping_zones, rules))
+
+
+def assemble_report(entries):
+    """Concatène des blocs client déjà triés et calcule les totaux globaux.
+
+    Les totaux sont sommés dans l'ordre des clients : le flottant est identique
+    quel que soit le mode de calcul des blocs (séquentiel, parallèle...).
+    """
     output_lines = []
     json_data = []
     grand_total = 0.0
     total_tax_collected = 0.0
 
-    for cid in sorted(totals_by_customer.keys()):
-        cust = customers.get(cid)
-        name = cust.name if cust else 'Unknown'
-        level = cust.level if cust else 'BASIC'
-        zone = cust.shipping_zone if cust else 'ZONE1'
-        currency = cust.currency if cust else 'EUR'
-
-        sub = totals_by_customer[cid]['subtotal']
-
-        disc = compute_volume_discount(sub, level)
-        first_order_date = totals_by_customer[cid]['items'][0].date if totals_by_customer[cid]['items'] else ''
-        disc = compute_weekend_bonus(disc, first_order_date)
-
-        pts = loyalty_points.get(cid, 0)
-        loyalty_discount = compute_loyalty_discount(pts)
-
-        disc, loyalty_discount, total_discount = cap_and_adjust_discounts(disc, loyalty_discount)
-
-        taxable = sub - total_discount
-        tax = compute_tax(taxable, totals_by_customer[cid]['items'], products)
-
-        ship = compute_shipping(sub, totals_by_customer[cid]['weight'], zone, shipping_zones)
-
-        item_count = len(totals_by_customer[cid]['items'])
-        handling = compute_handling(item_count)
-
-        currency_rate_val = currency_rate(currency)
-        total = round((taxable + tax + ship + handling) * currency_rate_val, 2)
-        grand_total += total
-        total_tax_collected += tax * currency_rate_val
-
-        output_lines.append(f'Customer: {name} ({cid})')
-        output_lines.append(f'Level: {level} | Zone: {zone} | Currency: {currency}')
-        output_lines.append(f'Subtotal: {sub:.2f}')
-        output_lines.append(f'Discount: {total_discount:.2f}')
-        output_lines.append(f'  - Volume discount: {disc:.2f}')
-        output_lines.append(f'  - Loyalty discount: {loyalty_discount:.2f}')
-        if totals_by_customer[cid]['morning_bonus'] > 0:
-            output_lines.append(f"  - Morning bonus: {totals_by_customer[cid]['morning_bonus']:.2f}")
-        output_lines.append(f'Tax: {tax * currency_rate_val:.2f}')
-        output_lines.append(f'Shipping ({zone}, {totals_by_customer[cid]["weight"]:.1f}kg): {ship:.2f}')
-        if handling > 0:
-            output_lines.append(f'Handling ({item_count} items): {handling:.2f}')
-        output_lines.append(f'Total: {total:.2f} {currency}')
-        output_lines.append(f'Loyalty Points: {math.floor(pts)}')
-        output_lines.append('')
-
-        json_data.append({
-            'customer_id': cid,
-            'name': name,
-            'total': total,
-            'currency': currency,
-            'loyalty_points': math.floor(pts)
-        })
-
-    output_lines.append(f'Grand Total: {grand_total:.2f} EUR')
-    output_lines.append(f'Total Tax Collected: {total_tax_collected:.2f} EUR')
+    for entry in entries:
+        grand_total += entry['total']
+        total_tax_collected += entry['tax']
+        output_lines.extend(entry['lines'])
+        json_data.append(entry['json'])
+
+    output_lines.extend(format_footer(grand_total, total_tax_collected))
 
     result = '\n'.join(output_lines)
     return result, json_data
 
 
-def run():
+def iter_customer_entries(totals_by_customer, customers, shipping_zones, rules=None):
+    """Blocs client dans l'ordre sorted(customer_id)."""
+    for cid in sorted(totals_by_customer.keys()):
+        yield compute_customer_entry(cid, totals_by_customer[cid], customers, shipping_zones, rules)
+
+
+def build_report(totals_by_customer, customers, shipping_zones, rules=None):
+    """Construit le texte et le JSON à partir des accumulateurs par client."""
+    return assemble_report(
+        iter_customer_entries(totals_by_customer, customers, shipping_zones, rules))
+
+
+ENGINES = ('python', 'numpy')
+
+
+# Combinaisons de modes non supportées : une seule table pour run(),
+# compute_report() et iter_report_entries() (paires symétriques).
+INCOMPATIBLE = {
+    'numpy': {'jobs', 'memory_budget', 'cents', 'ledger', 'stream_output'},
+    'jobs': {'memory_budget', 'cents', 'ledger'},
+    'memory_budget': {'cents', 'ledger'},
+    'cents': {'ledger', 'stream_output', 'incremental', 'cache', 'sqlite'},
+    'ledger': {'stream_output', 'store', 'incremental', 'cache', 'sqlite'},
+    'stream_output': {'incremental', 'cache'},
+    'where': {'store', 'incremental', 'cache', 'sqlite', 'binary', 'concurrent', 'fast'},
+    'store': {'incremental', 'cache', 'sqlite'},
+    'window': {'incremental', 'cache', 'sqlite'},
+}
+INCOMPATIBLE_PAIRS = frozenset(frozenset((a, b)) for a, others in INCOMPATIBLE.items()
+                               for b in others)
+
+
+def check_modes(modes):
+    """ValueError sur la première paire de `modes` listée dans INCOMPATIBLE."""
+    modes = list(modes)
+    for i, a in enumerate(modes):
+        for b in modes[i + 1:]:
+            if frozenset((a, b)) in INCOMPATIBLE_PAIRS:
+                raise ValueError(f'{a} is not supported with {b}')
+
+
+def _report_modes(engine='python', jobs=1, memory_budget=None, money='float', ledger=None):
+    return [mode for mode, active in (('numpy', engine != 'python'), ('jobs', jobs > 1),
+                                      ('memory_budget', bool(memory_budget)),
+                                      ('cents', money != 'float'), ('ledger', ledger is not None))
+            if active]
+
+
+def compute_report(customers, products, shipping_zones, promotions, orders, engine='python',
+                   jobs=1, rules=None, memory_budget=None, money='float', date_from=None,
+                   date_to=None, ledger=None):
+    """Logique métier pure — aucun I/O, testable sans fichiers.
+
+    Une seule passe sur `orders` : une liste ou un générateur (mode streaming,
+    cf. read_data(..., stream_orders=True)) donnent la même sortie.
+    engine='numpy' utilise le moteur columnar (cf. columnar.py), même sortie.
+    jobs > 1 répartit les clients sur un pool de processus (cf. parallel.py).
+    rules : règles tarifaires compilées (cf. rules.load_rules), rules.json par défaut.
+    memory_budget (octets) : accumulateurs par client hors mémoire (cf. external.py).
+    money='cents' calcule en centimes entiers avec arrondis explicites (cf. money.py) ;
+    money='float' (défaut) reproduit le legacy et le golden master.
+    date_from / date_to : fenêtre de dates incluse (cf. date_store.py), comme si
+    orders.csv ne contenait que ces commandes.
+    ledger : LoyaltyLedger, points fidélité cumulés lus dans le registre au lieu
+    des seules commandes de `orders` (cf. loyalty_ledger.py).
+    """
+    if engine not in ENGINES:
+        raise ValueError(f'Unknown engine: {engine!r} (expected one of {ENGINES})')
+    check_modes(_report_modes(engine, jobs, memory_budget, money, ledger))
+    if date_from is not None or date_to is not None:
+        from .date_store import filter_window
+        orders = filter_window(orders, date_from, date_to)
+    if money != 'float':
+        from .money import MONEY_MODES, compute_report_cents
+        if money not in MONEY_MODES:
+            raise ValueError(f'Unknown money mode: {money!r} (expected one of {MONEY_MODES})')
+        return compute_report_cents(customers, products, shipping_zones, promotions, orders, rules)
+    if memory_budget:
+        from .external import compute_report_external
+        return compute_report_external(customers, products, shipping_zones, promotions, orders,
+                                       memory_budget, rules=rules)
+    if jobs > 1:
+        from .parallel import compute_report_parallel
+        return compute_report_parallel(customers, products, shipping_zones, promotions, orders, jobs,
+                                       rules)
+    if engine == 'numpy':
+        from .columnar import compute_report_columnar
+        return compute_report_columnar(customers, products, shipping_zones, promotions, orders,
+                                       rules)
+
+    with span('aggregate') as s:
+        totals_by_customer = aggregate_orders(orders, products, promotions)
+        if s is not None:
+            s.rows = sum(t.item_count for t in totals_by_customer.values())
+    if ledger is not None:
+        from .loyalty_ledger import apply_ledger
+        with span('ledger', rows=len(totals_by_customer)):
+            apply_ledger(totals_by_customer, ledger)
+    with span('report', rows=len(totals_by_customer)):
+        return build_report(totals_by_customer, customers, shipping_zones, rules)
+
+
+def iter_report_entries(customers, products, shipping_zones, promotions, orders, jobs=1,
+                        rules=None, memory_budget=None, date_from=None, date_to=None):
+    """Blocs client triés, sans assembler le rapport (cf. sinks.stream_report)."""
+    check_modes(_report_modes(jobs=jobs, memory_budget=memory_budget))
+    if date_from is not None or date_to is not None:
+        from .date_store import filter_window
+        orders = filter_window(orders, date_from, date_to)
+    if memory_budget:
+        from .external import iter_entries_external
+        return iter_entries_external(customers, products, shipping_zones, promotions, orders,
+                                     memory_budget, rules=rules)
+    if jobs > 1:
+        from .parallel import iter_entries_parallel
+        return iter_entries_parallel(customers, products, shipping_zones, promotions, orders, jobs,
+                                     rules)
+    with span('aggregate'):
+        totals_by_customer = aggregate_orders(orders, products, promotions)
+    return iter_customer_entries(totals_by_customer, customers, shipping_zones, rules)
+
+
+def _read_inputs(data_dir, store, window, **options):
+    """read_data, ou commandes de la fenêtre lues dans le magasin partitionné."""
+    if store:
+        from .date_store import read_data_window
+        return read_data_window(data_dir, store, *window)
+    return read_data(data_dir, **options)
+
+
+@dataclass(slots=True)
+class RunOptions:
+    """Options de run() (cf. run() pour le sens de chacune)."""
+    stream_orders: bool = False
+    engine: str = 'python'
+    jobs: int = 1
+    incremental: bool = False
+    cache: bool = False
+    compact: bool = False
+    concurrent: bool = False
+    fast: bool = False
+    stream_output: bool = False
+    ndjson: bool = False
+    buffer_size: int = DEFAULT_BUFFER_SIZE
+    rules_path: str = None
+    sqlite_path: str = None
+    memory_budget: int = None
+    money: str = 'float'
+    binary: bool = False
+    date_from: str = None
+    date_to: str = None
+    store: str = None
+    where: CustomerFilter = None
+    ledger_path: str = None
+
+    def modes(self):
+        """Modes actifs, au sens de INCOMPATIBLE."""
+        return _report_modes(self.engine, self.jobs, self.memory_budget, self.money,
+                             self.ledger_path or None) + [
+            mode for mode, active in (
+                ('stream_output', self.stream_output), ('incremental', self.incremental),
+                ('cache', self.cache), ('sqlite', bool(self.sqlite_path)),
+                ('store', bool(self.store)),
+                ('window', self.date_from is not None or self.date_to is not None),
+                ('where', self.where is not None), ('binary', self.binary),
+                ('concurrent', self.concurrent), ('fast', self.fast))
+            if active]
+
+
+def run(options=None, **overrides):
+    """Rapport console + export JSON ; renvoie le texte du rapport.
+
+    options : RunOptions, complétées ou remplacées par `overrides`
+    (run(jobs=2) équivaut à run(RunOptions(jobs=2))). Les combinaisons de
+    modes listées dans INCOMPATIBLE lèvent ValueError avant toute lecture.
+
+    engine='numpy' : les commandes sont lues en colonnes (OrderBatch, cf. fast_loader.py ;
+    load_order_batch avec where).
+    rules_path : fichier de règles tarifaires (rules.json du module par défaut).
+    sqlite_path : base SQLite (cf. sqlite_source.py) lue à la place des CSV.
+    memory_budget : budget mémoire (octets) de l'agrégation hors mémoire (cf. external.py) ;
+    les commandes sont alors lues en streaming.
+    money : 'float' (legacy, golden master) ou 'cents' (cf. money.py).
+    binary : lit les fichiers .col du dossier data (cf. binary_store.py) au lieu des CSV.
+    date_from / date_to : rapport restreint à cette fenêtre de dates (bornes incluses) ;
+    avec store, les commandes sont lues dans ce magasin partitionné par mois
+    (cf. date_store.py), seuls les mois de la fenêtre sont ouverts.
+    where : loader.CustomerFilter, rapport restreint à ces clients (filtres
+    appliqués au chargement, cf. io_handler.read_data_filtered).
+    ledger_path : registre SQLite des points fidélité (cf. loyalty_ledger.py),
+    mis à jour avec les commandes de orders.csv pas encore comptées ; les points
+    du rapport sont alors les points cumulés du registre.
+
+    Avec stream_output=True, le rapport est écrit bloc par bloc sur stdout et
+    dans output.json (output.ndjson si ndjson=True) sans être assemblé en
+    mémoire ; run() renvoie alors None.
+    """
+    o = replace(options or RunOptions(), **overrides)
+    check_modes(o.modes())
     base = os.path.dirname(__file__)
     data_dir = os.path.join(base, 'data')
     output_path = os.path.join(base, 'output.json')
+    rules = load_rules(o.rules_path) if o.rules_path else default_rules()
+    stream_orders, compact, fast = o.stream_orders, o.compact, o.fast
+    if o.memory_budget:
+        stream_orders, compact, fast = True, False, False
+    elif o.engine == 'numpy':
+        # Colonnes lues directement en OrderBatch, encodées sans boucle par ligne (encode_batch).
+        if o.where is None:
+            fast = True
+        else:
+            compact = True
+
+    window = (o.date_from, o.date_to)
+    # Avec store, la fenêtre est appliquée à la lecture du magasin
+    date_from, date_to = (None, None) if o.store else window
+    read_options = dict(stream_orders=stream_orders, compact=compact, concurrent=o.concurrent,
+                        fast=fast, binary=o.binary, where=o.where)
+    if o.stream_output:
+        with span('read_data'):
+            customers, products, shipping_zones, promotions, orders = _read_inputs(
+                data_dir, o.store, window, **read_options)
+        entries = iter_report_entries(customers, products, shipping_zones, promotions, orders,
+                                      o.jobs, rules, o.memory_budget, date_from, date_to)
+        json_path = os.path.join(base, 'output.ndjson') if o.ndjson else output_path
+        with span('write_report'), open(json_path, 'w', encoding='utf-8') as f:
+            json_sink = (NdjsonSink if o.ndjson else JsonArraySink)(f, o.buffer_size)
+            stream_report(entries, [TextSink(sys.stdout, o.buffer_size), json_sink])
+        return None
 
-    # I/O : lecture
-    customers, products, shipping_zones, promotions, orders = read_data(data_dir)
+    if o.sqlite_path:
+        # Agrégation par client exécutée dans SQLite
+        from .sqlite_source import compute_report_sqlite
+        result, json_data = compute_report_sqlite(o.sqlite_path, rules)
+    elif o.incremental:
+        # Lecture des seules lignes ajoutées + état persisté à côté de output.json
+        from .incremental import compute_report_incremental
+        result, json_data = compute_report_incremental(data_dir, output_path, rules)
+    elif o.cache:
+        # Dernier rapport si aucune entrée n'a changé, sinon snapshot parsé des CSV
+        from .cache import cached_report
+        result, json_data = cached_report(data_dir, lambda: compute_report(
+            *read_data(data_dir, cache=True), engine=o.engine, jobs=o.jobs, rules=rules),
+            rules=rules)
+    else:
+        # I/O : lecture
+        with span('read_data'):
+            customers, products, shipping_zones, promotions, orders = _read_inputs(
+                data_dir, o.store, window, **read_options)
 
-    # Business logic : pure
-    result, json_data = compute_report(customers, products, shipping_zones, promotions, orders)
+        # Business logic : pure
+        ledger = None
+        if o.ledger_path:
+            from .loyalty_ledger import LoyaltyLedger
+            ledger = LoyaltyLedger(o.ledger_path)
+        try:
+            if ledger is not None:
+                with span('ledger_update'):
+                    ledger.update(os.path.join(data_dir, 'orders.csv'))
+            result, json_data = compute_report(
+                customers, products, shipping_zones, promotions, orders, engine=o.engine,
+                jobs=o.jobs, rules=rules, memory_budget=o.memory_budget, money=o.money,
+                date_from=date_from, date_to=date_to, ledger=ledger)
+        finally:
+            if ledger is not None:
+                ledger.close()
 
     # I/O : écriture
-    write_report(result)
+    with span('write_report'):
+        write_report(result)
     write_json(json_data, output_path)
 
     return result
 
 
+def _values(option):
+    return frozenset(v.strip() for v in option.split(',') if v.strip()) if option else None
+
+
+def _customer_filter(args):
+    """CustomerFilter des options --zone / --level / --currency, None sans critère."""
+    criteria = dict(zones=_values(args.zone), levels=_values(args.level),
+                    currencies=_values(args.currency))
+    if all(v is None for v in criteria.values()):
+        return None
+    return CustomerFilter(**criteria)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Order report')
+    parser.add_argument('--engine', choices=ENGINES, default='python')
+    parser.add_argument('--jobs', type=int, default=1)
+    parser.add_argument('--stream', action='store_true', help='commandes lues en streaming')
+    parser.add_argument('--compact', action='store_true', help='commandes en OrderBatch')
+    parser.add_argument('--concurrent', action='store_true', help='tables chargées en parallèle')
+    parser.add_argument('--fast', action='store_true', help='orders.csv parsé par blocs multi-processus')
+    parser.add_argument('--stream-output', action='store_true',
+                        help='rapport écrit bloc par bloc, sans assemblage en mémoire')
+    parser.add_argument('--ndjson', action='store_true', help='export output.ndjson (avec --stream-output)')
+    parser.add_argument('--buffer-size', type=int, default=DEFAULT_BUFFER_SIZE,
+                        help='taille du tampon d\'écriture (caractères)')
+    parser.add_argument('--rules', metavar='PATH', help='fichier de règles tarifaires (JSON)')
+    parser.add_argument('--customer', metavar='CID',
+                        help='bloc d\'un seul client, via l\'index de orders.csv')
+    parser.add_argument('--memory-budget', type=int, metavar='MB',
+                        help='agrégation hors mémoire dans ce budget (Mo)')
+    parser.add_argument('--money', choices=('float', 'cents'), default='float',
+                        help='cents : calcul en centimes entiers (float : legacy)')
+    parser.add_argument('--binary', action='store_true',
+                        help='données lues dans les fichiers .col (cf. binary_store)')
+    parser.add_argument('--from', dest='date_from', metavar='YYYY-MM-DD',
+                        help='début de la fenêtre de dates (incluse)')
+    parser.add_argument('--to', dest='date_to', metavar='YYYY-MM-DD',
+                        help='fin de la fenêtre de dates (incluse)')
+    parser.add_argument('--store', metavar='DIR', help='magasin partitionné par mois (cf. date_store)')
+    parser.add_argument('--zone', metavar='Z1,Z2', help='seulement les clients de ces zones')
+    parser.add_argument('--level', metavar='L1,L2', help='seulement les clients de ces niveaux')
+    parser.add_argument('--currency', metavar='C1,C2', help='seulement les clients dans ces devises')
+    parser.add_argument('--ledger', metavar='DB',
+                        help='registre SQLite des points fidélité cumulés (cf. loyalty_ledger)')
+    parser.add_argument('--sqlite', metavar='DB', help='base SQLite à la place des CSV')
+    parser.add_argument('--incremental', action='store_true')
+    parser.add_argument('--cache', action='store_true')
+    parser.add_argument('--metrics', metavar='PATH', help='écrit les métriques par étape (JSON)')
+    parser.add_argument('--trace-memory', action='store_true', help='pic tracemalloc par étape')
+    parser.add_argument('--profile', action='store_true', help='profileur par échantillonnage')
+    parser.add_argument('--profile-top', type=int, default=20)
+    args = parser.parse_args(argv)
+
+    if args.customer:
+        from .customer_index import compute_customer_report
+        rules = load_rules(args.rules) if args.rules else None
+        report = compute_customer_report(args.customer, rules=rules)
+        if report is None:
+            print(f'No orders for customer {args.customer}', file=sys.stderr)
+            return None
+        text, record = report
+        print(text)
+        print(json.dumps(record, indent=2))
+        return text
+
+    options = RunOptions(stream_orders=args.stream, engine=args.engine, jobs=args.jobs,
+                         incremental=args.incremental, cache=args.cache, compact=args.compact,
+                         concurrent=args.concurrent, fast=args.fast, stream_output=args.stream_output,
+                         ndjson=args.ndjson, buffer_size=args.buffer_size, rules_path=args.rules,
+                         sqlite_path=args.sqlite,
+                         memory_budget=args.memory_budget << 20 if args.memory_budget else None,
+                         money=args.money, binary=args.binary, date_from=args.date_from,
+                         date_to=args.date_to, store=args.store, where=_customer_filter(args),
+                         ledger_path=args.ledger)
+    if not (args.metrics or args.profile):
+        return run(options)
+    with instrument(args.metrics, memory=args.trace_memory, profile=args.profile,
+                    top=args.profile_top) as recorder:
+        with span('run'):
+            result = run(options)
+    if args.profile and not args.metrics:
+        json.dump(recorder.metrics['profile'], sys.stderr, indent=2)
+    return result
+
+
 if __name__ == '__main__':
-    run()
\ No newline at end of file
+    main()
\ No newline at end of file
@@ -0,0 +1,152 @@
+"""
+Stockage compact des commandes : colonnes `array` + dictionnaires de chaînes.
+Un Order dataclass coûte plusieurs centaines d'octets (objet + __dict__ +
+chaînes) ; une ligne d'OrderBatch en coûte 36 : customer_id, product_id,
+date, promo_code et time deviennent des codes entiers vers des valeurs
+distinctes partagées. Les ids de commande (uniques, inutiles au calcul)
+ne sont conservés qu'avec keep_ids=True.
+"""
+from array import array
+
+from .loader import iter_orders
+from .calendar_cache import parse_day, parse_hour
+
+
+class StringDictionary:
+    """Encodage dictionnaire : chaîne <-> code entier (ordre de première apparition)."""
+    __slots__ = ('values', '_codes')
+
+    def __init__(self):
+        self.values = []
+        self._codes = {}
+
+    def encode(self, value):
+        code = self._codes.get(value)
+        if code is None:
+            code = self._codes[value] = len(self.values)
+            self.values.append(value)
+        return code
+
+    def __len__(self):
+        return len(self.values)
+
+
+class OrderView:
+    """Vue sur une ligne d'OrderBatch, mêmes attributs qu'Order (sans copie)."""
+    __slots__ = ('_batch', '_i')
+
+    def __init__(self, batch, i):
+        self._batch = batch
+        self._i = i
+
+    @property
+    def id(self):
+        ids = self._batch.ids
+        return ids[self._i] if ids is not None else None
+
+    @property
+    def customer_id(self):
+        return self._batch.customer_ids.values[self._batch.customer[self._i]]
+
+    @property
+    def product_id(self):
+        return self._batch.product_ids.values[self._batch.product[self._i]]
+
+    @property
+    def qty(self):
+        return self._batch.qty[self._i]
+
+    @property
+    def unit_price(self):
+        return self._batch.unit_price[self._i]
+
+    @property
+    def date(self):
+        return self._batch.dates.values[self._batch.date[self._i]]
+
+    @property
+    def promo_code(self):
+        return self._batch.promo_codes.values[self._batch.promo[self._i]]
+
+    @property
+    def time(self):
+        return self._batch.times.values[self._batch.time[self._i]]
+
+    @property
+    def hour(self):
+        return parse_hour(self.time)
+
+    @property
+    def day(self):
+        return parse_day(self.date)
+
+
+class OrderBatch:
+    """Commandes en colonnes. Itérer produit des OrderView ; aggregation.aggregate_orders
+    travaille directement sur les colonnes."""
+
+    def __init__(self, keep_ids=False):
+        self.ids = [] if keep_ids else None
+        self.customer_ids = StringDictionary()
+        self.product_ids = StringDictionary()
+        self.dates = StringDictionary()
+        self.promo_codes = StringDictionary()
+        self.times = StringDictionary()
+        self.customer = array('i')
+        self.product = array('i')
+        self.qty = array('q')
+        self.unit_price = array('d')
+        self.date = array('i')
+        self.promo = array('i')
+        self.time = array('i')
+
+    def append(self, o):
+        if self.ids is not None:
+            self.ids.append(o.id)
+        self.customer.append(self.customer_ids.encode(o.customer_id))
+        self.product.append(self.product_ids.encode(o.product_id))
+        self.qty.append(o.qty)
+        self.unit_price.append(o.unit_price)
+        self.date.append(self.dates.encode(o.date))
+        self.promo.append(self.promo_codes.encode(o.promo_code))
+        self.time.append(self.times.encode(o.time))
+
+    def extend(self, orders):
+        for o in orders:
+            self.append(o)
+
+    def extend_batch(self, other):
+        """Ajoute les lignes d'un autre OrderBatch (codes ré-encodés dans nos dictionnaires)."""
+        if self.ids is not None:
+            self.ids.extend(other.ids if other.ids is not None else [None] * len(other))
+        for name, column in (('customer_ids', 'customer'), ('product_ids', 'product'),
+                             ('dates', 'date'), ('promo_codes', 'promo'), ('times', 'time')):
+            encode = getattr(self, name).encode
+            mapping = [encode(v) for v in getattr(other, name).values]
+            codes = getattr(other, column)
+            if mapping != list(range(len(mapping))):
+                codes = array('i', map(mapping.__getitem__, codes))
+            getattr(self, column).extend(codes)
+        self.qty.extend(other.qty)
+        self.unit_price.extend(other.unit_price)
+
+    def __len__(self):
+        return len(self.qty)
+
+    def __getitem__(self, i):
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError('OrderBatch index out of range')
+        return OrderView(self, i)
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield OrderView(self, i)
+
+
+def load_order_batch(path, keep_ids=False, customer_ids=None):
+    """Comme load_orders (même validation), mais en OrderBatch compact."""
+    batch = OrderBatch(keep_ids=keep_ids)
+    batch.extend(iter_orders(path, customer_ids))
+    return batch
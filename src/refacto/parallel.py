@@ -0,0 +1,77 @@
+"""
+Calcul multi-cœur du rapport, partitionné par customer_id.
+Les clients sont indépendants une fois les commandes groupées : chaque
+processus agrège et formate les clients de sa partition, la fusion remet
+les blocs dans l'ordre sorted(customer_id) et recalcule les totaux globaux.
+"""
+import heapq
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+
+from .models import Order, order_row
+from .aggregation import aggregate_orders
+
+# Tables en lecture seule, envoyées une fois par processus (initializer).
+_tables = {}
+
+
+def shard_of(cid, shards):
+    """Partition stable d'un client (crc32, indépendant de PYTHONHASHSEED)."""
+    return zlib.crc32(cid.encode('utf-8')) % shards
+
+
+def partition_orders(orders, shards):
+    """Répartit les commandes par hash de customer_id, ordre d'origine conservé.
+
+    Les commandes voyagent en tuples : bien moins cher à sérialiser que des dataclasses.
+    """
+    partitions = [[] for _ in range(shards)]
+    for o in orders:
+        partitions[shard_of(o.customer_id, shards)].append(order_row(o))
+    return partitions
+
+
+def _init_worker(customers, products, shipping_zones, promotions, rules):
+    _tables.update(
+        customers=customers,
+        products=products,
+        shipping_zones=shipping_zones,
+        promotions=promotions,
+        rules=rules,
+    )
+
+
+def _compute_shard(rows):
+    from .order_report import iter_customer_entries
+
+    orders = (Order(*row) for row in rows)
+    totals_by_customer = aggregate_orders(orders, _tables['products'], _tables['promotions'])
+    return [
+        (entry['json']['customer_id'], entry)
+        for entry in iter_customer_entries(
+            totals_by_customer, _tables['customers'], _tables['shipping_zones'], _tables['rules'])
+    ]
+
+
+def iter_entries_parallel(customers, products, shipping_zones, promotions, orders, jobs,
+                          rules=None):
+    """Blocs client dans l'ordre sorted(customer_id), calculés sur `jobs` processus."""
+    partitions = partition_orders(orders, jobs)
+    with ProcessPoolExecutor(
+        max_workers=jobs,
+        initializer=_init_worker,
+        initargs=(customers, products, shipping_zones, promotions, rules),
+    ) as pool:
+        shards = list(pool.map(_compute_shard, partitions))
+
+    merged = heapq.merge(*shards, key=lambda item: item[0])
+    return (entry for _, entry in merged)
+
+
+def compute_report_parallel(customers, products, shipping_zones, promotions, orders, jobs,
+                            rules=None):
+    """Même contrat que compute_report, calcul réparti sur `jobs` processus."""
+    from .order_report import assemble_report
+
+    return assemble_report(iter_entries_parallel(
+        customers, products, shipping_zones, promotions, orders, jobs, rules))
@@ -0,0 +1,151 @@
+"""
+Devis d'une commande avant son écriture : montants d'un client tels que
+compute_report les calculerait si les lignes candidates étaient ajoutées à
+la fin de orders.csv.
+
+Les accumulateurs par client (aggregate_orders) et les tables de référence
+sont calculés une fois et gardés en mémoire, jamais modifiés : un devis
+copie l'accumulateur du client (taille fixe), y ajoute les lignes
+candidates avec la même tarification (promo, bonus matin, poids, points,
+taxe ligne à ligne), puis applique compute_customer_amounts. Son coût ne
+dépend que du nombre de lignes candidates ; les devis sont sûrs entre
+threads.
+"""
+import argparse
+import dataclasses
+import json
+import os
+import statistics
+import sys
+import time
+from datetime import datetime
+
+from .models import CustomerTotals, Order
+from .aggregation import add_line, aggregate_orders
+from .calculations import apply_promotion_and_morning
+from .io_handler import read_data
+from .order_report import compute_customer_amounts
+from .rules import default_rules, load_rules
+
+
+@dataclasses.dataclass(slots=True, frozen=True)
+class QuoteLine:
+    """Ligne candidate ; unit_price par défaut : prix catalogue du produit."""
+    product_id: str
+    qty: int
+    unit_price: float = None
+    promo_code: str = ''
+
+    @classmethod
+    def from_dict(cls, d):
+        if not isinstance(d, dict):
+            raise ValueError(f'Invalid line {d!r}: expected an object')
+        return cls(d['product_id'], d['qty'], d.get('unit_price'), d.get('promo_code') or '')
+
+
+def _quantity(product_id, qty):
+    """qty entière (2 ou 2.0) ; 2.7, '2' ou True sont refusés plutôt que tronqués."""
+    if isinstance(qty, float) and qty.is_integer():
+        qty = int(qty)
+    if isinstance(qty, bool) or not isinstance(qty, int):
+        raise ValueError(f'Invalid line {product_id!r}: qty must be an integer, got {qty!r}')
+    return qty
+
+
+class QuoteEngine:
+    """État par client précalculé + tables de référence, pour des devis en O(lignes)."""
+
+    def __init__(self, customers, products, shipping_zones, promotions, orders, rules=None):
+        self.customers = customers
+        self.products = products
+        self.shipping_zones = shipping_zones
+        self.promotions = promotions
+        self.rules = rules or default_rules()
+        self.totals_by_customer = aggregate_orders(orders, products, promotions)
+
+    def _order(self, cid, line, date, hour_minute):
+        if not isinstance(line, QuoteLine):
+            line = QuoteLine.from_dict(line)
+        unit_price = line.unit_price
+        if unit_price is None:
+            prod = self.products.get(line.product_id)
+            if prod is None:
+                raise ValueError(f'Unknown product {line.product_id!r}: unit_price is required')
+            unit_price = prod.price
+        qty, unit_price = _quantity(line.product_id, line.qty), float(unit_price)
+        # Même validation que le chargement de orders.csv
+        if qty <= 0 or unit_price < 0:
+            raise ValueError(f'Invalid line {line.product_id!r}: qty must be > 0 and '
+                             'unit_price >= 0')
+        return Order(id='', customer_id=cid, product_id=line.product_id, qty=qty,
+                     unit_price=unit_price, date=date, promo_code=line.promo_code,
+                     time=hour_minute)
+
+    def quote(self, cid, lines, at=None):
+        """Montants de compute_customer_amounts (même dict) avec les lignes ajoutées.
+
+        lines : QuoteLine ou dicts {product_id, qty, unit_price?, promo_code?}.
+        at : date et heure de la commande (datetime, maintenant par défaut) ;
+        bonus matin et, pour un premier achat, bonus week-end en dépendent.
+        """
+        at = at or datetime.now()
+        date, hour_minute = at.date().isoformat(), at.strftime('%H:%M')
+        existing = self.totals_by_customer.get(cid)
+        totals = dataclasses.replace(existing) if existing is not None else None
+        for line in lines:
+            o = self._order(cid, line, date, hour_minute)
+            if totals is None:
+                totals = CustomerTotals(first_day=o.day)
+            line_total, morning_bonus = apply_promotion_and_morning(o, self.products,
+                                                                    self.promotions)
+            add_line(totals, o.qty, o.unit_price, self.products.get(o.product_id), line_total,
+                     morning_bonus)
+        if totals is None:
+            raise ValueError(f'No orders and no lines for customer {cid!r}')
+        amounts = compute_customer_amounts(cid, totals, self.customers, self.shipping_zones,
+                                           self.rules)
+        # Taxe dans la devise du client, comme la ligne « Tax: » du rapport
+        amounts['converted_tax'] = amounts['tax'] * amounts['currency_rate']
+        return amounts
+
+
+def _parse_line(text):
+    """PRODUIT:QTÉ[:PROMO]"""
+    product_id, qty, *promo = text.split(':')
+    return QuoteLine(product_id, int(qty), promo_code=promo[0] if promo else '')
+
+
+def measure(engine, cid, lines, at, quotes):
+    """(p50, p99) en microsecondes sur `quotes` devis."""
+    samples = []
+    for _ in range(quotes):
+        started = time.perf_counter()
+        engine.quote(cid, lines, at)
+        samples.append((time.perf_counter() - started) * 1e6)
+    samples.sort()
+    return statistics.median(samples), samples[min(len(samples) - 1, int(len(samples) * 0.99))]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Price quote for candidate order lines')
+    parser.add_argument('customer_id')
+    parser.add_argument('lines', nargs='+', metavar='PRODUCT:QTY[:PROMO]')
+    parser.add_argument('--data-dir', default=None, help='dossier data (défaut : celui du module)')
+    parser.add_argument('--rules', metavar='PATH', help='fichier de règles tarifaires (JSON)')
+    parser.add_argument('--at', metavar='YYYY-MM-DDTHH:MM', help='date et heure de la commande')
+    parser.add_argument('--bench', type=int, metavar='N', help='mesure la latence sur N devis')
+    args = parser.parse_args(argv)
+
+    data_dir = args.data_dir or os.path.join(os.path.dirname(__file__), 'data')
+    rules = load_rules(args.rules) if args.rules else None
+    engine = QuoteEngine(*read_data(data_dir, compact=True), rules=rules)
+    lines = [_parse_line(text) for text in args.lines]
+    at = datetime.fromisoformat(args.at) if args.at else None
+    print(json.dumps(engine.quote(args.customer_id, lines, at), indent=2))
+    if args.bench:
+        p50, p99 = measure(engine, args.customer_id, lines, at or datetime.now(), args.bench)
+        print(f'{args.bench} quotes: p50 {p50:.1f}us p99 {p99:.1f}us', file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,230 @@
+"""
+Règles tarifaires configurables : paliers de remise volume et fidélité, frais
+de port, de manutention et taux de change, chargés depuis un fichier JSON
+(rules.json à côté de ce module par défaut) et compilés en tables de seuils
+triés (recherche par bisect, ou np.searchsorted pour la forme tableau).
+
+Un palier s'applique quand la valeur est strictement supérieure à son seuil
+`above` (absent : toujours). Comme les `if` successifs du legacy, le dernier
+palier déclaré parmi ceux qui s'appliquent l'emporte ; la compilation calcule
+ce gagnant une fois par intervalle entre seuils. Un palier peut être réservé
+à un niveau client (`level`, remise volume) ou à une zone (`zone`, port).
+"""
+import hashlib
+import json
+import math
+import os
+from bisect import bisect_left
+from dataclasses import dataclass
+from functools import lru_cache
+
+try:
+    import numpy as np
+except ImportError:  # dépendance optionnelle (forme tableau seulement)
+    np = None
+
+DEFAULT_RULES_PATH = os.path.join(os.path.dirname(__file__), 'rules.json')
+ZONE_VALUE = 'zone'  # base / per_kg : valeur de la zone de livraison du client
+
+
+@dataclass(slots=True, frozen=True)
+class Tier:
+    above: float = -math.inf
+    rate: float = None
+    cap: float = None
+    fee: float = None
+    base: object = None  # nombre, 'zone' ou None
+    start: float = 0  # clé 'from' du fichier : poids à partir duquel per_kg s'applique
+    per_kg: object = None  # nombre, 'zone' ou None
+    level: str = None
+    zone: str = None
+
+
+def _tiers(entries):
+    tiers = []
+    for entry in entries:
+        entry = dict(entry)
+        if 'from' in entry:
+            entry['start'] = entry.pop('from')
+        if entry.get('above') is None:
+            entry['above'] = -math.inf
+        tiers.append(Tier(**entry))
+    return tiers
+
+
+class TierTable:
+    """Paliers compilés : seuils triés + palier gagnant de chaque intervalle."""
+
+    def __init__(self, tiers):
+        order = sorted(range(len(tiers)), key=lambda i: tiers[i].above)
+        self.thresholds = [tiers[i].above for i in order]
+        self.tiers = []
+        winner = -1
+        for i in order:
+            winner = max(winner, i)
+            self.tiers.append(tiers[winner])
+
+    def lookup(self, x):
+        """Palier appliqué à x, None si aucun."""
+        k = bisect_left(self.thresholds, x)  # nombre de seuils < x
+        return self.tiers[k - 1] if k else None
+
+    def index_array(self, x):
+        """Position du palier appliqué (dans self.tiers) pour chaque valeur, -1 si aucun."""
+        _require_numpy()
+        return np.searchsorted(np.asarray(self.thresholds, dtype=np.float64), x, side='left') - 1
+
+
+class ScopedTiers:
+    """Une TierTable par niveau / zone : paliers communs + paliers propres à la clé."""
+
+    def __init__(self, tiers, field):
+        common = [t for t in tiers if getattr(t, field) is None]
+        keys = {getattr(t, field) for t in tiers} - {None}
+        self.default = TierTable(common)
+        self.tables = {
+            key: TierTable([t for t in tiers if getattr(t, field) in (None, key)]) for key in keys
+        }
+
+    def table(self, key):
+        return self.tables.get(key, self.default)
+
+    def groups(self, keys):
+        """[(table, lignes)] pour un tableau de clés ou des lignes déjà groupées (group_rows)."""
+        if not isinstance(keys, dict):
+            keys = group_rows(keys)
+        return [(self.table(key), rows) for key, rows in keys.items()]
+
+
+def group_rows(keys):
+    """{clé: lignes} d'un tableau de clés ; à calculer une fois pour plusieurs jeux de règles."""
+    _require_numpy()
+    keys = np.asarray(keys, dtype=object)
+    return {key: np.flatnonzero(keys == key) for key in set(keys.tolist())}
+
+
+def _require_numpy():
+    if np is None:
+        raise ImportError('la forme tableau des règles nécessite numpy (pip install numpy)')
+
+
+def _evaluate_array(groups, size, x, formula):
+    """formula(tier, lignes) -> valeurs ; 0.0 pour les lignes sans palier."""
+    out = np.zeros(size, dtype=np.float64)
+    for table, rows in groups:
+        idx = table.index_array(x[rows])
+        for pos in np.unique(idx[idx >= 0]).tolist():
+            selected = rows[idx == pos]
+            out[selected] = formula(table.tiers[pos], selected)
+    return out
+
+
+def _ship_amount(tier, weight, zone_base, zone_per_kg):
+    if tier is None:
+        return 0.0
+    base = zone_base if tier.base == ZONE_VALUE else tier.base
+    per_kg = zone_per_kg if tier.per_kg == ZONE_VALUE else tier.per_kg
+    if per_kg is None:
+        return base if base is not None else 0.0
+    extra = (weight - tier.start) * per_kg
+    return base + extra if base is not None else extra
+
+
+class Rules:
+    """Règles compilées. Les méthodes scalaires reprennent les opérations
+    flottantes du legacy dans le même ordre ; les méthodes *_array évaluent un
+    tableau de clients d'un coup (moteur numpy)."""
+
+    def __init__(self, config, digest=None):
+        self.volume = ScopedTiers(_tiers(config['volume_discount']), 'level')
+        self.loyalty = TierTable(_tiers(config['loyalty_discount']))
+        shipping = config['shipping']
+        self.shipping_limit = shipping['limit']
+        self.shipping_under = ScopedTiers(_tiers(shipping['under_limit']), 'zone')
+        self.shipping_over = ScopedTiers(_tiers(shipping['over_limit']), 'zone')
+        self.zone_multiplier = dict(shipping.get('zone_multiplier', {}))
+        self.handling = TierTable(_tiers(config['handling']))
+        self.currency_rates = dict(config.get('currency_rates', {}))
+        self.config = config  # source, recompilée en entiers par money.py
+        self.digest = digest
+
+    def volume_discount(self, sub, level):
+        tier = self.volume.table(level).lookup(sub)
+        return sub * tier.rate if tier is not None else 0.0
+
+    def loyalty_discount(self, pts):
+        tier = self.loyalty.lookup(pts)
+        if tier is None:
+            return 0.0
+        discount = pts * tier.rate
+        return min(discount, tier.cap) if tier.cap is not None else discount
+
+    def shipping(self, sub, weight, zone, ship_zone):
+        """`ship_zone` : ShippingZone du client (ou zone par défaut)."""
+        if sub < self.shipping_limit:
+            tier = self.shipping_under.table(zone).lookup(weight)
+            ship = _ship_amount(tier, weight, ship_zone.base, ship_zone.per_kg)
+            multiplier = self.zone_multiplier.get(zone)
+            if multiplier is not None:
+                ship = ship * multiplier
+            return ship
+        tier = self.shipping_over.table(zone).lookup(weight)
+        return _ship_amount(tier, weight, ship_zone.base, ship_zone.per_kg)
+
+    def handling_fee(self, item_count):
+        tier = self.handling.lookup(item_count)
+        return tier.fee if tier is not None else 0.0
+
+    def currency_rate(self, currency):
+        return self.currency_rates.get(currency, 1.0)
+
+    def volume_discount_array(self, sub, levels):
+        return _evaluate_array(self.volume.groups(levels), len(sub), sub,
+                               lambda tier, rows: sub[rows] * tier.rate)
+
+    def loyalty_discount_array(self, pts):
+        def formula(tier, rows):
+            discount = pts[rows] * tier.rate
+            return np.minimum(discount, tier.cap) if tier.cap is not None else discount
+        return _evaluate_array([(self.loyalty, np.arange(len(pts)))], len(pts), pts, formula)
+
+    def shipping_array(self, sub, weight, zones, ship_zones):
+        """`ship_zones` : ShippingZone de chaque client ; `zones` : zone de chaque client
+        ou lignes déjà groupées par zone (group_rows)."""
+        base = np.array([z.base for z in ship_zones], dtype=np.float64)
+        per_kg = np.array([z.per_kg for z in ship_zones], dtype=np.float64)
+
+        def formula(tier, rows):
+            return _ship_amount(tier, weight[rows], base[rows], per_kg[rows])
+
+        size = len(sub)
+        zones = zones if isinstance(zones, dict) else group_rows(zones)
+        under = _evaluate_array(self.shipping_under.groups(zones), size, weight, formula)
+        for zone, multiplier in self.zone_multiplier.items():
+            rows = zones.get(zone)
+            if rows is not None:
+                under[rows] = under[rows] * multiplier
+        over = _evaluate_array(self.shipping_over.groups(zones), size, weight, formula)
+        return np.where(sub < self.shipping_limit, under, over)
+
+    def handling_array(self, item_count):
+        size = len(item_count)
+        return _evaluate_array([(self.handling, np.arange(size))], size, item_count,
+                               lambda tier, rows: tier.fee)
+
+    def currency_rate_array(self, currencies):
+        _require_numpy()
+        return np.array([self.currency_rate(c) for c in currencies], dtype=np.float64)
+
+
+def load_rules(path=DEFAULT_RULES_PATH):
+    """Lit et compile un fichier de règles ; `digest` identifie son contenu (cache)."""
+    with open(path, 'rb') as f:
+        raw = f.read()
+    return Rules(json.loads(raw), digest=hashlib.sha256(raw).hexdigest())
+
+
+@lru_cache(maxsize=1)
+def default_rules():
+    """Règles de rules.json, compilées une fois par processus."""
+    return load_rules()
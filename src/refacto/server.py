@@ -0,0 +1,324 @@
+"""
+Mode serveur : processus résident qui garde les tables parsées en mémoire et
+sert le rapport en HTTP local (http.server, un thread par requête), sur un
+port TCP ou une socket Unix.
+
+À chaque requête, les fichiers sont comparés (taille, mtime) à ceux du
+snapshot courant ; seule une table dont le fichier a changé est relue. Un
+snapshot n'est jamais modifié : le rechargement en construit un nouveau et
+le publie d'un coup, les requêtes en cours gardent l'ancien. Le rapport est
+calculé une fois par snapshot, au premier besoin.
+
+Routes (GET) :
+- /report : texte du rapport (celui de run()) ;
+- /report.json : export JSON (celui de output.json) ;
+- /customers/<id> : enregistrement JSON d'un client (404 s'il n'a pas de commande) ;
+- /health : état, lignes par table, dernière erreur de rechargement ;
+- /metrics : compteurs de requêtes, rechargements et calculs.
+
+POST /quote, corps {"customer_id": ..., "lines": [...], "at": "YYYY-MM-DDTHH:MM"?} :
+devis des lignes candidates (cf. quote.py), sur l'état par client du snapshot.
+"""
+import argparse
+import collections
+import json
+import os
+import socket
+import socketserver
+import sys
+import threading
+import time
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import unquote
+
+from .io_handler import REFERENCE_TABLES
+from .order_store import load_order_batch
+from .rules import DEFAULT_RULES_PATH, load_rules
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8765
+DEFAULT_DATA_DIR = os.path.join(os.path.dirname(__file__), 'data')
+DATA_TABLES = REFERENCE_TABLES + (('orders', load_order_batch, 'orders.csv'),)
+# Fichiers facultatifs pour le loader (promotions.csv absent : aucune promotion).
+OPTIONAL_TABLES = frozenset({'promotions'})
+
+
+def _stamp(path, optional=False):
+    """(taille, mtime) ; None pour un fichier facultatif absent (son apparition est un changement)."""
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        if optional:
+            return None
+        raise
+    return st.st_size, st.st_mtime_ns
+
+
+class Snapshot:
+    """Tables chargées à un instant donné, rapport calculé à la demande."""
+
+    def __init__(self, stamps, tables, rules):
+        self.stamps = stamps
+        self.tables = tables
+        self.rules = rules
+        self.loaded_at = time.time()
+        self._lock = threading.Lock()
+        self._report = None
+        self._quotes = None
+
+    def report(self, on_compute=None):
+        """(texte, json_data, enregistrements par client), calculés une seule fois."""
+        report = self._report
+        if report is not None:
+            return report
+        with self._lock:
+            if self._report is None:
+                from .order_report import compute_report
+                started = time.perf_counter()
+                result, json_data = compute_report(
+                    *(self.tables[name] for name, _, _ in DATA_TABLES), rules=self.rules)
+                by_customer = {record['customer_id']: record for record in json_data}
+                self._report = result, json_data, by_customer
+                if on_compute is not None:
+                    on_compute(time.perf_counter() - started)
+            return self._report
+
+    def quote_engine(self):
+        """QuoteEngine du snapshot (accumulateurs par client), construit une seule fois."""
+        engine = self._quotes
+        if engine is not None:
+            return engine
+        with self._lock:
+            if self._quotes is None:
+                from .quote import QuoteEngine
+                self._quotes = QuoteEngine(
+                    *(self.tables[name] for name, _, _ in DATA_TABLES), rules=self.rules)
+            return self._quotes
+
+
+class ReportService:
+    """Tables de data_dir gardées en mémoire et rechargées fichier par fichier."""
+
+    def __init__(self, data_dir=DEFAULT_DATA_DIR, rules_path=None):
+        self.data_dir = data_dir
+        self.rules_path = rules_path or DEFAULT_RULES_PATH
+        self.started_at = time.time()
+        self.last_error = None
+        self.counters = collections.Counter()
+        self._counter_lock = threading.Lock()
+        self._reload_lock = threading.Lock()
+        self._snapshot = None
+        self.refresh()
+
+    def count(self, name, n=1):
+        with self._counter_lock:
+            self.counters[name] += n
+
+    def _paths(self):
+        paths = {name: os.path.join(self.data_dir, filename) for name, _, filename in DATA_TABLES}
+        paths['rules'] = self.rules_path
+        return paths
+
+    def _stamps(self):
+        return {name: _stamp(path, name in OPTIONAL_TABLES)
+                for name, path in self._paths().items()}
+
+    def refresh(self):
+        """Snapshot à jour : relit les seuls fichiers modifiés depuis le précédent.
+
+        Si un rechargement échoue (fichier en cours d'écriture...), le snapshot
+        précédent reste servi et l'erreur est exposée par /health.
+        """
+        current = self._snapshot
+        try:
+            stamps = self._stamps()
+            if current is not None and stamps == current.stamps:
+                return current
+            with self._reload_lock:
+                current = self._snapshot
+                if current is not None and stamps == current.stamps:
+                    return current
+                snapshot = self._load(stamps, current)
+                self._snapshot = snapshot
+                self.last_error = None
+                return snapshot
+        except Exception as e:
+            self.last_error = f'{type(e).__name__}: {e}'
+            self.count('reload.errors')
+            if current is None:
+                raise
+            return current
+
+    def _load(self, stamps, previous):
+        paths = self._paths()
+        tables = {}
+        for name, loader, _ in DATA_TABLES:
+            if previous is not None and previous.stamps[name] == stamps[name]:
+                tables[name] = previous.tables[name]
+            else:
+                tables[name] = loader(paths[name])
+                self.count(f'reload.{name}')
+        if previous is not None and previous.stamps['rules'] == stamps['rules']:
+            rules = previous.rules
+        else:
+            rules = load_rules(self.rules_path)
+            self.count('reload.rules')
+        return Snapshot(stamps, tables, rules)
+
+    def _on_compute(self, seconds):
+        self.count('report.computed')
+        with self._counter_lock:
+            self.counters['report.seconds'] += seconds
+
+    def report(self):
+        return self.refresh().report(self._on_compute)
+
+    def quote(self, request):
+        """Devis d'une requête {customer_id, lines, at?} (ValueError / KeyError si invalide)."""
+        if not isinstance(request, dict):
+            raise ValueError('Quote request must be a JSON object')
+        if not isinstance(request.get('lines'), list):
+            raise ValueError("Quote request 'lines' must be a list")
+        at = datetime.fromisoformat(request['at']) if request.get('at') else None
+        self.count('quotes')
+        return self.refresh().quote_engine().quote(request['customer_id'], request['lines'], at)
+
+    def health(self):
+        snapshot = self._snapshot
+        return {
+            'status': 'ok' if self.last_error is None else 'stale',
+            'data_dir': self.data_dir,
+            'loaded_at': snapshot.loaded_at,
+            'rows': {name: len(table) for name, table in snapshot.tables.items()},
+            'last_error': self.last_error,
+        }
+
+    def metrics(self):
+        with self._counter_lock:
+            counters = dict(self.counters)
+        counters['report.seconds'] = round(counters.get('report.seconds', 0.0), 6)
+        return {'uptime_s': round(time.time() - self.started_at, 3), 'counters': counters}
+
+
+class ReportHandler(BaseHTTPRequestHandler):
+    server_version = 'OrderReport/1.0'
+
+    def do_GET(self):
+        service = self.server.service
+        path = self.path.split('?', 1)[0]
+        service.count('requests')
+        try:
+            if path == '/report':
+                self._send(200, service.report()[0], 'text/plain; charset=utf-8')
+            elif path == '/report.json':
+                self._send_json(200, service.report()[1])
+            elif path.startswith('/customers/'):
+                cid = unquote(path[len('/customers/'):])
+                record = service.report()[2].get(cid)
+                if record is None:
+                    self._send_json(404, {'error': f'No orders for customer {cid}'})
+                else:
+                    self._send_json(200, record)
+            elif path == '/health':
+                service.refresh()
+                self._send_json(200, service.health())
+            elif path == '/metrics':
+                self._send_json(200, service.metrics())
+            else:
+                self._send_json(404, {'error': f'Unknown path: {path}'})
+        except Exception as e:
+            service.count('requests.errors')
+            self._send_json(500, {'error': f'{type(e).__name__}: {e}'})
+
+    def do_POST(self):
+        service = self.server.service
+        path = self.path.split('?', 1)[0]
+        service.count('requests')
+        if path != '/quote':
+            self._send_json(404, {'error': f'Unknown path: {path}'})
+            return
+        try:
+            length = int(self.headers.get('Content-Length', 0))
+            request = json.loads(self.rfile.read(length))
+            self._send_json(200, service.quote(request))
+        except (ValueError, KeyError, TypeError) as e:
+            service.count('requests.errors')
+            self._send_json(400, {'error': f'{type(e).__name__}: {e}'})
+        except Exception as e:
+            service.count('requests.errors')
+            self._send_json(500, {'error': f'{type(e).__name__}: {e}'})
+
+    def _send_json(self, status, data):
+        self._send(status, json.dumps(data, indent=2), 'application/json')
+
+    def _send(self, status, text, content_type):
+        body = text.encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def address_string(self):
+        # Socket Unix : pas d'adresse cliente
+        return self.client_address[0] if self.client_address else 'unix'
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+
+class ReportServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, service, verbose=False):
+        self.service = service
+        self.verbose = verbose
+        super().__init__(address, ReportHandler)
+
+
+class UnixReportServer(ReportServer):
+    address_family = socket.AF_UNIX
+
+    def server_bind(self):
+        # HTTPServer.server_bind attend un couple (hôte, port)
+        socketserver.TCPServer.server_bind(self)
+        self.server_name, self.server_port = 'localhost', 0
+
+
+def make_server(service, host=DEFAULT_HOST, port=DEFAULT_PORT, socket_path=None, verbose=False):
+    """Serveur HTTP prêt à servir (serve_forever) ; socket Unix si socket_path."""
+    if socket_path:
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)
+        return UnixReportServer(socket_path, service, verbose)
+    return ReportServer((host, port), service, verbose)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Order report server')
+    parser.add_argument('--data-dir', default=DEFAULT_DATA_DIR)
+    parser.add_argument('--rules', metavar='PATH', help='fichier de règles tarifaires (JSON)')
+    parser.add_argument('--host', default=DEFAULT_HOST)
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--socket', metavar='PATH', help='socket Unix à la place du port TCP')
+    parser.add_argument('--verbose', action='store_true', help='journal des requêtes sur stderr')
+    args = parser.parse_args(argv)
+
+    service = ReportService(args.data_dir, args.rules)
+    server = make_server(service, args.host, args.port, args.socket, args.verbose)
+    where = args.socket or f'http://{args.host}:{server.server_port}'
+    print(f'Serving order report on {where}', file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        if args.socket and os.path.exists(args.socket):
+            os.unlink(args.socket)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,294 @@
+"""
+Simulation « what-if » : N jeux de paramètres tarifaires évalués sur les
+mêmes accumulateurs par client, calculés une seule fois.
+
+Lecture et agrégation des commandes (aggregate_orders, comme compute_report)
+sont faites une fois ; chaque scénario n'est ensuite qu'une évaluation
+vectorisée (numpy, formes *_array de rules.py) sur le tableau des clients :
+son coût est proportionnel au nombre de clients, pas de commandes.
+
+Un scénario fait varier TAX, MAX_DISCOUNT et tout paramètre de rules.json
+(paliers de remise volume, shipping.limit, handling, currency_rates...) :
+ses `overrides` sont fusionnés dans la configuration de base (les dicts
+récursivement, les listes remplacées). Les opérations flottantes et
+arrondis sont ceux du moteur columnar : avec les paramètres de base, les
+totaux sont exactement ceux du rapport. La taxe ligne à ligne (clients ayant
+un article non taxable) est recalculée au taux du scénario à partir de la
+base qty * prix de chaque ligne taxable, sommée dans l'ordre des commandes :
+un scénario TAX donne les mêmes totaux que le rapport calculé à ce taux.
+"""
+import argparse
+import copy
+import json
+import os
+from dataclasses import dataclass, field
+
+try:
+    import numpy as np
+except ImportError:  # dépendance optionnelle
+    np = None
+
+from .aggregation import aggregate_orders
+from .calculations import TAX, _DEFAULT_ZONE, customer_profile
+from .calendar_cache import is_weekend_day
+from .columnar import cap_discounts_array
+from .discounts import MAX_DISCOUNT
+from .io_handler import read_data
+from .order_store import OrderBatch
+from .rules import Rules, default_rules, group_rows, load_rules
+
+
+def _require_numpy():
+    if np is None:
+        raise ImportError('la simulation nécessite numpy (pip install numpy)')
+
+
+@dataclass(slots=True)
+class Scenario:
+    """Jeu de paramètres : taux de taxe, plafond de remise et surcharges de rules.json."""
+    name: str
+    tax: float = TAX
+    max_discount: float = MAX_DISCOUNT
+    overrides: dict = field(default_factory=dict)
+
+    @classmethod
+    def from_dict(cls, d):
+        return cls(d['name'], d.get('tax', TAX), d.get('max_discount', MAX_DISCOUNT),
+                   d.get('rules', {}))
+
+    def rules(self, base):
+        """Règles du scénario : configuration de `base` + overrides."""
+        if not self.overrides:
+            return base
+        return Rules(merge_config(base.config, self.overrides))
+
+
+def merge_config(config, overrides):
+    """Copie de `config` avec `overrides` : dicts fusionnés récursivement, le reste remplacé."""
+    merged = copy.deepcopy(config)
+    for key, value in overrides.items():
+        if isinstance(value, dict) and isinstance(merged.get(key), dict):
+            merged[key] = merge_config(merged[key], value)
+        else:
+            merged[key] = copy.deepcopy(value)
+    return merged
+
+
+@dataclass(slots=True)
+class ScenarioResult:
+    name: str
+    grand_total: float
+    tax_collected: float
+    totals: 'np.ndarray'  # total par client, dans l'ordre de CustomerArrays.customer_ids
+    deltas: 'np.ndarray'  # totals - totaux de référence
+
+    def to_dict(self, customer_ids):
+        return {
+            'name': self.name,
+            'grand_total': round(self.grand_total, 2),
+            'tax_collected': round(self.tax_collected, 2),
+            'deltas': {cid: round(d, 2) for cid, d in zip(customer_ids, self.deltas.tolist())},
+        }
+
+
+@dataclass(slots=True)
+class CustomerArrays:
+    """Accumulateurs et profil des clients, triés par customer_id (ordre du rapport)."""
+    customer_ids: list
+    levels: dict  # {niveau: lignes}, cf. rules.group_rows
+    zones: dict  # {zone: lignes}
+    currencies: list  # devises distinctes
+    currency_idx: 'np.ndarray'  # position de la devise de chaque client dans currencies
+    ship_zones: list
+    weekend: 'np.ndarray'
+    subtotal: 'np.ndarray'
+    weight: 'np.ndarray'
+    loyalty_points: 'np.ndarray'
+    item_count: 'np.ndarray'
+    tax_row: 'np.ndarray'  # ligne taxable -> position du client
+    tax_base: 'np.ndarray'  # qty * prix catalogue de chaque ligne taxable, ordre des commandes
+    all_taxable: 'np.ndarray'
+
+
+def _record_tax_lines(orders, products, index, codes, bases):
+    """Génère `orders` en relevant, pour chaque ligne taxable, le code du client
+    (dans `index`) et sa base qty * prix catalogue (cf. aggregation.add_line)."""
+    for o in orders:
+        prod = products.get(o.product_id)
+        if prod and prod.taxable:
+            codes.append(index.setdefault(o.customer_id, len(index)))
+            bases.append(o.qty * prod.price)
+        yield o
+
+
+def batch_tax_lines(batch, products):
+    """(clients, codes, bases) des lignes taxables d'un OrderBatch, lues dans ses colonnes."""
+    _require_numpy()
+    prods = [products.get(pid) for pid in batch.product_ids.values]
+    price = np.array([p.price if p else 0.0 for p in prods], dtype=np.float64)
+    taxable = np.array([bool(p and p.taxable) for p in prods], dtype=bool)
+    product = np.frombuffer(batch.product, dtype=np.intc)
+    keep = taxable[product]
+    qty = np.frombuffer(batch.qty, dtype=np.int64)[keep]
+    codes = np.frombuffer(batch.customer, dtype=np.intc)[keep]
+    return batch.customer_ids.values, codes, qty * price[product[keep]]
+
+
+def customer_arrays(totals_by_customer, customers, shipping_zones, tax_lines=((), (), ())):
+    """CustomerArrays des accumulateurs d'aggregate_orders.
+
+    tax_lines : (clients, codes, bases) des lignes taxables, le code de chaque
+    ligne étant la position de son client dans `clients`.
+    """
+    _require_numpy()
+    ids = sorted(totals_by_customer)
+    row = {cid: i for i, cid in enumerate(ids)}
+    names, codes, bases = tax_lines
+    code_row = np.array([row[cid] for cid in names], dtype=np.int64)
+    totals = [totals_by_customer[cid] for cid in ids]
+    profiles = [customer_profile(customers.get(cid)) for cid in ids]
+    zones = [p[2] for p in profiles]
+    currencies = sorted({p[3] for p in profiles})
+    currency_index = {c: i for i, c in enumerate(currencies)}
+
+    def column(attribute, dtype=np.float64):
+        return np.array([getattr(t, attribute) for t in totals], dtype=dtype)
+
+    return CustomerArrays(
+        customer_ids=ids,
+        levels=group_rows([p[1] for p in profiles]),
+        zones=group_rows(zones),
+        currencies=currencies,
+        currency_idx=np.array([currency_index[p[3]] for p in profiles], dtype=np.int64),
+        ship_zones=[shipping_zones.get(z, _DEFAULT_ZONE) for z in zones],
+        weekend=np.array([is_weekend_day(t.first_day) for t in totals], dtype=bool),
+        subtotal=column('subtotal'),
+        weight=column('weight'),
+        loyalty_points=column('loyalty_points'),
+        item_count=column('item_count', np.int64),
+        tax_row=code_row[np.asarray(codes, dtype=np.int64)],
+        tax_base=np.asarray(bases, dtype=np.float64),
+        all_taxable=np.array([t.non_taxable_items == 0 for t in totals], dtype=bool),
+    )
+
+
+def round_cents(x):
+    """round(v, 2) de Python sur chaque valeur, vectorisé.
+
+    Hors des cas à mi-chemin, rint(v * 100) / 100 donne le même flottant
+    (quotient correctement arrondi du même entier) ; les valeurs dont
+    v * 100 est proche d'un demi sont arrondies par round() lui-même.
+    """
+    scaled = x * 100
+    out = np.rint(scaled) / 100
+    ambiguous = np.flatnonzero((np.abs(scaled - np.floor(scaled) - 0.5) < 1e-6)
+                               | ~(np.abs(scaled) < 1e12))
+    for i in ambiguous.tolist():
+        out[i] = round(float(x[i]), 2)
+    return out
+
+
+def evaluate(arrays, rules, tax=TAX, max_discount=MAX_DISCOUNT):
+    """(totaux par client, taxe convertie par client) pour un jeu de paramètres."""
+    sub = arrays.subtotal
+    disc = rules.volume_discount_array(sub, arrays.levels)
+    disc = np.where(arrays.weekend, disc * 1.05, disc)
+    loyalty_discount = rules.loyalty_discount_array(arrays.loyalty_points)
+    _, _, total_discount = cap_discounts_array(disc, loyalty_discount, max_discount)
+    taxable = sub - total_discount
+
+    # Somme séquentielle par client (bincount), comme line_tax += qty * prix * TAX.
+    line_tax = np.bincount(arrays.tax_row, weights=arrays.tax_base * tax,
+                           minlength=len(arrays.customer_ids))
+    tax_amount = round_cents(np.where(arrays.all_taxable, taxable * tax, line_tax))
+    ship = rules.shipping_array(sub, arrays.weight, arrays.zones, arrays.ship_zones)
+    handling = rules.handling_array(arrays.item_count)
+    rate = rules.currency_rate_array(arrays.currencies)[arrays.currency_idx]
+    totals = round_cents((taxable + tax_amount + ship + handling) * rate)
+    return totals, tax_amount * rate
+
+
+def _result(name, totals, taxes, baseline_totals):
+    # Sommes dans l'ordre des clients, comme assemble_report.
+    grand_total = 0.0
+    for total in totals.tolist():
+        grand_total += total
+    tax_collected = 0.0
+    for tax in taxes.tolist():
+        tax_collected += tax
+    return ScenarioResult(name, grand_total, tax_collected, totals, totals - baseline_totals)
+
+
+@dataclass(slots=True)
+class Simulation:
+    customer_ids: list
+    baseline: ScenarioResult
+    scenarios: list
+
+    def to_dict(self):
+        return {
+            'customers': len(self.customer_ids),
+            'baseline': self.baseline.to_dict(self.customer_ids),
+            'scenarios': [s.to_dict(self.customer_ids) for s in self.scenarios],
+        }
+
+
+def simulate(customers, products, shipping_zones, promotions, orders, scenarios, rules=None):
+    """Évalue chaque scénario (Scenario ou dict, cf. Scenario.from_dict) contre la
+    référence (`rules`, TAX, MAX_DISCOUNT) ; une seule passe sur `orders`."""
+    _require_numpy()
+    rules = rules or default_rules()
+    scenarios = [s if isinstance(s, Scenario) else Scenario.from_dict(s) for s in scenarios]
+    if isinstance(orders, OrderBatch):
+        totals_by_customer = aggregate_orders(orders, products, promotions)
+        tax_lines = batch_tax_lines(orders, products)
+    else:
+        index, codes, bases = {}, [], []
+        totals_by_customer = aggregate_orders(
+            _record_tax_lines(orders, products, index, codes, bases), products, promotions)
+        tax_lines = list(index), codes, bases
+    arrays = customer_arrays(totals_by_customer, customers, shipping_zones, tax_lines)
+
+    totals, taxes = evaluate(arrays, rules)
+    baseline = _result('baseline', totals, taxes, totals)
+    results = []
+    for scenario in scenarios:
+        totals, taxes = evaluate(arrays, scenario.rules(rules), scenario.tax,
+                                 scenario.max_discount)
+        results.append(_result(scenario.name, totals, taxes, baseline.totals))
+    return Simulation(arrays.customer_ids, baseline, results)
+
+
+def format_simulation(simulation):
+    """Une ligne par scénario : totaux et écart au total de référence."""
+    base = simulation.baseline
+    lines = [f'baseline: total {base.grand_total:.2f} tax {base.tax_collected:.2f}']
+    for s in simulation.scenarios:
+        changed = int(np.count_nonzero(s.deltas))
+        lines.append(f'{s.name}: total {s.grand_total:.2f} ({s.grand_total - base.grand_total:+.2f})'
+                     f' tax {s.tax_collected:.2f} ({s.tax_collected - base.tax_collected:+.2f})'
+                     f' {changed} customers changed')
+    return '\n'.join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='What-if pricing simulation')
+    parser.add_argument('scenarios', help='fichier JSON : liste de scénarios')
+    parser.add_argument('--data-dir', default=os.path.join(os.path.dirname(__file__), 'data'))
+    parser.add_argument('--rules', metavar='PATH', help='règles de référence (défaut : rules.json)')
+    parser.add_argument('--out', metavar='PATH', help='résultats JSON (totaux et écarts par client)')
+    args = parser.parse_args(argv)
+
+    with open(args.scenarios, encoding='utf-8') as f:
+        scenarios = json.load(f)
+    rules = load_rules(args.rules) if args.rules else None
+    simulation = simulate(*read_data(args.data_dir, compact=True), scenarios, rules=rules)
+    print(format_simulation(simulation))
+    if args.out:
+        with open(args.out, 'w', encoding='utf-8') as f:
+            json.dump(simulation.to_dict(), f, indent=2)
+    return simulation
+
+
+if __name__ == '__main__':
+    main()
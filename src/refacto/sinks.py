@@ -0,0 +1,104 @@
+"""
+Sorties en flux : le rapport est écrit bloc client par bloc client au lieu
+d'être assemblé en mémoire (texte joint + liste JSON + json.dump).
+Chaque sink bufferise ses écritures (buffer_size caractères) ; les totaux
+globaux sont ajoutés en fin de flux par close().
+
+    TextSink        même texte que run(), suivi du '\\n' de print
+    JsonArraySink   même fichier que write_json (tableau, indent=2)
+    NdjsonSink      un objet JSON par ligne, puis une ligne de totaux
+"""
+import abc
+import json
+
+from .formatter import format_footer
+
+DEFAULT_BUFFER_SIZE = 1 << 16
+
+
+class _BufferedSink(abc.ABC):
+    """Écritures bufferisées ; les sous-classes formatent chaque bloc (write_entry)."""
+
+    def __init__(self, stream, buffer_size=DEFAULT_BUFFER_SIZE):
+        self.stream = stream
+        self.buffer_size = buffer_size
+        self._parts = []
+        self._size = 0
+
+    def _write(self, text):
+        self._parts.append(text)
+        self._size += len(text)
+        if self._size >= self.buffer_size:
+            self.flush()
+
+    def flush(self):
+        if self._parts:
+            self.stream.write(''.join(self._parts))
+            self._parts.clear()
+            self._size = 0
+
+    @abc.abstractmethod
+    def write_entry(self, entry):
+        """Écrit un bloc client (dict de compute_customer_entry)."""
+
+    def close(self, grand_total, total_tax_collected):
+        self.flush()
+
+
+class TextSink(_BufferedSink):
+    def write_entry(self, entry):
+        self._write(''.join(line + '\n' for line in entry['lines']))
+
+    def close(self, grand_total, total_tax_collected):
+        self._write(''.join(line + '\n' for line in format_footer(grand_total, total_tax_collected)))
+        self.flush()
+
+
+class JsonArraySink(_BufferedSink):
+    """Octet pour octet la sortie de json.dump(records, f, indent=2)."""
+
+    def __init__(self, stream, buffer_size=DEFAULT_BUFFER_SIZE, indent=2):
+        super().__init__(stream, buffer_size)
+        self.indent = indent
+        self._count = 0
+
+    def write_entry(self, entry):
+        record = json.dumps(entry['json'], indent=self.indent)
+        pad = ' ' * self.indent
+        self._write(('[\n' if self._count == 0 else ',\n')
+                    + '\n'.join(pad + line for line in record.split('\n')))
+        self._count += 1
+
+    def close(self, grand_total, total_tax_collected):
+        self._write('\n]' if self._count else '[]')
+        self.flush()
+
+
+class NdjsonSink(_BufferedSink):
+    def write_entry(self, entry):
+        self._write(json.dumps(entry['json']) + '\n')
+
+    def close(self, grand_total, total_tax_collected):
+        self._write(json.dumps({
+            'grand_total': round(grand_total, 2),
+            'total_tax_collected': round(total_tax_collected, 2),
+        }) + '\n')
+        self.flush()
+
+
+def stream_report(entries, sinks):
+    """Écrit les blocs client (déjà triés) dans chaque sink, puis les totaux.
+
+    Les totaux sont sommés dans le même ordre qu'assemble_report : mêmes flottants.
+    Renvoie (grand_total, total_tax_collected).
+    """
+    grand_total = 0.0
+    total_tax_collected = 0.0
+    for entry in entries:
+        grand_total += entry['total']
+        total_tax_collected += entry['tax']
+        for sink in sinks:
+            sink.write_entry(entry)
+    for sink in sinks:
+        sink.close(grand_total, total_tax_collected)
+    return grand_total, total_tax_collected
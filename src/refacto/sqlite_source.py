@@ -0,0 +1,200 @@
+"""
+Source de données SQLite, alternative aux CSV de loader.py.
+Les 5 tables portent les colonnes des CSV, typées (cf. SCHEMA) ;
+export_csv_to_sqlite produit une base à partir d'un dossier data.
+
+La tarification ligne à ligne (jointure produits / promotions, bonus matin),
+les sommes de poids, points et taxe et le GROUP BY client sont exécutés
+dans SQLite ; seuls les agrégats par client reviennent en Python pour les
+remises, la taxe et le port (build_report).
+
+Sortie identique au chemin CSV :
+- les constantes et taux de promo sont passés en paramètres liés, jamais
+  en littéraux SQL (pas de second parsing des flottants) ;
+- les heures et taux de promo sont calculés par les fonctions Python
+  (parse_hour, promotion_rates) puis joints depuis des tables temporaires ;
+- les sommes parcourent l'index (customer_id, rowid) : même ordre que le
+  fichier, donc mêmes flottants. À partir de SQLite 3.43, sum() compense
+  les erreurs d'arrondi (Kahan-Babuska-Neumaier) ; une somme séquentielle
+  enregistrée en Python la remplace alors.
+"""
+import os
+import sqlite3
+
+from .models import Customer, CustomerTotals, Product, Promotion, ShippingZone
+from .calendar_cache import DEFAULT_HOUR, parse_day, parse_hour
+from .calculations import LOYALTY_RATIO, TAX, promotion_rates
+from .loader import (
+    iter_orders,
+    load_customers,
+    load_products,
+    load_promotions,
+    load_shipping_zones,
+)
+from .instrumentation import span
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS customers (
+    id TEXT PRIMARY KEY, name TEXT, level TEXT, shipping_zone TEXT, currency TEXT);
+CREATE TABLE IF NOT EXISTS products (
+    id TEXT PRIMARY KEY, name TEXT, category TEXT, price REAL, weight REAL, taxable INTEGER);
+CREATE TABLE IF NOT EXISTS shipping_zones (zone TEXT PRIMARY KEY, base REAL, per_kg REAL);
+CREATE TABLE IF NOT EXISTS promotions (code TEXT PRIMARY KEY, type TEXT, value TEXT, active INTEGER);
+CREATE TABLE IF NOT EXISTS orders (
+    id TEXT, customer_id TEXT, product_id TEXT, qty INTEGER, unit_price REAL,
+    date TEXT, promo_code TEXT, time TEXT);
+"""
+INDEXES = """
+CREATE INDEX IF NOT EXISTS idx_orders_customer ON orders(customer_id);
+CREATE INDEX IF NOT EXISTS idx_orders_product ON orders(product_id);
+"""
+_SUM = 'sum' if sqlite3.sqlite_version_info < (3, 43, 0) else 'seq_sum'
+
+# Une ligne tarifée par commande valide ; parcours forcé de l'index client
+# (ordre customer_id puis rowid = ordre du fichier pour chaque client).
+AGGREGATE_SQL = f"""
+SELECT customer_id, min(rid), date,
+       {_SUM}(line_total - morning_bonus), {_SUM}(line_weight), {_SUM}(morning_bonus), count(*),
+       {_SUM}(points), {_SUM}(line_tax), count(line_tax_free)
+FROM (
+    SELECT *, CASE WHEN hour < 10 THEN line_total * :morning_rate ELSE 0 END AS morning_bonus
+    FROM (
+        SELECT o.rowid AS rid, o.customer_id, o.date,
+               o.qty * CASE WHEN p.id IS NULL THEN o.unit_price ELSE p.price END
+                     * (1 - coalesce(r.rate, 0)) - coalesce(r.fixed, 0) * o.qty AS line_total,
+               coalesce(h.hour, :default_hour) AS hour,
+               CASE WHEN p.id IS NULL THEN :default_weight ELSE p.weight END * o.qty AS line_weight,
+               o.qty * o.unit_price * :loyalty_ratio AS points,
+               CASE WHEN p.taxable THEN o.qty * p.price * :tax END AS line_tax,
+               CASE WHEN NOT p.taxable THEN 1 END AS line_tax_free
+        FROM orders o INDEXED BY idx_orders_customer
+        LEFT JOIN products p ON p.id = o.product_id
+        LEFT JOIN temp.promo_rates r ON r.code = o.promo_code
+        LEFT JOIN temp.hours h ON h.time = o.time
+        WHERE o.customer_id IS NOT NULL
+          AND typeof(o.qty) = 'integer' AND o.qty > 0
+          AND typeof(o.unit_price) IN ('real', 'integer') AND o.unit_price >= 0
+    )
+)
+GROUP BY customer_id
+"""
+
+
+class _SequentialSum:
+    """sum() sans compensation : additions dans l'ordre d'arrivée, comme Python."""
+
+    def __init__(self):
+        self.total = 0.0
+
+    def step(self, value):
+        if value is not None:
+            self.total += value
+
+    def finalize(self):
+        return self.total
+
+
+def connect(db_path):
+    conn = sqlite3.connect(db_path)
+    conn.create_aggregate('seq_sum', 1, _SequentialSum)
+    return conn
+
+
+def ensure_indexes(conn):
+    conn.executescript(INDEXES)
+
+
+def export_csv_to_sqlite(data_dir, db_path):
+    """Crée une base SQLite à partir des 5 CSV (mêmes loaders, même validation)."""
+    customers = load_customers(os.path.join(data_dir, 'customers.csv'))
+    products = load_products(os.path.join(data_dir, 'products.csv'))
+    shipping_zones = load_shipping_zones(os.path.join(data_dir, 'shipping_zones.csv'))
+    promotions = load_promotions(os.path.join(data_dir, 'promotions.csv'))
+    with connect(db_path) as conn:
+        conn.executescript(SCHEMA)
+        conn.executemany('INSERT INTO customers VALUES (?, ?, ?, ?, ?)', (
+            (c.id, c.name, c.level, c.shipping_zone, c.currency) for c in customers.values()))
+        conn.executemany('INSERT INTO products VALUES (?, ?, ?, ?, ?, ?)', (
+            (p.id, p.name, p.category, p.price, p.weight, p.taxable) for p in products.values()))
+        conn.executemany('INSERT INTO shipping_zones VALUES (?, ?, ?)', (
+            (z.zone, z.base, z.per_kg) for z in shipping_zones.values()))
+        conn.executemany('INSERT INTO promotions VALUES (?, ?, ?, ?)', (
+            (p.code, p.type, p.value, p.active) for p in promotions.values()))
+        conn.executemany('INSERT INTO orders VALUES (?, ?, ?, ?, ?, ?, ?, ?)', (
+            (o.id, o.customer_id, o.product_id, o.qty, o.unit_price, o.date, o.promo_code, o.time)
+            for o in iter_orders(os.path.join(data_dir, 'orders.csv'))))
+        ensure_indexes(conn)
+    conn.close()
+    return db_path
+
+
+def load_reference_tables(conn):
+    """(customers, products, shipping_zones, promotions), mêmes dictionnaires que read_data."""
+    customers = {row[0]: Customer(*row) for row in conn.execute(
+        'SELECT id, name, level, shipping_zone, currency FROM customers ORDER BY rowid')}
+    products = {row[0]: Product(*row[:5], taxable=bool(row[5])) for row in conn.execute(
+        'SELECT id, name, category, price, weight, taxable FROM products ORDER BY rowid')}
+    shipping_zones = {row[0]: ShippingZone(*row) for row in conn.execute(
+        'SELECT zone, base, per_kg FROM shipping_zones ORDER BY rowid')}
+    promotions = {row[0]: Promotion(*row[:3], active=bool(row[3])) for row in conn.execute(
+        'SELECT code, type, value, active FROM promotions ORDER BY rowid')}
+    return customers, products, shipping_zones, promotions
+
+
+def _prepare_lookups(conn, promotions):
+    """Tables temporaires des heures et taux de promo, calculés par les fonctions Python."""
+    conn.executescript("""
+        CREATE TEMP TABLE IF NOT EXISTS hours (time TEXT PRIMARY KEY, hour INTEGER);
+        CREATE TEMP TABLE IF NOT EXISTS promo_rates (code TEXT PRIMARY KEY, rate REAL, fixed REAL);
+        DELETE FROM temp.hours;
+        DELETE FROM temp.promo_rates;
+    """)
+    times = [row[0] for row in conn.execute('SELECT DISTINCT time FROM orders')]
+    conn.executemany('INSERT INTO temp.hours VALUES (?, ?)',
+                     ((t, parse_hour(t)) for t in times if t is not None))
+    codes = [row[0] for row in conn.execute('SELECT DISTINCT promo_code FROM orders')]
+    conn.executemany('INSERT INTO temp.promo_rates VALUES (?, ?, ?)', (
+        (code, *promotion_rates(code, promotions)) for code in codes if code in promotions))
+
+
+def aggregate_sqlite(conn, promotions):
+    """Accumulateurs CustomerTotals calculés par SQLite (cf. AGGREGATE_SQL)."""
+    ensure_indexes(conn)
+    _prepare_lookups(conn, promotions)
+    params = {
+        'morning_rate': 0.03,
+        'default_weight': 1.0,
+        'default_hour': DEFAULT_HOUR,
+        'loyalty_ratio': LOYALTY_RATIO,
+        'tax': TAX,
+    }
+    totals_by_customer = {}
+    for cid, _, date, subtotal, weight, morning, items, points, line_tax, tax_free in conn.execute(
+            AGGREGATE_SQL, params):
+        totals_by_customer[cid] = CustomerTotals(
+            subtotal=subtotal,
+            weight=weight,
+            morning_bonus=morning,
+            item_count=items,
+            first_day=parse_day(date),
+            loyalty_points=points,
+            line_tax=line_tax if line_tax is not None else 0.0,
+            non_taxable_items=tax_free,
+        )
+    return totals_by_customer
+
+
+def compute_report_sqlite(db_path, rules=None):
+    """Même (result, json_data) que compute_report sur les mêmes données."""
+    from .order_report import build_report
+
+    conn = connect(db_path)
+    try:
+        with span('read_data'):
+            customers, products, shipping_zones, promotions = load_reference_tables(conn)
+        with span('aggregate'):
+            totals_by_customer = aggregate_sqlite(conn, promotions)
+    finally:
+        conn.close()
+    with span('report', rows=len(totals_by_customer)):
+        return build_report(totals_by_customer, customers, shipping_zones, rules)
@@ -0,0 +1,84 @@
+# src/test/test_batch.py
+
+import os
+import sys
+import json
+import shutil
+
+import pytest
+
+base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))  # src
+sys.path.insert(0, base_dir)
+
+from refacto.batch import expand_data_dirs, main, parse_shared_tables, run_batch
+from refacto.io_handler import read_data
+from refacto.order_report import compute_report
+
+DATA_DIR = os.path.join(base_dir, "refacto", "data")
+
+
+@pytest.fixture
+def stores(tmp_path):
+    """3 magasins : mêmes produits / zones / promotions, commandes différentes, un cassé."""
+    root = tmp_path / "stores"
+    with open(os.path.join(DATA_DIR, "orders.csv"), encoding="utf-8") as f:
+        header, *rows = f.read().splitlines()
+    for i, name in enumerate(["north", "south", "west"]):
+        shutil.copytree(DATA_DIR, root / name)
+        (root / name / "orders.csv").write_text("\n".join([header] + rows[i::2]) + "\n", encoding="utf-8")
+    os.remove(root / "west" / "customers.csv")
+    return root
+
+
+@pytest.mark.parametrize("jobs", [1, 2])
+def test_batch_writes_one_report_per_store(stores, tmp_path, jobs):
+    out = tmp_path / "out"
+    data_dirs = expand_data_dirs([str(stores / "*")])
+    assert [os.path.basename(d) for d in data_dirs] == ["north", "south", "west"]
+
+    results = run_batch(data_dirs, str(out), jobs=jobs)
+
+    assert [r.ok for r in results] == [True, True, False]
+    assert "customers.csv" in results[2].error
+    for name in ["north", "south"]:
+        result, json_data = compute_report(*read_data(str(stores / name)))
+        assert (out / name / "report.txt").read_text(encoding="utf-8") == result + "\n"
+        assert json.loads((out / name / "output.json").read_text(encoding="utf-8")) == json_data
+
+    summary = json.loads((out / "summary.json").read_text(encoding="utf-8"))
+    assert summary["stores"] == 3 and summary["failed"] == 1
+    assert summary["shared_tables"] == ["customers", "products", "promotions", "shipping_zones"]
+
+
+def test_identical_reference_tables_are_parsed_once(stores):
+    data_dirs = expand_data_dirs([str(stores / "*")])
+    (stores / "south" / "promotions.csv").write_text("code,type,value,active\n", encoding="utf-8")
+
+    digests, shared = parse_shared_tables(data_dirs)
+
+    assert {name for name, _ in shared} == {"products", "promotions", "shipping_zones", "customers"}
+    assert digests[0]["promotions"] != digests[1]["promotions"]
+    assert shared["promotions", digests[0]["promotions"]]  # north et west
+
+
+def test_cli_exit_code_reports_failures(stores, tmp_path, capsys):
+    assert main([str(stores / "north"), str(stores / "south"), "--out", str(tmp_path / "o"), "--jobs", "1"]) == 0
+    assert main([str(stores / "*"), "--out", str(tmp_path / "o"), "--jobs", "1"]) == 1
+    assert "3 stores, 1 failed" in capsys.readouterr().err
+
+
+def test_malformed_shared_table_fails_only_its_stores(stores, tmp_path):
+    (stores / "west" / "customers.csv").write_bytes((stores / "north" / "customers.csv").read_bytes())
+    for name in ["north", "south"]:
+        with open(stores / name / "shipping_zones.csv", "a", encoding="utf-8") as f:
+            f.write("ZONE9,abc,0.5\n")
+    data_dirs = expand_data_dirs([str(stores / "*")])
+
+    digests, shared = parse_shared_tables(data_dirs)
+    assert ("shipping_zones", digests[0]["shipping_zones"]) not in shared
+
+    results = run_batch(data_dirs, str(tmp_path / "out"), jobs=1)
+    assert [r.ok for r in results] == [False, False, True]
+    assert "ValueError" in results[0].error
+    assert (tmp_path / "out" / "west" / "report.txt").exists()
+    assert json.loads((tmp_path / "out" / "summary.json").read_text(encoding="utf-8"))["failed"] == 2
@@ -0,0 +1,49 @@
+# src/test/test_bench.py
+
+import os
+import sys
+
+import pytest
+
+base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))  # src
+sys.path.insert(0, base_dir)
+
+from bench.generate import generate
+from bench.run_bench import bench_engines, bench_refacto, compare
+from refacto.io_handler import read_data
+from refacto.order_report import compute_report
+
+
+def test_generator_is_reproducible(tmp_path):
+    first = generate(str(tmp_path / "a"), orders=500, customers=50, seed=7)
+    second = generate(str(tmp_path / "b"), orders=500, customers=50, seed=7)
+
+    for name in os.listdir(first):
+        with open(os.path.join(first, name), "rb") as f1, open(os.path.join(second, name), "rb") as f2:
+            assert f1.read() == f2.read(), name
+
+
+def test_bench_stages_and_regression_flag(tmp_path):
+    data_dir = generate(str(tmp_path / "data"), orders=500, customers=50)
+    results = bench_refacto(data_dir, rows=500)
+
+    assert list(results) == ["load", "aggregate", "pricing", "format", "json"]
+    assert compare(results, results) == []
+
+    slow = {"aggregate": dict(results["aggregate"], wall_s=results["aggregate"]["wall_s"] + 1.0)}
+    assert compare(slow, results) == [{
+        "stage": "aggregate",
+        "baseline_s": results["aggregate"]["wall_s"],
+        "wall_s": slow["aggregate"]["wall_s"],
+    }]
+
+
+def test_engine_bench_stages_and_identical_output(tmp_path):
+    pytest.importorskip("numpy")
+    data_dir = generate(str(tmp_path / "data"), orders=2_000, customers=200)
+    results = bench_engines(data_dir, rows=2_000)
+
+    assert list(results) == ["e2e_python", "e2e_numpy"]
+    # Les deux chemins chronométrés donnent le même rapport (comparaison des temps : run_bench.py)
+    assert compute_report(*read_data(data_dir, fast=True), engine="numpy") == \
+        compute_report(*read_data(data_dir), engine="python")
@@ -0,0 +1,47 @@
+# src/test/test_binary_store.py
+
+import os
+import sys
+import shutil
+
+import pytest
+
+base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))  # src
+sys.path.insert(0, base_dir)
+
+from refacto.binary_store import convert_data_dir, load_order_batch_mapped, read_data_binary, table_path
+from refacto.io_handler import read_data
+from refacto.models import order_row
+from refacto.order_report import compute_report
+
+DATA_DIR = os.path.join(base_dir, "refacto", "data")
+
+
+def test_round_trip_matches_csv(tmp_path):
+    convert_data_dir(DATA_DIR, str(tmp_path), keep_ids=True)
+    tables = read_data(DATA_DIR)
+    mapped = read_data_binary(str(tmp_path))
+
+    assert mapped[:4] == tables[:4]
+    assert [order_row(o) for o in mapped[4]] == [order_row(o) for o in tables[4]]
+    assert isinstance(mapped[4].qty, memoryview)  # colonnes sur le fichier mappé
+    assert compute_report(*mapped) == compute_report(*tables)
+
+
+def test_numpy_engine_reads_mapped_columns(tmp_path):
+    pytest.importorskip("numpy")
+    convert_data_dir(DATA_DIR, str(tmp_path))
+
+    assert compute_report(*read_data_binary(str(tmp_path)), engine="numpy") == compute_report(
+        *read_data(DATA_DIR))
+
+
+def test_empty_orders(tmp_path):
+    data_dir = tmp_path / "data"
+    shutil.copytree(DATA_DIR, data_dir)
+    (data_dir / "orders.csv").write_text("id,customer_id,product_id,qty,unit_price\n", encoding="utf-8")
+    convert_data_dir(str(data_dir))
+
+    batch = load_order_batch_mapped(table_path(str(data_dir), "orders"))
+    assert len(batch) == 0
+    assert compute_report(*read_data(str(data_dir), binary=True)) == compute_report(*read_data(str(data_dir)))
@@ -0,0 +1,87 @@
+# src/test/test_cache.py
+
+import os
+import sys
+import shutil
+
+import pytest
+
+base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))  # src
+sys.path.insert(0, base_dir)
+
+from refacto import cache
+from refacto.cache import cache_dir_for, cached_report, evict, read_data_cached
+from refacto.io_handler import read_data
+from refacto.order_report import compute_report
+
+
+@pytest.fixture
+def data_dir(tmp_path):
+    dst = tmp_path / "data"
+    shutil.copytree(os.path.join(base_dir, "refacto", "data"), dst)
+    return str(dst)
+
+
+def test_snapshot_matches_csv_parsing(data_dir):
+    expected = read_data(data_dir)
+
+    assert read_data_cached(data_dir) == expected  # parsing + écriture du snapshot
+    assert len(os.listdir(cache_dir_for(data_dir))) == 1
+    assert read_data_cached(data_dir) == expected  # relu depuis le snapshot
+
+
+def test_snapshot_invalidated_when_file_changes(data_dir):
+    read_data_cached(data_dir)
+    with open(os.path.join(data_dir, "orders.csv"), "a", encoding="utf-8") as f:
+        f.write("O026,C001,P005,1,3.50,2025-01-29,,14:00\n")
+
+    orders = read_data_cached(data_dir)[4]
+    assert orders[-1].id == "O026"
+    assert len(os.listdir(cache_dir_for(data_dir))) == 2
+
+
+def test_eviction_keeps_cache_under_budget(data_dir):
+    read_data_cached(data_dir)
+    with open(os.path.join(data_dir, "orders.csv"), "a", encoding="utf-8") as f:
+        f.write("O026,C001,P005,1,3.50,2025-01-29,,14:00\n")
+    read_data_cached(data_dir, max_bytes=1)
+
+    # Le snapshot le plus récent est toujours conservé
+    assert len(os.listdir(cache_dir_for(data_dir))) == 1
+    evict(cache_dir_for(data_dir), max_bytes=0)
+    assert os.listdir(cache_dir_for(data_dir)) == []
+
+
+def test_cached_report_skips_computation(data_dir):
+    calls = []
+
+    def compute():
+        calls.append(1)
+        return compute_report(*read_data(data_dir))
+
+    first = cached_report(data_dir, compute)
+    assert cached_report(data_dir, compute) == first
+    assert len(calls) == 1
+
+
+def test_snapshot_invalidated_when_parsing_code_changes(data_dir, monkeypatch):
+    read_data_cached(data_dir)
+    signature = cache._source_signature
+    # loader.py modifié : sha256 différent
+    monkeypatch.setattr(cache, "_source_signature",
+                        lambda modules: signature(modules) + (("loader.py" in modules),))
+    read_data_cached(data_dir)
+    assert len(os.listdir(cache_dir_for(data_dir))) == 2
+
+
+def test_concurrent_stores_do_not_share_a_temp_file(tmp_path):
+    from concurrent.futures import ThreadPoolExecutor
+
+    path = str(tmp_path / "cache" / "snapshot.pickle")
+    values = [list(range(i, i + 20000)) for i in range(8)]
+    with ThreadPoolExecutor(8) as pool:
+        list(pool.map(lambda v: cache._store(path, v, cache.MAX_CACHE_BYTES), values))
+
+    # Fichier complet, écrit par l'un des runs ; aucun fichier temporaire oublié
+    assert cache._load(path) in values
+    assert os.listdir(tmp_path / "cache") == ["snapshot.pickle"]
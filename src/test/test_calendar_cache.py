@@ -0,0 +1,32 @@
+# src/test/test_calendar_cache.py
+
+import os
+import sys
+
+base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))  # src
+sys.path.insert(0, base_dir)
+
+from refacto.calendar_cache import MEMO_SIZE, NO_DAY, parse_day, parse_hour, weekday
+from refacto.discounts import compute_weekend_bonus
+from refacto.models import Order
+
+
+def test_order_fields_are_parsed_at_construction():
+    o = Order("O1", "C1", "P1", 1, 2.0, date="2025-01-04", time="08:30")
+
+    assert o.hour == 8
+    assert weekday(o.day) == 5  # samedi
+    assert compute_weekend_bonus(100.0, o.day) == 100.0 * 1.05
+
+
+def test_malformed_values_keep_defaults():
+    for date in ("", "2025-13-01", "not a date", None):
+        assert parse_day(date) == NO_DAY
+        assert compute_weekend_bonus(100.0, parse_day(date)) == 100.0
+    for time in ("", "xx:00", None):
+        assert parse_hour(time) == parse_hour("12:00") == 12
+
+
+def test_memo_is_bounded():
+    assert parse_day.cache_info().maxsize == MEMO_SIZE
+    assert parse_hour.cache_info().maxsize == MEMO_SIZE
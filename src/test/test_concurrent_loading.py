@@ -0,0 +1,48 @@
+# src/test/test_concurrent_loading.py
+
+import os
+import sys
+import asyncio
+import shutil
+
+import pytest
+
+base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))  # src
+sys.path.insert(0, base_dir)
+
+from refacto.io_handler import read_data, read_data_async
+
+
+@pytest.fixture
+def data_dir(tmp_path):
+    dst = tmp_path / "data"
+    shutil.copytree(os.path.join(base_dir, "refacto", "data"), dst)
+    return dst
+
+
+def test_concurrent_and_async_match_sequential(data_dir):
+    expected = read_data(str(data_dir))
+
+    assert read_data(str(data_dir), concurrent=True) == expected
+    assert asyncio.run(read_data_async(str(data_dir))) == expected
+
+
+def test_missing_promotions_is_still_silent(data_dir):
+    os.remove(data_dir / "promotions.csv")
+
+    assert read_data(str(data_dir), concurrent=True)[3] == {}
+    assert asyncio.run(read_data_async(str(data_dir)))[3] == {}
+
+
+def test_first_failing_table_wins(data_dir):
+    os.remove(data_dir / "customers.csv")
+    os.remove(data_dir / "orders.csv")
+
+    with pytest.raises(FileNotFoundError) as sequential:
+        read_data(str(data_dir))
+    with pytest.raises(FileNotFoundError) as concurrent:
+        read_data(str(data_dir), concurrent=True)
+    with pytest.raises(FileNotFoundError) as async_:
+        asyncio.run(read_data_async(str(data_dir)))
+
+    assert sequential.value.filename == concurrent.value.filename == async_.value.filename
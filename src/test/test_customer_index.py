@@ -0,0 +1,107 @@
+# src/test/test_customer_index.py
+
+import os
+import pickle
+import sys
+import shutil
+
+import pytest
+
+base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))  # src
+sys.path.insert(0, base_dir)
+
+from refacto import customer_index
+from refacto.customer_index import compute_customer_report, index_path, open_index
+from refacto.io_handler import read_data
+from refacto.order_report import compute_report
+
+
+@pytest.fixture
+def data_dir(tmp_path):
+    dst = tmp_path / "data"
+    shutil.copytree(os.path.join(base_dir, "refacto", "data"), dst)
+    return dst
+
+
+def blocks(data_dir):
+    """Bloc texte et JSON de chaque client dans le rapport complet."""
+    result, json_data = compute_report(*read_data(str(data_dir)))
+    texts = result.split("\n\n")[:-1]  # dernier morceau : totaux globaux
+    return {rec["customer_id"]: (text + "\n", rec) for text, rec in zip(texts, json_data)}
+
+
+def test_single_customer_matches_full_report(data_dir):
+    expected = blocks(data_dir)
+
+    for cid, (text, record) in expected.items():
+        assert compute_customer_report(cid, str(data_dir)) == (text, record)
+    assert os.path.exists(index_path(str(data_dir / "orders.csv")))
+    assert compute_customer_report("UNKNOWN", str(data_dir)) is None
+
+
+def test_index_follows_appends_and_rewrites(data_dir):
+    orders_path = data_dir / "orders.csv"
+    lines = orders_path.read_text(encoding="utf-8").splitlines(keepends=True)
+    orders_path.write_text("".join(lines[:12]), encoding="utf-8")
+    open_index(str(orders_path))
+
+    with open(orders_path, "a", encoding="utf-8") as f:
+        f.write("".join(lines[12:]))
+    for cid, expected in blocks(data_dir).items():
+        assert compute_customer_report(cid, str(data_dir)) == expected
+
+    # Fichier réécrit : l'index est reconstruit
+    orders_path.write_text("".join(lines[:1] + lines[:0:-1]), encoding="utf-8")
+    for cid, expected in blocks(data_dir).items():
+        assert compute_customer_report(cid, str(data_dir)) == expected
+
+
+def test_reference_tables_kept_in_index(data_dir, monkeypatch):
+    expected = blocks(data_dir)
+    assert compute_customer_report("C001", str(data_dir)) == expected["C001"]
+
+    # Nouveau processus : tables relues depuis l'index, pas depuis les CSV
+    monkeypatch.setattr(customer_index, "_indexes", {})
+    loaded = []
+    reference_tables = customer_index._reference_tables
+    monkeypatch.setattr(customer_index, "_reference_tables",
+                        lambda d: loaded.append(d) or reference_tables(d))
+    assert compute_customer_report("C001", str(data_dir)) == expected["C001"]
+    assert compute_customer_report("C002", str(data_dir)) == expected["C002"]
+    assert loaded == []
+
+    # CSV de référence modifié : tables reparsées une fois
+    with open(data_dir / "customers.csv", "a", encoding="utf-8") as f:
+        f.write("C001,Alice Martin,PREMIUM,ZONE4,EUR\n")
+    expected = blocks(data_dir)
+    assert compute_customer_report("C001", str(data_dir)) == expected["C001"]
+    assert compute_customer_report("C002", str(data_dir)) == expected["C002"]
+    assert len(loaded) == 1
+
+
+def test_lookup_reads_only_key_table_and_customer_slice(data_dir, monkeypatch):
+    expected = blocks(data_dir)
+    orders_path = str(data_dir / "orders.csv")
+    assert compute_customer_report("C001", str(data_dir)) == expected["C001"]
+    offsets_file = customer_index.offsets_path(orders_path)
+    offsets_mtime = os.stat(offsets_file).st_mtime_ns
+
+    # orders.csv.idx : table des clés seulement, sans offsets ni tables
+    with open(index_path(orders_path), "rb") as f:
+        assert set(pickle.load(f)) == {"version", "header", "offset", "tail", "keys", "starts"}
+
+    # Nouveau processus : ni offsets des autres clients ni tables en mémoire
+    monkeypatch.setattr(customer_index, "_indexes", {})
+    index = open_index(orders_path)
+    assert index.tables is None
+    assert sorted(index.keys) == index.keys and "C001" in index.keys
+    monkeypatch.setattr(customer_index.CustomerIndex, "_read_all",
+                        lambda self: pytest.fail("offsets lus en entier"))
+    assert compute_customer_report("C002", str(data_dir)) == expected["C002"]
+    assert index.offsets("UNKNOWN") is None
+
+    # Tables de référence modifiées : le fichier d'offsets n'est pas réécrit
+    with open(data_dir / "customers.csv", "a", encoding="utf-8") as f:
+        f.write("C001,Alice Martin,PREMIUM,ZONE4,EUR\n")
+    assert compute_customer_report("C001", str(data_dir)) == blocks(data_dir)["C001"]
+    assert os.stat(offsets_file).st_mtime_ns == offsets_mtime
@@ -0,0 +1,72 @@
+# src/test/test_date_store.py
+
+import os
+import sys
+import shutil
+
+base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))  # src
+sys.path.insert(0, base_dir)
+
+from refacto.date_store import OrderStore, read_data_window
+from refacto.io_handler import read_data
+from refacto.order_report import compute_report
+
+DATA_DIR = os.path.join(base_dir, "refacto", "data")
+HEADER = "id,customer_id,product_id,qty,unit_price,date,promo_code,time"
+# Fichier non trié par date : la première commande de C002 dans le fichier est un samedi de mars.
+ROWS = [
+    "O1,C002,P001,1,1299.00,2024-03-09,,11:00",
+    "O2,C002,P003,2,89.99,2024-01-10,,09:00",
+    "O3,C001,P002,3,29.99,2024-01-13,,15:00",
+    "O4,C002,P004,1,499.00,2024-01-31,,16:00",
+    "O5,C001,P001,1,1299.00,,,10:00",
+    "O6,C003,P005,4,19.99,2024-02-29,,08:30",
+    "O7,C001,P003,1,89.99,2024-03-01,,12:00",
+]
+
+
+def filtered_report(tmp_path, rows):
+    """Rapport du code actuel sur un orders.csv filtré à la main."""
+    data_dir = tmp_path / "filtered"
+    shutil.copytree(DATA_DIR, data_dir, dirs_exist_ok=True)
+    (data_dir / "orders.csv").write_text("\n".join([HEADER] + rows) + "\n", encoding="utf-8")
+    return compute_report(*read_data(str(data_dir)))
+
+
+def test_window_matches_filtered_file(tmp_path):
+    store_dir = str(tmp_path / "store")
+    orders_csv = tmp_path / "orders.csv"
+    # Deux ingestions successives (ajout à des partitions existantes)
+    orders_csv.write_text("\n".join([HEADER] + ROWS[:4]) + "\n", encoding="utf-8")
+    OrderStore(store_dir).ingest(str(orders_csv))
+    orders_csv.write_text("\n".join([HEADER] + ROWS[4:]) + "\n", encoding="utf-8")
+    assert OrderStore(store_dir).ingest(str(orders_csv)) == 3
+    assert OrderStore(store_dir).months() == ["2024-01", "2024-02", "2024-03", "undated"]
+
+    windows = [
+        ("2024-01-01", "2024-01-31", [1, 2, 3]),
+        ("2024-01-13", "2024-03-09", [0, 2, 3, 5, 6]),
+        ("2024-02-01", None, [0, 5, 6]),
+        (None, None, list(range(len(ROWS)))),
+    ]
+    for date_from, date_to, kept in windows:
+        expected = filtered_report(tmp_path, [ROWS[i] for i in kept])
+        tables = read_data_window(DATA_DIR, store_dir, date_from, date_to)
+        assert compute_report(*tables) == expected
+        # Même fenêtre appliquée aux commandes déjà chargées
+        all_orders = read_data_window(DATA_DIR, store_dir)
+        assert compute_report(*all_orders, date_from=date_from, date_to=date_to) == expected
+
+
+def test_only_overlapping_months_are_opened(tmp_path, monkeypatch):
+    store = OrderStore(str(tmp_path / "store"))
+    orders_csv = tmp_path / "orders.csv"
+    orders_csv.write_text("\n".join([HEADER] + ROWS) + "\n", encoding="utf-8")
+    store.ingest(str(orders_csv))
+
+    opened = []
+    original = OrderStore._selected
+    monkeypatch.setattr(OrderStore, "_selected",
+                        lambda self, path, lo, hi: opened.append(path) or original(self, path, lo, hi))
+    assert len(store.load("2024-02-01", "2024-02-29")) == 1
+    assert [os.path.basename(os.path.dirname(p)) for p in opened] == ["2024-02"]
@@ -0,0 +1,100 @@
+# src/test/test_external.py
+
+import dataclasses
+import logging
+import os
+import sys
+import random
+
+base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))  # src
+sys.path.insert(0, base_dir)
+
+from refacto import external
+from refacto.external import iter_entries_external
+from refacto.instrumentation import instrument
+from refacto.io_handler import read_data
+from refacto.models import Customer, Order, order_row
+from refacto.order_report import compute_report
+
+DATA_DIR = os.path.join(base_dir, "refacto", "data")
+
+
+def synthetic_orders(products, n=3000, seed=7):
+    rng = random.Random(seed)
+    pids = sorted(products)
+    for i in range(n):
+        yield Order(f"O{i}", f"C{rng.randrange(900):04d}", rng.choice(pids), rng.randint(1, 5),
+                    round(rng.uniform(0.5, 300), 2), f"2024-03-{rng.randint(1, 28):02d}", "",
+                    f"{rng.randint(6, 20):02d}:00")
+
+
+def test_external_report_matches_in_memory(tmp_path):
+    customers, products, shipping_zones, promotions, _ = read_data(DATA_DIR)
+    customers = dict(customers, **{f"C{i:04d}": Customer(f"C{i:04d}", f"N{i}", "BASIC", "ZONE1", "EUR")
+                                   for i in range(0, 900, 3)})
+    orders = list(synthetic_orders(products))
+    expected = compute_report(customers, products, shipping_zones, promotions, orders)
+
+    # Budget minuscule : partitions redécoupées plusieurs fois, toutes dans le budget
+    for budget in (1 << 12, 1 << 30):
+        with instrument() as recorder:
+            result = compute_report(customers, products, shipping_zones, promotions, iter(orders),
+                                    memory_budget=budget)
+        assert result == expected
+        assert recorder.counters["external.over_budget"] == 0
+
+    entries = iter_entries_external(customers, products, shipping_zones, promotions, orders,
+                                    memory_budget=1 << 12, tmp_dir=str(tmp_path))
+    ids = [entry["json"]["customer_id"] for entry in entries]
+    assert ids == sorted(ids)
+    assert os.listdir(tmp_path) == []  # fichiers temporaires supprimés
+
+
+def test_heavy_customer_not_resplit_and_bounded_merge(tmp_path, monkeypatch, caplog):
+    customers, products, shipping_zones, promotions, _ = read_data(DATA_DIR)
+    orders = [dataclasses.replace(o, customer_id="C001") for o in synthetic_orders(products, n=2000)]
+    expected = compute_report(customers, products, shipping_zones, promotions, orders)
+
+    # Un seul client : une partition volumineuse mais dans le budget en clients
+    with instrument() as recorder:
+        result = compute_report(customers, products, shipping_zones, promotions, iter(orders),
+                                memory_budget=1 << 12)
+    assert result == expected
+    assert recorder.counters["external.splits"] == 0
+
+    # Fusion par passes de 2 runs ; un seul redécoupage ne suffit pas : avertissement
+    orders = list(synthetic_orders(products))
+    expected = compute_report(customers, products, shipping_zones, promotions, orders)
+    monkeypatch.setattr(external, "MAX_FAN_IN", 2)
+    monkeypatch.setattr(external, "MAX_DEPTH", 1)
+    with caplog.at_level(logging.WARNING, logger="refacto.external"), instrument() as recorder:
+        result = compute_report(customers, products, shipping_zones, promotions, iter(orders),
+                                memory_budget=1 << 12)
+    assert result == expected
+    assert recorder.counters["external.over_budget"] > 0
+    assert recorder.counters["external.merge_passes"] > 1
+    assert "memory budget" in caplog.text
+
+
+def test_forced_split_spreads_customers(tmp_path):
+    _, products, _, _, _ = read_data(DATA_DIR)
+    rows = [order_row(o) for o in synthetic_orders(products)]
+    parts = external._spill(iter(rows), str(tmp_path), "p", 64, 1 << 20)
+    part = max(parts, key=os.path.getsize)
+    customers = {row[1] for row in external._read_rows(part)}
+
+    children = external._spill(external._read_rows(part), str(tmp_path), "p-x",
+                               external.SPLIT_FANOUT, 1 << 20, salt=1)
+    spread = [{row[1] for row in external._read_rows(c)} for c in children]
+    assert set().union(*spread) == customers
+    assert sum(1 for c in spread if c) > external.SPLIT_FANOUT // 2
+    assert max(len(c) for c in spread) < len(customers) // 2
+
+
+def test_partition_count_follows_budget():
+    assert external.partition_count(1 << 12) == 1
+    assert external.partition_count(256 << 20) == external.MAX_PARTITIONS
+    # Commandes connues : pas plus de partitions qu'il n'en faut pour tenir dans le budget
+    assert external.partition_count(256 << 20, rows=100_000) == 1
+    assert external.partition_count(8 << 20, rows=100_000) == 7
+    assert external.partition_count(1 << 20, rows=100_000) == 16  # plafond des tampons
@@ -0,0 +1,57 @@
+# src/test/test_fast_loader.py
+
+import os
+import sys
+
+import pytest
+
+base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))  # src
+sys.path.insert(0, base_dir)
+
+from refacto.fast_loader import load_orders_fast
+from refacto.order_store import load_order_batch
+from refacto.instrumentation import instrument
+
+HEADER = "id,customer_id,product_id,qty,unit_price,date,promo_code,time"
+ROWS = [
+    "O1,C1,P1,2,3.5,2025-01-04,,08:00",
+    "O2,C2,P2,0,1.0,2025-01-05,PROMO,09:00",  # qty <= 0 : rejetée
+    "O3,C1,P1,x,1.0,,,",  # illisible
+    'O4,"C,3",P1,1,2.0,2025-01-01,"multi\nligne",10:00',  # guillemets + saut de ligne
+    "",
+    "O5,C4",  # champs manquants
+    "O6,C5,P3,1,2.0,2025-01-01,,10:00,extra",
+    "O7,C1,P1,3,-1,2025-01-01,,10:00",  # prix négatif : rejetée
+]
+
+
+def as_tuples(batch):
+    return [(o.id, o.customer_id, o.product_id, o.qty, o.unit_price, o.date, o.promo_code, o.time)
+            for o in batch]
+
+
+@pytest.fixture(params=["\n", "\r\n"])
+def orders_path(request, tmp_path):
+    path = tmp_path / "orders.csv"
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        f.write(request.param.join([HEADER] + ROWS * 20) + request.param)
+    return str(path)
+
+
+@pytest.mark.parametrize("chunk_bytes", [1, 7, 50, 1 << 20])
+def test_same_orders_as_csv_loader(orders_path, chunk_bytes):
+    # Petits blocs : les champs entre guillemets chevauchent les frontières
+    expected = as_tuples(load_order_batch(orders_path, keep_ids=True))
+
+    assert as_tuples(load_orders_fast(orders_path, jobs=1, chunk_bytes=chunk_bytes,
+                                      keep_ids=True)) == expected
+
+
+def test_parallel_chunks_and_counters(orders_path):
+    with instrument() as expected:
+        batch = load_order_batch(orders_path, keep_ids=True)
+    with instrument() as recorder:
+        fast = load_orders_fast(orders_path, jobs=2, chunk_bytes=64, keep_ids=True)
+
+    assert as_tuples(fast) == as_tuples(batch)
+    assert recorder.metrics["counters"] == expected.metrics["counters"]
@@ -48,4 +48,119 @@ def test_golden_master(golden_master_path, json_output_path):
     json_customer_ids = [c["customer_id"] for c in json_data]
 
     assert sorted(customer_ids_in_output) == sorted(json_customer_ids), \
-        "Le JSON ne correspond pas aux clients du rapport !"
\ No newline at end of file
+        "Le JSON ne correspond pas aux clients du rapport !"
+
+def test_golden_master_streaming(golden_master_path):
+    with open(golden_master_path, "r", encoding="utf-8") as f:
+        expected_output = f.read()
+
+    # Mode streaming : les commandes sont lues via un générateur, une seule passe
+    assert refactored_run(stream_orders=True) == expected_output
+
+
+def test_golden_master_numpy_engine(golden_master_path):
+    pytest.importorskip("numpy")
+    from refacto.io_handler import read_data
+    from refacto.order_report import compute_report
+
+    with open(golden_master_path, "r", encoding="utf-8") as f:
+        expected_output = f.read()
+
+    data = read_data(os.path.join(base_dir, "refacto", "data"))
+    result, json_data = compute_report(*data, engine="numpy")
+
+    assert result == expected_output
+    assert json_data == compute_report(*data)[1]
+
+
+def test_golden_master_parallel(golden_master_path):
+    with open(golden_master_path, "r", encoding="utf-8") as f:
+        expected_output = f.read()
+
+    # Clients répartis par hash de customer_id sur 2 processus
+    assert refactored_run(jobs=2) == expected_output
+
+
+def test_golden_master_compact_orders(golden_master_path):
+    with open(golden_master_path, "r", encoding="utf-8") as f:
+        expected_output = f.read()
+
+    # Commandes en OrderBatch (colonnes + dictionnaires), agrégées sans objet par ligne
+    assert refactored_run(compact=True) == expected_output
+
+
+def test_golden_master_concurrent_loading(golden_master_path):
+    with open(golden_master_path, "r", encoding="utf-8") as f:
+        expected_output = f.read()
+
+    # Tables de référence sur un pool de threads, orders.csv lu en parallèle
+    assert refactored_run(concurrent=True) == expected_output
+    assert refactored_run(concurrent=True, stream_orders=True) == expected_output
+
+
+def test_golden_master_fast_loader(golden_master_path):
+    with open(golden_master_path, "r", encoding="utf-8") as f:
+        expected_output = f.read()
+
+    # orders.csv parsé par blocs (mmap) sur plusieurs processus
+    assert refactored_run(fast=True) == expected_output
+
+
+def test_golden_master_streamed_output(golden_master_path, capsys):
+    with open(golden_master_path, "r", encoding="utf-8") as f:
+        expected_output = f.read()
+    output_path = os.path.join(base_dir, "refacto", "output.json")
+
+    refactored_run()
+    with open(output_path, "r", encoding="utf-8") as f:
+        expected_json = f.read()
+    capsys.readouterr()
+
+    # Blocs client écrits au fil de l'eau : même texte (print) et même output.json
+    assert refactored_run(stream_output=True, buffer_size=64) is None
+    assert capsys.readouterr().out == expected_output + "\n"
+    with open(output_path, "r", encoding="utf-8") as f:
+        assert f.read() == expected_json
+
+
+def test_golden_master_sqlite(golden_master_path, tmp_path):
+    from refacto.sqlite_source import export_csv_to_sqlite
+
+    with open(golden_master_path, "r", encoding="utf-8") as f:
+        expected_output = f.read()
+
+    # Mêmes données exportées dans SQLite, agrégation exécutée en SQL
+    db_path = export_csv_to_sqlite(os.path.join(base_dir, "refacto", "data"), str(tmp_path / "orders.db"))
+    assert refactored_run(sqlite_path=db_path) == expected_output
+
+
+def test_golden_master_external_aggregation(golden_master_path):
+    with open(golden_master_path, "r", encoding="utf-8") as f:
+        expected_output = f.read()
+
+    # Accumulateurs par client déversés sur disque, fusion k-voies des partitions
+    assert refactored_run(memory_budget=1 << 10) == expected_output
+
+
+def test_golden_master_binary_format(golden_master_path, tmp_path):
+    from refacto.binary_store import convert_data_dir
+    from refacto.io_handler import read_data
+    from refacto.order_report import compute_report
+
+    with open(golden_master_path, "r", encoding="utf-8") as f:
+        expected_output = f.read()
+
+    # Fichiers .col relus par mmap, colonnes sans copie
+    convert_data_dir(os.path.join(base_dir, "refacto", "data"), str(tmp_path))
+    result, _ = compute_report(*read_data(str(tmp_path), binary=True))
+    assert result == expected_output
+
+
+def test_golden_master_loyalty_ledger(golden_master_path, tmp_path):
+    with open(golden_master_path, "r", encoding="utf-8") as f:
+        expected_output = f.read()
+
+    # Registre neuf alimenté par orders.csv, puis run suivant sans nouvelle commande
+    ledger_path = str(tmp_path / "ledger.db")
+    assert refactored_run(ledger_path=ledger_path) == expected_output
+    assert refactored_run(ledger_path=ledger_path) == expected_output
@@ -0,0 +1,77 @@
+# src/test/test_incremental.py
+
+import os
+import sys
+import shutil
+
+import pytest
+
+base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))  # src
+sys.path.insert(0, base_dir)
+
+from refacto.incremental import compute_report_incremental, load_state, state_path
+
+
+@pytest.fixture
+def expected_output():
+    with open(os.path.join(base_dir, "legacy", "expected", "report.txt"), "r", encoding="utf-8") as f:
+        return f.read()
+
+
+@pytest.fixture
+def data_dir(tmp_path):
+    src = os.path.join(base_dir, "refacto", "data")
+    dst = tmp_path / "data"
+    shutil.copytree(src, dst)
+    return dst
+
+
+def test_incremental_append_matches_golden_master(data_dir, tmp_path, expected_output):
+    orders_path = data_dir / "orders.csv"
+    lines = orders_path.read_text(encoding="utf-8").splitlines(keepends=True)
+    orders_path.write_text("".join(lines[:12]), encoding="utf-8")
+    output_path = str(tmp_path / "output.json")
+
+    compute_report_incremental(str(data_dir), output_path)
+    first_offset = load_state(state_path(output_path))["orders_offset"]
+
+    with open(orders_path, "a", encoding="utf-8") as f:
+        f.write("".join(lines[12:]))
+    result, _ = compute_report_incremental(str(data_dir), output_path)
+
+    assert result == expected_output
+    assert load_state(state_path(output_path))["orders_offset"] > first_offset
+
+
+def test_incremental_full_rebuild_when_reference_changes(data_dir, tmp_path, expected_output):
+    output_path = str(tmp_path / "output.json")
+    compute_report_incremental(str(data_dir), output_path)
+
+    products_path = data_dir / "products.csv"
+    original = products_path.read_text(encoding="utf-8")
+    products_path.write_text(original.replace("1299.00", "999.00"), encoding="utf-8")
+    changed, _ = compute_report_incremental(str(data_dir), output_path)
+    assert changed != expected_output
+
+    products_path.write_text(original, encoding="utf-8")
+    result, _ = compute_report_incremental(str(data_dir), output_path)
+    assert result == expected_output
+
+
+def test_row_being_written_is_left_for_next_run(data_dir, tmp_path, expected_output):
+    orders_path = data_dir / "orders.csv"
+    content = orders_path.read_bytes()
+    lines = content.splitlines(keepends=True)
+    head = b"".join(lines[:12])
+    qty_start = len(b",".join(lines[12].split(b",")[:3])) + 1
+    partial = lines[12][:qty_start + 1]  # coupée après le premier chiffre de qty
+    orders_path.write_bytes(head + partial)
+    output_path = str(tmp_path / "output.json")
+
+    compute_report_incremental(str(data_dir), output_path)
+    assert load_state(state_path(output_path))["orders_offset"] == len(head)
+
+    orders_path.write_bytes(content)  # l'écrivain termine la ligne puis ajoute le reste
+    result, _ = compute_report_incremental(str(data_dir), output_path)
+    assert result == expected_output
+    assert load_state(state_path(output_path))["orders_offset"] == len(content)
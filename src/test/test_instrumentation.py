@@ -0,0 +1,47 @@
+# src/test/test_instrumentation.py
+
+import os
+import sys
+import json
+import shutil
+
+base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))  # src
+sys.path.insert(0, base_dir)
+
+from refacto.instrumentation import instrument
+from refacto.io_handler import read_data
+from refacto.order_report import compute_report
+
+
+def test_spans_and_loader_counters(tmp_path):
+    data_dir = tmp_path / "data"
+    shutil.copytree(os.path.join(base_dir, "refacto", "data"), data_dir)
+    os.remove(data_dir / "promotions.csv")
+    with open(data_dir / "orders.csv", "a", encoding="utf-8") as f:
+        f.write("O026,C001,P005,0,3.50,2025-01-29,,14:00\n")
+        f.write("O027,C001,P005,abc,3.50,2025-01-29,,14:00\n")
+
+    metrics_path = tmp_path / "metrics.json"
+    with instrument(str(metrics_path), memory=True, profile=True):
+        compute_report(*read_data(str(data_dir)))
+
+    with open(metrics_path, "r", encoding="utf-8") as f:
+        metrics = json.load(f)
+
+    spans = {s["name"]: s for s in metrics["spans"]}
+    assert {"load.customers", "load.orders", "aggregate", "report"} <= set(spans)
+    assert spans["load.orders"]["rows"] == 25
+    assert spans["aggregate"]["peak_mb"] is not None
+    assert metrics["counters"] == {
+        "loader.promotions.missing": 1,
+        "loader.orders.rows": 25,
+        "loader.orders.rejected": 1,
+        "loader.orders.unparsable": 1,
+    }
+    assert "top" in metrics["profile"]
+
+
+def test_disabled_by_default():
+    # Hors d'un bloc instrument(), span / count sont des no-op
+    result, _ = compute_report(*read_data(os.path.join(base_dir, "refacto", "data")))
+    assert result.startswith("Customer: Alice Martin (C001)")
@@ -0,0 +1,81 @@
+# src/test/test_loader_filters.py
+
+import os
+import sys
+import shutil
+
+import pytest
+
+base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))  # src
+sys.path.insert(0, base_dir)
+
+from refacto.io_handler import read_data
+from refacto.loader import CustomerFilter, load_customers, load_orders
+from refacto.order_report import compute_report
+
+DATA_DIR = os.path.join(base_dir, "refacto", "data")
+
+
+def blocks(report):
+    """{customer_id: bloc texte} ; les deux dernières lignes sont les totaux globaux."""
+    chunks = report.split("\n\n")
+    return {chunk.split("\n", 1)[0].rsplit("(", 1)[1].rstrip(")"): chunk for chunk in chunks[:-1]}
+
+
+def full_report(data_dir=DATA_DIR):
+    return compute_report(*read_data(data_dir))
+
+
+@pytest.mark.parametrize("where", [
+    CustomerFilter(zones=frozenset({"ZONE3", "ZONE4"})),
+    CustomerFilter(levels=frozenset({"PREMIUM"})),
+    CustomerFilter(currencies=frozenset({"USD"}), zones=frozenset({"ZONE3"})),
+])
+@pytest.mark.parametrize("options", [{}, {"stream_orders": True}, {"compact": True}])
+def test_filtered_blocks_match_full_report(where, options):
+    customers = load_customers(os.path.join(DATA_DIR, "customers.csv"))
+    expected_ids = sorted(cid for cid, c in customers.items() if where.matches(c))
+    text, json_data = full_report()
+    expected_text = blocks(text)
+
+    tables = read_data(DATA_DIR, where=where, **options)
+    result, filtered_json = compute_report(*tables)
+
+    assert expected_ids and sorted(tables[0]) == expected_ids
+    assert blocks(result) == {cid: expected_text[cid] for cid in expected_ids}
+    assert filtered_json == [e for e in json_data if e["customer_id"] in expected_ids]
+
+
+def test_orders_and_products_pushdown():
+    where = CustomerFilter(zones=frozenset({"ZONE4"}))
+    customers, products, _, _, orders = read_data(DATA_DIR, where=where)
+    assert {o.customer_id for o in orders} == set(customers)
+    assert set(products) == {o.product_id for o in orders}
+    assert len(orders) < len(load_orders(os.path.join(DATA_DIR, "orders.csv")))
+
+
+def test_unknown_customer_and_duplicate_rows(tmp_path):
+    data_dir = tmp_path / "data"
+    shutil.copytree(DATA_DIR, data_dir)
+    with open(data_dir / "orders.csv", "a", encoding="utf-8") as f:
+        f.write("O900,C999,P001,1,1299.00,2024-03-09,,11:00\n")  # absent de customers.csv
+    with open(data_dir / "customers.csv", "a", encoding="utf-8") as f:
+        f.write("C001,Alice Martin,BASIC,ZONE4,EUR\n")  # doublon : la dernière ligne l'emporte
+    text, _ = full_report(str(data_dir))
+    expected = blocks(text)
+
+    # Client inconnu : profil par défaut (ZONE1), retenu par un filtre ZONE1
+    result, _ = compute_report(*read_data(str(data_dir), where=CustomerFilter(zones=frozenset({"ZONE1"}))))
+    assert "C999" in blocks(result) and "C001" not in blocks(result)
+    assert blocks(result) == {cid: expected[cid] for cid in blocks(result)}
+
+    result, _ = compute_report(*read_data(str(data_dir), where=CustomerFilter(zones=frozenset({"ZONE4"}))))
+    assert "C001" in blocks(result) and "C999" not in blocks(result)
+    assert blocks(result) == {cid: expected[cid] for cid in blocks(result)}
+
+
+def test_where_rejected_with_binary_and_cache():
+    with pytest.raises(ValueError):
+        read_data(DATA_DIR, binary=True, where=CustomerFilter(zones=frozenset({"ZONE1"})))
+    with pytest.raises(ValueError):
+        read_data(DATA_DIR, cache=True, where=CustomerFilter(zones=frozenset({"ZONE1"})))
@@ -0,0 +1,92 @@
+# src/test/test_loyalty_ledger.py
+
+import os
+import sys
+import shutil
+
+base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))  # src
+sys.path.insert(0, base_dir)
+
+from refacto.calculations import compute_loyalty_points
+from refacto.io_handler import read_data
+from refacto.loader import load_orders
+from refacto.loyalty_ledger import LoyaltyLedger
+from refacto.order_report import compute_report
+
+DATA_DIR = os.path.join(base_dir, "refacto", "data")
+HEADER = "id,customer_id,product_id,qty,unit_price,date,promo_code,time\n"
+HISTORY = [
+    "H1,C001,P001,2,1299.00,2023-05-02,,11:00\n",
+    "H2,C003,P003,10,89.99,2023-06-10,,09:00\n",
+    "H3,C001,P002,0,29.99,2023-06-11,,15:00\n",  # rejetée (qty <= 0)
+    "H4,C011,P004,1,499.00,2023-07-01,,16:00\n",
+]
+
+
+def write(path, rows, header=True):
+    with open(path, "a", encoding="utf-8") as f:
+        f.write((HEADER if header else "") + "".join(rows))
+
+
+def test_points_match_full_scan_across_appends(tmp_path):
+    orders = tmp_path / "orders.csv"
+    write(orders, HISTORY[:2])
+    with LoyaltyLedger(str(tmp_path / "ledger.db")) as ledger:
+        assert ledger.update(str(orders)) == 2
+        write(orders, HISTORY[2:], header=False)
+        # Seules les lignes ajoutées sont lues, par transactions d'une commande
+        assert ledger.update(str(orders), batch_rows=1) == 1
+        assert ledger.update(str(orders)) == 0
+
+        expected = compute_loyalty_points(load_orders(str(orders)))
+        assert ledger.points_for(expected) == expected
+        assert ledger.points("C404") is None
+
+
+def test_report_uses_lifetime_points(tmp_path):
+    history = tmp_path / "history.csv"
+    write(history, HISTORY)
+    ledger_path = str(tmp_path / "ledger.db")
+    with LoyaltyLedger(ledger_path) as ledger:
+        ledger.update(str(history))
+        ledger.update(os.path.join(DATA_DIR, "orders.csv"))
+
+    # Les points cumulés sont ceux du fichier concaténé historique + courant
+    concatenated = tmp_path / "all.csv"
+    shutil.copy(history, concatenated)
+    with open(os.path.join(DATA_DIR, "orders.csv"), encoding="utf-8") as f:
+        write(concatenated, f.read().splitlines(keepends=True)[1:], header=False)
+    lifetime = compute_loyalty_points(load_orders(str(concatenated)))
+
+    tables = read_data(DATA_DIR)
+    with LoyaltyLedger(ledger_path) as ledger:
+        _, json_data = compute_report(*tables, ledger=ledger)
+    _, current = compute_report(*tables)
+    assert {e["customer_id"]: e["loyalty_points"] for e in json_data} == {
+        e["customer_id"]: int(lifetime[e["customer_id"]]) for e in current}
+    assert "C011" not in {e["customer_id"] for e in json_data}
+    assert json_data != current
+
+
+def test_replaced_file_is_counted_as_new(tmp_path):
+    orders = tmp_path / "orders.csv"
+    write(orders, HISTORY[:2])
+    with LoyaltyLedger(str(tmp_path / "ledger.db")) as ledger:
+        ledger.update(str(orders))
+        orders.unlink()
+        write(orders, ["N1,C001,P001,1,10.00,2024-01-02,,11:00\n"])  # rotation : nouveau contenu
+        assert ledger.update(str(orders)) == 1
+        assert ledger.points("C001") == 2 * 1299.00 * 0.01 + 1 * 10.00 * 0.01
+
+
+def test_row_written_in_two_parts_is_counted_once_complete(tmp_path):
+    orders = tmp_path / "orders.csv"
+    write(orders, HISTORY[:1])
+    with LoyaltyLedger(str(tmp_path / "ledger.db")) as ledger:
+        assert ledger.update(str(orders)) == 1
+        write(orders, ["H2,C003,P003,1"], header=False)  # écrivain en cours de ligne
+        assert ledger.update(str(orders)) == 0
+        write(orders, ["0,89.99,2023-06-10,,09:00\n"], header=False)
+        assert ledger.update(str(orders)) == 1
+        assert ledger.points("C003") == 10 * 89.99 * 0.01
+        assert ledger.points_for(compute_loyalty_points(load_orders(str(orders)))) == compute_loyalty_points(load_orders(str(orders)))
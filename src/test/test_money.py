@@ -0,0 +1,68 @@
+# src/test/test_money.py
+
+import os
+import sys
+
+import pytest
+
+base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))  # src
+sys.path.insert(0, base_dir)
+
+from refacto.money import cents_rules, div_round, to_units
+from refacto.discounts import compute_volume_discount
+from refacto.io_handler import read_data
+from refacto.order_report import compute_report
+
+DATA_DIR = os.path.join(base_dir, "refacto", "data")
+
+
+def test_units_and_rounding():
+    assert to_units("1299.00", 2) == 129900
+    assert to_units(0.1, 4) == 1000  # repr du flottant parsé : '0.1'
+    assert to_units("10", 2) == 1000
+    # Plus fin que l'échelle : arrondi au plus proche, demi éloigné de zéro
+    assert to_units("0.125", 2) == 13
+    assert to_units(-0.125, 2) == -13
+    assert to_units(1299.004, 2) == 129900
+    assert [div_round(n, 10) for n in (14, 15, 16, -15, -14)] == [1, 2, 2, -2, -1]
+
+
+def test_half_cent_rounds_half_up():
+    # 50.90 x 5 % = 2.545 : le flottant vaut 2.54499..., le moteur entier arrondit à 2.55
+    assert f"{compute_volume_discount(50.90, 'BASIC'):.2f}" == "2.54"
+    assert cents_rules().volume_discount(5090, "BASIC") == 255
+
+
+def test_cents_report_is_consistent():
+    tables = read_data(DATA_DIR)
+    float_result, float_json = compute_report(*tables)
+    result, json_data = compute_report(*tables, money="cents")
+
+    # Même structure ; montants au centime près du calcul flottant
+    assert len(result.splitlines()) == len(float_result.splitlines())
+    assert [r["customer_id"] for r in json_data] == [r["customer_id"] for r in float_json]
+    for rec, float_rec in zip(json_data, float_json):
+        assert abs(rec["total"] - float_rec["total"]) <= 0.02
+    # Totaux globaux exacts : somme des totaux client en centimes
+    grand_total = sum(round(rec["total"] * 100) for rec in json_data)
+    assert f"Grand Total: {grand_total // 100}.{grand_total % 100:02d} EUR" in result
+
+    with pytest.raises(ValueError):
+        compute_report(*tables, money="cents", engine="numpy")
+
+
+def test_price_finer_than_a_cent(tmp_path):
+    import shutil
+
+    data_dir = tmp_path / "data"
+    shutil.copytree(DATA_DIR, data_dir)
+    products = data_dir / "products.csv"
+    original = products.read_text(encoding="utf-8")
+    assert ",1299.00," in original
+    products.write_text(original.replace(",1299.00,", ",1299.005,"), encoding="utf-8")
+
+    # Le mode flottant accepte le prix ; le mode entier l'arrondit à 1299.01
+    compute_report(*read_data(str(data_dir)))
+    result, json_data = compute_report(*read_data(str(data_dir)), money="cents")
+    products.write_text(original.replace(",1299.00,", ",1299.01,"), encoding="utf-8")
+    assert compute_report(*read_data(str(data_dir)), money="cents") == (result, json_data)
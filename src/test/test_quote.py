@@ -0,0 +1,70 @@
+# src/test/test_quote.py
+
+import os
+import sys
+import shutil
+from datetime import datetime
+
+import pytest
+
+base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))  # src
+sys.path.insert(0, base_dir)
+
+from refacto.io_handler import read_data
+from refacto.order_report import compute_report, format_customer_entry
+from refacto.quote import QuoteEngine, QuoteLine
+
+DATA_DIR = os.path.join(base_dir, "refacto", "data")
+AT = datetime(2025, 3, 8, 9, 30)  # samedi matin : bonus matin
+
+
+def report_with_lines(tmp_path, cid, lines):
+    """Rapport du code actuel avec les lignes ajoutées à la fin de orders.csv."""
+    data_dir = tmp_path / "data"
+    shutil.copytree(DATA_DIR, data_dir)
+    with open(data_dir / "orders.csv", "a", encoding="utf-8") as f:
+        for i, line in enumerate(lines):
+            f.write(f"Q{i},{cid},{line['product_id']},{line['qty']},{line['unit_price']},"
+                    f"{AT.date().isoformat()},{line.get('promo_code', '')},{AT:%H:%M}\n")
+    return compute_report(*read_data(str(data_dir)))
+
+
+@pytest.mark.parametrize("cid, lines", [
+    ("C002", [{"product_id": "P001", "qty": 2, "unit_price": 1299.00},
+              {"product_id": "P003", "qty": 1, "unit_price": 89.99, "promo_code": "PREMIUM10"}]),
+    ("C003", [{"product_id": "P999", "qty": 3, "unit_price": 12.50}]),  # produit inconnu
+    ("C404", [{"product_id": "P002", "qty": 1, "unit_price": 29.99}]),  # premier achat
+])
+def test_quote_matches_report_with_lines_appended(tmp_path, cid, lines):
+    engine = QuoteEngine(*read_data(DATA_DIR, compact=True))
+    amounts = engine.quote(cid, lines, AT)
+
+    result, json_data = report_with_lines(tmp_path, cid, lines)
+    entry = format_customer_entry(amounts)
+    assert "\n".join(entry["lines"]) in result
+    assert entry["json"] in json_data
+    assert amounts["converted_tax"] == entry["tax"]
+
+
+def test_quote_does_not_change_state():
+    engine = QuoteEngine(*read_data(DATA_DIR))
+    before = engine.quote("C001", [QuoteLine("P001", 1)], AT)
+    engine.quote("C001", [QuoteLine("P001", 5)], AT)
+    assert engine.quote("C001", [QuoteLine("P001", 1)], AT) == before
+
+
+def test_invalid_lines():
+    engine = QuoteEngine(*read_data(DATA_DIR))
+    with pytest.raises(ValueError):
+        engine.quote("C001", [QuoteLine("P001", 0)], AT)
+    with pytest.raises(ValueError):
+        engine.quote("C001", [QuoteLine("P999", 1)], AT)  # prix inconnu
+    with pytest.raises(ValueError):
+        engine.quote("C404", [], AT)
+    # Quantité non entière refusée, pas tronquée
+    with pytest.raises(ValueError):
+        engine.quote("C001", [{"product_id": "P001", "qty": 2.7}], AT)
+    with pytest.raises(ValueError):
+        engine.quote("C001", ["P001:1"], AT)
+    assert engine.quote("C001", [{"product_id": "P001", "qty": 2.0}], AT) == \
+        engine.quote("C001", [QuoteLine("P001", 2)], AT)
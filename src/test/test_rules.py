@@ -0,0 +1,82 @@
+# src/test/test_rules.py
+
+import os
+import sys
+import json
+
+import pytest
+
+base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))  # src
+sys.path.insert(0, base_dir)
+
+from refacto import calculations
+from refacto.rules import DEFAULT_RULES_PATH, Rules, default_rules, load_rules
+from refacto.models import ShippingZone
+from refacto.io_handler import read_data
+from refacto.order_report import compute_report
+
+ZONE = ShippingZone(zone="ZONE3", base=10.0, per_kg=0.8)
+
+
+def test_default_rules_reproduce_legacy_ladders():
+    rules = default_rules()
+
+    assert rules.volume_discount(50, "BASIC") == 0.0
+    assert rules.volume_discount(100, "BASIC") == 100 * 0.05
+    assert rules.volume_discount(2000, "BASIC") == 2000 * 0.15
+    assert rules.volume_discount(2000, "PREMIUM") == 2000 * 0.20
+    assert rules.loyalty_discount(400) == 40.0
+    assert rules.loyalty_discount(900) == 100.0
+    assert rules.shipping(40, 12.0, "ZONE3", ZONE) == (10.0 + (12.0 - 10) * 0.8) * 1.2
+    assert rules.shipping(40, 7.0, "ZONE1", ZONE) == 10.0 + (7.0 - 5) * 0.3
+    assert rules.shipping(60, 25.0, "ZONE3", ZONE) == (25.0 - 20) * 0.25
+    assert rules.handling_fee(15) == 2.5 and rules.handling_fee(21) == 5.0
+    assert rules.currency_rate("USD") == 1.1 and rules.currency_rate("JPY") == 1.0
+
+
+def test_last_declared_matching_tier_wins():
+    with open(DEFAULT_RULES_PATH, encoding="utf-8") as f:
+        config = json.load(f)
+    config["handling"] = [{"above": 20, "fee": 5.0}, {"above": 10, "fee": 2.5}]
+    rules = Rules(config)
+
+    # Comme deux `if` successifs : le palier « > 10 », déclaré après, écrase « > 20 »
+    assert rules.handling_fee(25) == 2.5
+    assert rules.handling_fee(5) == 0.0
+
+
+def test_array_form_matches_scalar():
+    np = pytest.importorskip("numpy")
+    rules = default_rules()
+    sub = np.array([10.0, 50.0, 75.5, 100.0, 640.0, 1500.0])
+    weight = np.array([1.0, 5.0, 7.5, 10.0, 22.0, 30.0])
+    levels = ["BASIC", "PREMIUM", "BASIC", "PREMIUM", "BASIC", "PREMIUM"]
+    zones = ["ZONE1", "ZONE3", "ZONE4", "ZONE9", "ZONE1", "ZONE3"]
+
+    assert rules.volume_discount_array(sub, levels).tolist() == [
+        rules.volume_discount(s, lv) for s, lv in zip(sub.tolist(), levels)]
+    assert rules.shipping_array(sub, weight, zones, [ZONE] * 6).tolist() == [
+        rules.shipping(s, w, z, ZONE) for s, w, z in zip(sub.tolist(), weight.tolist(), zones)]
+    assert rules.handling_array(np.array([0, 11, 21])).tolist() == [0.0, 2.5, 5.0]
+
+
+def test_custom_rules_file(tmp_path):
+    with open(DEFAULT_RULES_PATH, encoding="utf-8") as f:
+        config = json.load(f)
+    config["currency_rates"] = {}
+    path = tmp_path / "rules.json"
+    path.write_text(json.dumps(config), encoding="utf-8")
+    tables = read_data(os.path.join(base_dir, "refacto", "data"))
+
+    _, default_json = compute_report(*tables)
+    _, custom_json = compute_report(*tables, rules=load_rules(str(path)))
+
+    usd = [i for i, c in enumerate(default_json) if c["currency"] == "USD"]
+    assert usd and all(custom_json[i]["total"] != default_json[i]["total"] for i in usd)
+
+
+def test_legacy_constants_alias_default_rules():
+    rules = default_rules()
+    assert calculations.SHIPPING_LIMIT == rules.shipping_limit == 50
+    assert calculations.handling_fee == rules.handling_fee(11) == 2.5
+    assert rules.handling_fee(21) == 2 * calculations.handling_fee
@@ -0,0 +1,56 @@
+# src/test/test_run_options.py
+
+import os
+import sys
+
+import pytest
+
+base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))  # src
+sys.path.insert(0, base_dir)
+
+from refacto.loader import CustomerFilter
+from refacto.order_report import INCOMPATIBLE, INCOMPATIBLE_PAIRS, RunOptions, check_modes, run
+
+# Options qui activent chaque mode de la table INCOMPATIBLE.
+ENABLE = {
+    "numpy": dict(engine="numpy"),
+    "jobs": dict(jobs=2),
+    "memory_budget": dict(memory_budget=1 << 20),
+    "cents": dict(money="cents"),
+    "ledger": dict(ledger_path="ledger.db"),
+    "stream_output": dict(stream_output=True),
+    "incremental": dict(incremental=True),
+    "cache": dict(cache=True),
+    "sqlite": dict(sqlite_path="orders.db"),
+    "store": dict(store="store"),
+    "window": dict(date_from="2024-01-01"),
+    "where": dict(where=CustomerFilter(zones=frozenset({"ZONE1"}))),
+    "binary": dict(binary=True),
+    "concurrent": dict(concurrent=True),
+    "fast": dict(fast=True),
+}
+
+
+def test_every_mode_of_the_table_is_detected():
+    modes = set(INCOMPATIBLE) | {b for others in INCOMPATIBLE.values() for b in others}
+    assert modes == set(ENABLE)
+    for mode, options in ENABLE.items():
+        assert RunOptions(**options).modes() == [mode]
+        check_modes(RunOptions(**options).modes())
+    assert RunOptions().modes() == []
+
+
+@pytest.mark.parametrize("pair", sorted(sorted(pair) for pair in INCOMPATIBLE_PAIRS))
+def test_incompatible_pair_rejected_before_reading(pair, tmp_path, monkeypatch):
+    a, b = pair
+    # Aucune lecture ni écriture : l'erreur est levée avant d'ouvrir un fichier
+    monkeypatch.chdir(tmp_path)
+    with pytest.raises(ValueError, match=f"{a} is not supported with {b}|{b} is not supported with {a}"):
+        run(RunOptions(**ENABLE[a]), **ENABLE[b])
+    assert os.listdir(tmp_path) == []
+
+
+def test_compatible_modes_pass():
+    check_modes(["numpy", "where", "window"])
+    check_modes(["jobs", "stream_output", "store", "window"])
+    check_modes(["memory_budget", "stream_output", "where"])
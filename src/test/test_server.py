@@ -0,0 +1,153 @@
+# src/test/test_server.py
+
+import os
+import sys
+import json
+import shutil
+import threading
+import http.client
+
+import pytest
+
+base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))  # src
+sys.path.insert(0, base_dir)
+
+from refacto.server import ReportService, make_server
+from refacto.io_handler import read_data
+from refacto.order_report import compute_report
+
+
+@pytest.fixture
+def data_dir(tmp_path):
+    dst = tmp_path / "data"
+    shutil.copytree(os.path.join(base_dir, "refacto", "data"), dst)
+    return dst
+
+
+@pytest.fixture
+def server(data_dir):
+    server = make_server(ReportService(str(data_dir)), port=0)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def get(server, path):
+    conn = http.client.HTTPConnection("127.0.0.1", server.server_port, timeout=10)
+    try:
+        conn.request("GET", path)
+        response = conn.getresponse()
+        return response.status, response.read().decode("utf-8")
+    finally:
+        conn.close()
+
+
+def test_endpoints_match_compute_report(server, data_dir):
+    result, json_data = compute_report(*read_data(str(data_dir)))
+
+    assert get(server, "/report") == (200, result)
+    status, body = get(server, "/report.json")
+    assert status == 200 and body == json.dumps(json_data, indent=2)
+    record = json_data[0]
+    status, body = get(server, "/customers/" + record["customer_id"])
+    assert status == 200 and json.loads(body) == record
+    assert get(server, "/customers/UNKNOWN")[0] == 404
+
+    status, body = get(server, "/health")
+    assert status == 200 and json.loads(body)["status"] == "ok"
+    counters = json.loads(get(server, "/metrics")[1])["counters"]
+    assert counters["report.computed"] == 1  # calculé une fois par snapshot
+
+
+def test_only_changed_table_is_reloaded(server, data_dir):
+    service = server.service
+    get(server, "/report")
+    before = dict(service.counters)
+
+    with open(data_dir / "orders.csv", "a", encoding="utf-8") as f:
+        f.write("O9999,C001,P001,1,1299.00,2024-02-01,,09:30\n")
+    result, _ = compute_report(*read_data(str(data_dir)))
+
+    assert get(server, "/report") == (200, result)
+    assert service.counters["reload.orders"] == before["reload.orders"] + 1
+    assert service.counters["reload.customers"] == before["reload.customers"]
+    assert service.counters["report.computed"] == before["report.computed"] + 1
+
+
+def test_service_without_promotions_file(data_dir):
+    promotions = data_dir / "promotions.csv"
+    content = promotions.read_bytes()
+    promotions.unlink()
+    service = ReportService(str(data_dir))
+    assert service.report()[0] == compute_report(*read_data(str(data_dir)))[0]
+
+    # Apparition du fichier : rechargée comme une modification
+    promotions.write_bytes(content)
+    assert service.report()[0] == compute_report(*read_data(str(data_dir)))[0]
+    assert service.counters["reload.promotions"] == 2
+
+
+def test_concurrent_requests_during_reloads(server, data_dir):
+    results = {compute_report(*read_data(str(data_dir)))[0]}
+    errors = []
+
+    def client():
+        for _ in range(20):
+            status, body = get(server, "/report")
+            if status != 200:
+                errors.append(body)
+            else:
+                results_seen.append(body)
+
+    results_seen = []
+    threads = [threading.Thread(target=client) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for i in range(5):
+        with open(data_dir / "orders.csv", "a", encoding="utf-8") as f:
+            f.write(f"X{i},C002,P002,1,29.99,2024-02-0{i + 1},,11:00\n")
+        results.add(compute_report(*read_data(str(data_dir)))[0])
+    for t in threads:
+        t.join()
+
+    # Chaque réponse est le rapport d'un état complet des fichiers, jamais un mélange
+    assert not errors
+    assert set(results_seen) <= results
+
+
+def test_failed_reload_keeps_serving_previous_snapshot(server, data_dir):
+    status, report = get(server, "/report")
+    os.remove(data_dir / "products.csv")
+
+    assert get(server, "/report") == (200, report)
+    health = json.loads(get(server, "/health")[1])
+    assert health["status"] == "stale" and "products.csv" in health["last_error"]
+
+
+def test_quote_endpoint(server, data_dir):
+    from refacto.quote import QuoteEngine
+    from datetime import datetime
+
+    request = {"customer_id": "C001", "at": "2025-03-08T09:30",
+               "lines": [{"product_id": "P001", "qty": 1, "promo_code": "PREMIUM10"}]}
+    expected = QuoteEngine(*read_data(str(data_dir))).quote(
+        "C001", request["lines"], datetime(2025, 3, 8, 9, 30))
+
+    def post(body):
+        conn = http.client.HTTPConnection("127.0.0.1", server.server_port, timeout=10)
+        try:
+            conn.request("POST", "/quote", body=json.dumps(body),
+                         headers={"Content-Type": "application/json"})
+            response = conn.getresponse()
+            return response.status, json.loads(response.read())
+        finally:
+            conn.close()
+
+    assert post(request) == (200, expected)
+    status, body = post({"customer_id": "C001", "lines": [{"product_id": "P001", "qty": 0}]})
+    assert status == 400 and "ValueError" in body["error"]
+    # Corps qui n'est pas un objet {customer_id, lines} : 400, pas 500
+    for body in (["C001"], "C001", {"customer_id": "C001", "lines": "P001"}):
+        assert post(body)[0] == 400
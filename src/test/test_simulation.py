@@ -0,0 +1,88 @@
+# src/test/test_simulation.py
+
+import os
+import sys
+
+import pytest
+
+base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))  # src
+sys.path.insert(0, base_dir)
+
+pytest.importorskip("numpy")
+
+from refacto import aggregation, calculations, discounts
+from refacto.io_handler import read_data
+from refacto.order_report import compute_report
+from refacto.rules import Rules, default_rules
+from refacto.simulation import Scenario, merge_config, simulate
+
+DATA_DIR = os.path.join(base_dir, "refacto", "data")
+OVERRIDES = {
+    "volume_discount": [{"above": 100, "rate": 0.08}, {"above": 800, "rate": 0.12}],
+    "shipping": {"limit": 80},
+    "handling": [{"above": 2, "fee": 3.0}],
+    "currency_rates": {"USD": 1.2},
+}
+
+
+def report_totals(json_data):
+    return {e["customer_id"]: e["total"] for e in json_data}
+
+
+def grand_total(report):
+    return report.splitlines()[-2]
+
+
+def test_baseline_matches_report():
+    tables = read_data(DATA_DIR)
+    result, json_data = compute_report(*tables)
+    simulation = simulate(*tables, [])
+    assert f"Grand Total: {simulation.baseline.grand_total:.2f} EUR" == grand_total(result)
+    assert dict(zip(simulation.customer_ids, simulation.baseline.totals.tolist())) == report_totals(json_data)
+    assert not simulation.baseline.deltas.any()
+
+
+def test_rule_overrides_match_full_rerun():
+    tables = read_data(DATA_DIR)
+    merged = merge_config(default_rules().config, OVERRIDES)
+    assert merged["shipping"]["under_limit"] == default_rules().config["shipping"]["under_limit"]
+    result, json_data = compute_report(*tables, rules=Rules(merged))
+
+    simulation = simulate(*tables, [{"name": "pricing-b", "rules": OVERRIDES}])
+    scenario = simulation.scenarios[0]
+    assert dict(zip(simulation.customer_ids, scenario.totals.tolist())) == report_totals(json_data)
+    assert f"Grand Total: {scenario.grand_total:.2f} EUR" == grand_total(result)
+    baseline = simulation.baseline.totals
+    assert scenario.deltas.tolist() == (scenario.totals - baseline).tolist()
+
+
+def test_max_discount_and_tax(monkeypatch):
+    tables = read_data(DATA_DIR)
+    simulation = simulate(*tables, [Scenario("cap-150", max_discount=150),
+                                    Scenario("tax-25", tax=0.25)])
+    cap, tax = simulation.scenarios
+
+    monkeypatch.setattr(discounts, "MAX_DISCOUNT", 150)
+    _, json_data = compute_report(*tables)
+    assert dict(zip(simulation.customer_ids, cap.totals.tolist())) == report_totals(json_data)
+
+    monkeypatch.setattr(discounts, "MAX_DISCOUNT", 200)
+    monkeypatch.setattr(calculations, "TAX", 0.25)
+    monkeypatch.setattr(aggregation, "TAX", 0.25)
+    result, json_data = compute_report(*tables)
+    assert dict(zip(simulation.customer_ids, tax.totals.tolist())) == report_totals(json_data)
+    assert f"Grand Total: {tax.grand_total:.2f} EUR" == grand_total(result)
+    assert tax.tax_collected > simulation.baseline.tax_collected
+
+
+@pytest.mark.parametrize("rate", [0.055, 0.1, 0.196, 0.21])
+def test_tax_scenario_matches_report_at_that_rate(monkeypatch, rate):
+    # Commandes en OrderBatch : bases taxables lues dans les colonnes
+    simulation = simulate(*read_data(DATA_DIR, compact=True), [Scenario("tax", tax=rate)])
+    scenario = simulation.scenarios[0]
+
+    monkeypatch.setattr(calculations, "TAX", rate)
+    monkeypatch.setattr(aggregation, "TAX", rate)
+    result, json_data = compute_report(*read_data(DATA_DIR))
+    assert dict(zip(simulation.customer_ids, scenario.totals.tolist())) == report_totals(json_data)
+    assert f"Tax Collected: {scenario.tax_collected:.2f} EUR" in result
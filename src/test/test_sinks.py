@@ -0,0 +1,52 @@
+# src/test/test_sinks.py
+
+import io
+import os
+import sys
+import json
+
+import pytest
+
+base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))  # src
+sys.path.insert(0, base_dir)
+
+from refacto.io_handler import read_data
+from refacto.order_report import compute_report, iter_report_entries
+from refacto.sinks import TextSink, JsonArraySink, NdjsonSink, _BufferedSink, stream_report
+
+
+@pytest.fixture
+def tables():
+    return read_data(os.path.join(base_dir, "refacto", "data"))
+
+
+def test_sinks_match_in_memory_report(tables):
+    result, json_data = compute_report(*tables)
+    expected_json = io.StringIO()
+    json.dump(json_data, expected_json, indent=2)
+
+    text, array, lines = io.StringIO(), io.StringIO(), io.StringIO()
+    grand_total, _ = stream_report(iter_report_entries(*tables), [
+        TextSink(text, buffer_size=1), JsonArraySink(array), NdjsonSink(lines, buffer_size=10),
+    ])
+
+    assert text.getvalue() == result + "\n"
+    assert array.getvalue() == expected_json.getvalue()
+    records = [json.loads(line) for line in lines.getvalue().splitlines()]
+    assert records[:-1] == json_data
+    assert records[-1]["grand_total"] == round(grand_total, 2)
+
+
+def test_empty_report_is_an_empty_array():
+    array = io.StringIO()
+    stream_report([], [JsonArraySink(array)])
+
+    assert array.getvalue() == "[]"
+
+
+def test_sink_without_write_entry_cannot_be_created():
+    class Incomplete(_BufferedSink):
+        pass
+
+    with pytest.raises(TypeError):
+        Incomplete(io.StringIO())
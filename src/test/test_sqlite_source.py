@@ -0,0 +1,53 @@
+# src/test/test_sqlite_source.py
+
+import os
+import sys
+import shutil
+
+base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))  # src
+sys.path.insert(0, base_dir)
+
+from refacto.sqlite_source import AGGREGATE_SQL, connect, compute_report_sqlite, export_csv_to_sqlite
+from refacto.io_handler import read_data
+from refacto.order_report import compute_report
+
+ORDERS = """id,customer_id,product_id,qty,unit_price,date,promo_code,time
+O1,C001,P001,3,10.1,2024-01-06,P10,08:15
+O2,C002,P002,1,0.7,2024-01-02,,14:00
+O3,C001,UNKNOWN,2,3.3,2024-01-03,FIX,
+O4,C002,P001,0,5.0,2024-01-04,,09:00
+O5,C001,P002,7,1.1,2024-01-01,P10,09:59
+O6,C003,P001,abc,1.0,2024-01-01,,10:00
+O7,C002,P015,4,2.25,not-a-date,FIX,7:45
+"""
+
+
+def test_sqlite_report_matches_csv_report(tmp_path):
+    data_dir = tmp_path / "data"
+    shutil.copytree(os.path.join(base_dir, "refacto", "data"), data_dir)
+    (data_dir / "orders.csv").write_text(ORDERS, encoding="utf-8")
+    with open(data_dir / "promotions.csv", "a", encoding="utf-8") as f:
+        f.write("P10,PERCENTAGE,10,true\nFIX,FIXED,0.5,true\n")
+
+    db_path = export_csv_to_sqlite(str(data_dir), str(tmp_path / "orders.db"))
+
+    assert compute_report_sqlite(db_path) == compute_report(*read_data(str(data_dir)))
+
+
+def test_aggregate_scans_customer_index(tmp_path):
+    db_path = export_csv_to_sqlite(os.path.join(base_dir, "refacto", "data"), str(tmp_path / "orders.db"))
+    conn = connect(db_path)
+    try:
+        conn.executescript("""
+            CREATE TEMP TABLE hours (time TEXT PRIMARY KEY, hour INTEGER);
+            CREATE TEMP TABLE promo_rates (code TEXT PRIMARY KEY, rate REAL, fixed REAL);
+        """)
+        plan = [row[-1] for row in conn.execute("EXPLAIN QUERY PLAN " + AGGREGATE_SQL, {
+            "morning_rate": 0.03, "default_weight": 1.0, "default_hour": 12,
+            "loyalty_ratio": 0.01, "tax": 0.2})]
+    finally:
+        conn.close()
+
+    # Ordre de l'index client : ni tri temporaire pour le GROUP BY, ni ordre des sommes modifié
+    assert any("idx_orders_customer" in step for step in plan)
+    assert not any("TEMP B-TREE" in step for step in plan)